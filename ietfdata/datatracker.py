@@ -46,28 +46,36 @@
 
 import ast
 import copy
-import dateutil.tz
 import glob
 import json
 import logging
 import os
 import re
 import requests
-import requests_cache
 import sys
 import time
 import urllib.parse
 
+from collections      import namedtuple
+from contextlib       import contextmanager
 from datetime         import date, datetime, timedelta, timezone
 from enum             import Enum
 from inspect          import signature
-from typing           import List, Optional, Tuple, Dict, Iterator, Type, TypeVar, Any, Union, Generic, get_origin
+from typing           import List, Optional, Set, Tuple, Dict, Iterator, Type, TypeVar, Any, Union, Generic, Callable, get_args, get_origin, cast, TYPE_CHECKING
 from typing_extensions import Self
 from dataclasses      import dataclass, field
 from pathlib          import Path
-from pydantic         import BaseModel, ValidationError, model_validator
-from pymongo          import MongoClient, ASCENDING, TEXT, ReplaceOne
-from pymongo.database import Database
+from pydantic         import BaseModel, ConfigDict, PrivateAttr, ValidationError, model_validator
+
+# The MongoDB cache is optional, and its dependencies are slow to import, so
+# pymongo, requests_cache, and ietfdata.datatracker_cache are only imported
+# when the cache is enabled. Similarly, pandas is only imported when needed:
+if TYPE_CHECKING:
+    import requests_cache
+    from pymongo                    import MongoClient
+    from pymongo.database           import Database
+    from ietfdata.datatracker_cache import RequestCache, CrawlObjects
+    import pandas as pd
 
 # =================================================================================================================================
 # Classes to represent the JSON-serialised objects returned by the Datatracker API:
@@ -75,7 +83,13 @@ from pymongo.database import Database
 # ---------------------------------------------------------------------------------------------------------------------------------
 # URI types:
 
+# The models below are validated the first time they are used, rather than
+# when this module is imported, so that scripts only pay the cost of building
+# the models they need.
+
 class URI(BaseModel):
+    model_config = ConfigDict(defer_build=True)
+
     uri    : Optional[str]
     root   : str = ""
     params : Dict[str, Any] = field(default_factory=dict)
@@ -108,7 +122,26 @@ class GroupURI(URI):
 # Resource type
 
 class Resource(BaseModel):
+    model_config = ConfigDict(defer_build=True)
+
     resource_uri : URI
+    _expanded    : Dict[str, Any] = PrivateAttr(default_factory=dict)
+
+    def expanded(self, field: str) -> Any:
+        """
+        Return the object referred to by `field`, that was retrieved by passing
+        `expand=[field]` to the list method that returned this object. For
+        fields holding a list of URIs, returns a list of objects. Returns None
+        for objects that could not be retrieved, and raises KeyError if the
+        field was not expanded.
+        """
+        return self._expanded[field]
+
+    def __eq__(self, other: Any) -> bool:
+        # Expanded references are not part of the value of the object
+        if not isinstance(other, Resource):
+            return NotImplemented
+        return type(self) is type(other) and self.__dict__ == other.__dict__
 
 T = TypeVar('T', bound=Resource)
 R = TypeVar('R', bound=Type[Resource])
@@ -1599,15 +1632,48 @@ class SendQueueEntry(Resource):
 class Hints(Generic[T]):
     obj_type :  Type[T]
     sort_by : str
+    uri_key : Optional[str] = None   # The field used as the key in resource URIs, if different to sort_by
+
+
+class _CapturedQuery(Exception):
+    """
+    Raised by _retrieve_multi() to return the query that it was called with,
+    when capturing the query made by a list method.
+    """
+    def __init__(self, obj_uri: URI, obj_type: Type[Resource]) -> None:
+        self.obj_uri  = obj_uri
+        self.obj_type = obj_type
+
+
+@dataclass
+class _BatchState:
+    pending : Dict[str, Dict[str, URI]]       = field(default_factory=dict)   # Queued URIs, by endpoint
+    loaded  : Dict[str, Optional[Resource]]   = field(default_factory=dict)   # Retrieved objects, by URI
+
+
+class DataTrackerOfflineError(Exception):
+    """
+    Raised when the DataTracker is in offline mode, and a request cannot be
+    answered from the cache.
+    """
+    def __init__(self, url: str) -> None:
+        super().__init__(f"Not in cache (offline mode): {url}")
+        self.url = url
 
 
 class DataTracker:
     """
     A class for interacting with the IETF DataTracker.
     """
-    db_conn : Optional[MongoClient]
-    db      : Optional[Database]
-    backend : Optional[requests_cache.MongoCache]
+    db_conn : Optional["MongoClient"]
+    db      : Optional["Database"]
+    cache   : Optional["RequestCache"]
+    backend : Optional["requests_cache.MongoCache"]
+    session : requests.Session
+    offline : bool
+
+    _CACHE_DB = "ietfdata_requests"     # The MongoDB database holding the cached responses
+    _CRAWL_OBJECTS_LIMIT = 250000       # The number of decoded objects from cached crawls kept in memory
 
     def __init__(self,
                  use_cache     : bool = False,
@@ -1615,11 +1681,45 @@ class DataTracker:
                  mongodb_port  : str  = os.getenv("IETFDATA_CACHE_PORT", "27017"),
                  mongodb_user  : Optional[str] = os.getenv("IETFDATA_CACHE_USER"),
                  mongodb_pass  : Optional[str] = os.getenv("IETFDATA_CACHE_PASSWORD"),
-                 cache_timeout : Optional[timedelta] = None):
+                 cache_timeout : Optional[timedelta] = None,
+                 cache_max_size: Optional[int] = None,
+                 cache_policy  : str  = os.getenv("IETFDATA_CACHE_POLICY", "lru"),
+                 cache_compression: Optional[str] = os.getenv("IETFDATA_CACHE_COMPRESSION"),
+                 offline       : bool = False):
+        """
+        Parameters:
+            use_cache      -- If set, use MongoDB to cache Datatracker responses
+            mongodb_host   -- The MongoDB host used for the cache
+            mongodb_port   -- The MongoDB port used for the cache
+            mongodb_user   -- The MongoDB username, if needed
+            mongodb_pass   -- The MongoDB password, if needed
+            cache_timeout  -- How long to cache responses for, or None to follow the cache-control headers
+            cache_max_size -- The maximum size of the cache in bytes, or None for no limit
+                              (defaults to the IETFDATA_CACHE_MAX_SIZE environment variable)
+            cache_policy   -- How to choose responses to evict from the cache when it exceeds
+                              cache_max_size: "lru" (least recently used) or "lfu" (least frequently used)
+            cache_compression -- How to compress cached responses: "zstd", "zlib", "auto", or None
+                              for no compression (defaults to the IETFDATA_CACHE_COMPRESSION
+                              environment variable)
+            offline        -- If set, never access the network: requests that cannot be answered
+                              from the cache, including from expired responses, raise
+                              DataTrackerOfflineError (also enabled by the IETFDATA_OFFLINE
+                              environment variable)
+        """
 
         if os.getenv("IETFDATA_CACHE_HOST") is not None:
             use_cache = True
 
+        if os.getenv("IETFDATA_OFFLINE") is not None:
+            offline = True
+
+        if offline and not use_cache:
+            raise ValueError("DataTracker: offline mode requires the cache to be enabled")
+
+        if cache_max_size is None and os.getenv("IETFDATA_CACHE_MAX_SIZE") is not None:
+            from ietfdata.datatracker_cache import parse_size
+            cache_max_size = parse_size(os.environ["IETFDATA_CACHE_MAX_SIZE"])
+
         logging.getLogger('requests').setLevel('ERROR')
         logging.getLogger('requests_cache').setLevel('ERROR')
         logging.getLogger("urllib3").setLevel('ERROR')
@@ -1630,8 +1730,17 @@ class DataTracker:
         self.ua        = "glasgow-ietfdata/0.7.1"          # Update when making a new relaase
         self.base_url  = os.environ.get("IETFDATA_DT_URL", "https://datatracker.ietf.org")
         self.get_count = 0
+        self.offline   = offline
+        self._capture_query = False
+        self._batch         = None  # type: Optional[_BatchState]
+        self._no_bulk       = set() # type: Set[str]
+        self._crawl_objects = {}    # type: Dict[str, CrawlObjects]
 
         if use_cache:
+            import requests_cache
+            from pymongo                    import MongoClient
+            from ietfdata.datatracker_cache import RequestCache
+
             self.log.warning(f"mongodb host = {mongodb_host}")
             self.log.warning(f"mongodb port = {mongodb_port}")
             self.log.warning(f"mongodb user = {mongodb_user}")
@@ -1641,8 +1750,16 @@ class DataTracker:
                                        username = mongodb_user,
                                        password = mongodb_pass)
             self.db      = self.db_conn.ietfdata
-            self.backend = requests_cache.MongoCache(db_name="ietfdata_requests", connection=self.db_conn)
-            if cache_timeout is not None:
+            self.cache   = RequestCache(self.db_conn, self._CACHE_DB, cache_max_size, cache_policy, cache_compression)
+            self.backend = self.cache.backend
+            if cache_max_size is not None:
+                self.log.warning(f"Cache size limit = {cache_max_size} bytes ({cache_policy})")
+            if cache_compression is not None:
+                self.log.warning(f"Cache compression = {cache_compression}")
+            if offline:
+                self.log.warning(f"Cache enabled; offline mode")
+                self.session = requests_cache.CachedSession(backend=self.backend, stale_if_error=True)
+            elif cache_timeout is not None:
                 self.log.warning(f"Cache enabled; timeout = {cache_timeout}")
                 self.session = requests_cache.CachedSession(backend=self.backend, expire_after=cache_timeout)
             else:
@@ -1652,14 +1769,15 @@ class DataTracker:
             self.log.warning("CACHE DISABLED")
             self.db_conn = None
             self.db      = None
+            self.cache   = None
             self.backend = None
-            self.session = requests_cache.CachedSession(expire_after = requests_cache.DO_NOT_CACHE)
+            self.session = requests.Session()
 
         self._hints = {} # type: Dict[str, Hints]
         self._hints["/api/v1/doc/ballotdocevent/"]                 = Hints(BallotDocumentEvent,         "id")
         self._hints["/api/v1/doc/ballottype/"]                     = Hints(BallotType,                  "slug")
         self._hints["/api/v1/doc/docevent/"]                       = Hints(DocumentEvent,               "id")
-        self._hints["/api/v1/doc/document/"]                       = Hints(Document,                    "id")
+        self._hints["/api/v1/doc/document/"]                       = Hints(Document,                    "id", "name")
         self._hints["/api/v1/doc/documentauthor/"]                 = Hints(DocumentAuthor,              "id")
         self._hints["/api/v1/doc/documenturl/"]                    = Hints(DocumentUrl,                 "id")
         self._hints["/api/v1/doc/relateddocument/"]                = Hints(RelatedDocument,             "id")
@@ -1746,7 +1864,30 @@ class DataTracker:
     # Private methods to access the datatracker.
     #
     # The _datatracker_get_single() and _datatracker_get_multi() functions
-    # retrieve data from the IETF datatracker. 
+    # retrieve data from the IETF datatracker. All requests are made using
+    # _session_get(), that also records use of the cache.
+    #
+    # When the cache is enabled, _datatracker_get_multi() records each list
+    # query that it fetches in full. Later queries to the same endpoint that
+    # return a subset of those results are answered by filtering the cached
+    # responses, rather than by fetching from the datatracker.
+    #
+    # In offline mode, _session_get() only returns responses from the cache,
+    # and raises DataTrackerOfflineError for anything else.
+
+    def _session_get(self, req_url: str, req_params: Dict[str, Any], only_if_cached: bool = False) -> requests.Response:
+        req_headers = {'User-Agent': self.ua}
+        self.get_count += 1
+        if self.cache is None:
+            return self.session.get(url = req_url, params = req_params, headers = req_headers, verify = True, stream = False)
+        session = cast("requests_cache.CachedSession", self.session)
+        r = session.get(url = req_url, params = req_params, headers = req_headers, verify = True, stream = False, only_if_cached = only_if_cached or self.offline)
+        if self.offline and not only_if_cached and r.status_code == 504 and not r.from_cache:
+            raise DataTrackerOfflineError(f"{req_url}?{urllib.parse.urlencode(req_params)}" if len(req_params) > 0 else req_url)
+        if getattr(r, "cache_key", None) is not None:
+            self.cache.record_access(r.cache_key, r.from_cache)
+        return r
+
 
     def _datatracker_get_single(self, obj_uri: URI) -> Optional[Dict[str, Any]]:
         assert obj_uri.uri is not None
@@ -1754,11 +1895,9 @@ class DataTracker:
         while True:
             try:
                 req_url     = self.base_url + obj_uri.uri
-                req_headers = {'User-Agent': self.ua}
                 req_params  = obj_uri.params
-                self.get_count += 1
-                r = self.session.get(req_url, params = req_params, headers = req_headers, verify = True, stream = False)
-                self.log.debug(f"_datatracker_get_single in_cache={r.from_cache} cached={r.created_at} expires={r.expires} {req_url}")
+                r = self._session_get(req_url, req_params)
+                self.log.debug(f"_datatracker_get_single in_cache={getattr(r, 'from_cache', False)} cached={getattr(r, 'created_at', None)} expires={getattr(r, 'expires', None)} {req_url}")
                 if r.status_code == 200:
                     self.log.debug(F"_datatracker_get_single: ({r.status_code}) {obj_uri}")
                     url_obj = r.json() # type: Dict[str, Any]
@@ -1788,7 +1927,97 @@ class DataTracker:
                 retry_time *= 2
 
 
+    def _datatracker_get_cached_page(self, obj_uri: URI) -> Optional[Tuple[List[Dict[Any, Any]], URI, Optional[datetime]]]:
+        """
+        Fetch a page of the results of a list query from the cache, returning
+        the objects, the URI of the next page, and the time the cached page
+        expires, or None if not cached.
+        """
+        assert obj_uri.uri is not None
+        r = self._session_get(self.base_url + obj_uri.uri, obj_uri.params, only_if_cached = True)
+        if r.status_code != 200:
+            return None
+        page    = r.json()
+        expires = getattr(r, "expires", None)
+        if expires is not None and expires.tzinfo is None:
+            expires = expires.replace(tzinfo=timezone.utc)
+        return page['objects'], URI(uri=page['meta']['next']), expires
+
+
+    def _keep_crawl_objects(self, crawl_objs: "CrawlObjects") -> None:
+        """
+        Keep the decoded objects from a crawl for later queries, evicting the
+        least recently used crawls to keep at most _CRAWL_OBJECTS_LIMIT objects.
+        """
+        self._crawl_objects.pop(crawl_objs.crawl.endpoint, None)
+        if len(crawl_objs.objs) > self._CRAWL_OBJECTS_LIMIT:
+            return
+        kept = sum(len(c.objs) for c in self._crawl_objects.values())
+        for endpoint in list(self._crawl_objects):
+            if kept + len(crawl_objs.objs) <= self._CRAWL_OBJECTS_LIMIT:
+                break
+            kept -= len(self._crawl_objects.pop(endpoint).objs)
+        self._crawl_objects[crawl_objs.crawl.endpoint] = crawl_objs
+
+
+    def _datatracker_get_subsumed(self, get_uri: URI) -> Optional[List[Dict[Any, Any]]]:
+        """
+        Answer a list query by filtering the cached results of a wider query
+        to the same endpoint, returning None if that is not possible. The
+        results of the wider query are decoded once and kept, one crawl per
+        endpoint, so later queries to the endpoint are answered from memory
+        until the first of the cached pages expires. At most
+        _CRAWL_OBJECTS_LIMIT objects are kept, evicting the least recently
+        used crawls. Before the results are decoded, the first cached page
+        is used to check that the filters can be applied locally.
+        """
+        from ietfdata.datatracker_cache import CrawlObjects, filters_are_local
+
+        assert self.cache is not None
+        assert get_uri.uri is not None
+        for crawl in self.cache.find_crawls(get_uri.uri, get_uri.params):
+            filters = {param: value for param, value in get_uri.params.items() if crawl.params.get(param) != value}
+            crawl_objs = self._crawl_objects.get(crawl.endpoint)
+            if crawl_objs is not None and not self.offline and not crawl_objs.is_fresh():
+                self.log.debug(F"_datatracker_get_subsumed: {crawl.endpoint} {crawl_objs.crawl.params} expired")
+                del self._crawl_objects[crawl.endpoint]
+                crawl_objs = None
+            if crawl_objs is None or crawl_objs.crawl != crawl:
+                page = self._datatracker_get_cached_page(URI(uri=crawl.endpoint, params={**crawl.params, "limit": 100}))
+                if page is not None and len(page[0]) > 0 and not filters_are_local(page[0][0], filters):
+                    self.log.debug(F"_datatracker_get_subsumed: cannot apply {filters} locally")
+                    return None
+                objs    = [] # type: List[Dict[Any, Any]]
+                expires = None # type: Optional[datetime]
+                while page is not None:
+                    objs.extend(page[0])
+                    if page[2] is not None and (expires is None or page[2] < expires):
+                        expires = page[2]
+                    if page[1].uri is None:
+                        break
+                    page = self._datatracker_get_cached_page(page[1])
+                if page is None:
+                    self.log.debug(F"_datatracker_get_subsumed: {crawl.endpoint} {crawl.params} no longer cached")
+                    self.cache.forget_crawl(crawl)
+                    continue
+                crawl_objs = CrawlObjects(crawl, objs, expires)
+            self._keep_crawl_objects(crawl_objs)
+            result = crawl_objs.filter(filters)
+            if result is None:
+                self.log.debug(F"_datatracker_get_subsumed: cannot apply {filters} locally")
+                return None
+            self.log.debug(F"_datatracker_get_subsumed: {get_uri} answered from {crawl.endpoint} {crawl.params}")
+            return result
+        return None
+
+
     def _datatracker_get_multi(self, get_uri: URI, order_by: Optional[str] = None) -> Iterator[Dict[Any, Any]]:
+        if self.cache is not None and order_by is None:
+            subsumed = self._datatracker_get_subsumed(get_uri)
+            if subsumed is not None:
+                yield from subsumed
+                return
+
         obj_uri = copy.deepcopy(get_uri)
 
         assert "order_by" not in obj_uri.params
@@ -1807,11 +2036,9 @@ class DataTracker:
                 retry = False
                 req_url     = self.base_url + obj_uri.uri
                 req_params  = obj_uri.params
-                req_headers = {'User-Agent': self.ua}
                 try:
-                    self.get_count += 1
-                    r = self.session.get(url = req_url, params = req_params, headers = req_headers, verify = True, stream = False)
-                    self.log.debug(f"_datatracker_get_multi  in_cache={r.from_cache} cached={r.created_at} expires={r.expires} {obj_uri}")
+                    r = self._session_get(req_url, req_params)
+                    self.log.debug(f"_datatracker_get_multi  in_cache={getattr(r, 'from_cache', False)} cached={getattr(r, 'created_at', None)} expires={getattr(r, 'expires', None)} {obj_uri}")
                     if r.status_code == 200:
                         self.log.debug(F"_datatracker_get_multi ({r.status_code}) {obj_uri}")
                         meta = r.json()['meta']
@@ -1853,6 +2080,9 @@ class DataTracker:
                     retry = True
         if total_count != len(fetched_objs):
             self.log.warning(F"_datatracker_get_multi: expected {total_count} objects but got {len(fetched_objs)}")
+        elif self.cache is not None and order_by is None and get_uri.uri is not None:
+            self.cache.record_crawl(get_uri.uri, get_uri.params, total_count)
+            self._crawl_objects.pop(get_uri.uri, None)
 
 
     def _datatracker_get_multi_count(self, obj_type_uri: URI) -> int:
@@ -1863,11 +2093,9 @@ class DataTracker:
         while True:
             try:
                 req_url     = self.base_url + obj_type_uri.uri
-                req_params  = {"limit": 1}
-                req_headers = {'User-Agent': self.ua}
-                self.get_count += 1
-                r = self.session.get(url = req_url, params = req_params, headers = req_headers, verify = True, stream = False)
-                self.log.debug(f"_datatracker_get_multic in_cache={r.from_cache} cached={r.created_at} expires={r.expires} {req_url}")
+                req_params  = {"limit": 1} # type: Dict[str, Any]
+                r = self._session_get(req_url, req_params)
+                self.log.debug(f"_datatracker_get_multic in_cache={getattr(r, 'from_cache', False)} cached={getattr(r, 'created_at', None)} expires={getattr(r, 'expires', None)} {req_url}")
                 if r.status_code == 200:
                     meta = r.json()['meta']
                     total_count = meta['total_count'] # type: int
@@ -1893,6 +2121,12 @@ class DataTracker:
     # Private methods to retrieve objects from the datatracker:
 
     def _retrieve(self, obj_uri: URI, obj_type: Type[T]) -> Optional[T]:
+        if self._batch is not None and obj_uri.uri is not None and len(obj_uri.params) == 0:
+            return self._retrieve_batched(obj_uri, obj_type)
+        return self._retrieve_one(obj_uri, obj_type)
+
+
+    def _retrieve_one(self, obj_uri: URI, obj_type: Type[T]) -> Optional[T]:
         self.log.debug(F"_retrieve {obj_uri}")
         obj_json = self._datatracker_get_single(obj_uri)
         if obj_json is not None:
@@ -1912,24 +2146,378 @@ class DataTracker:
             return None
 
 
-    def _retrieve_multi(self, obj_uri: URI, obj_type: Type[T]) -> Iterator[T]:
-        self.log.debug(F"_retrieve_multi: obj_uri {obj_uri}")
-        obj_type_uri = type(obj_uri)(uri=obj_uri.uri)
-        assert obj_uri.uri      is not None
-        assert obj_type_uri.uri is not None
+    def _retrieve_multi_json(self, obj_uri: URI) -> List[Dict[str, Any]]:
+        self.log.debug(F"_retrieve_multi_json: obj_uri {obj_uri}")
+        assert obj_uri.uri is not None
         obj_jsons = [] # type: List[Dict[str, Any]]
         for obj_json in self._datatracker_get_multi(obj_uri):
             obj_jsons.append(obj_json)
-        sort_by = self._hints[obj_type_uri.uri].sort_by
-        for obj_json in sorted(obj_jsons, key=lambda k: k[sort_by]):
+        sort_by = self._hints[obj_uri.uri].sort_by
+        return sorted(obj_jsons, key=lambda k: k[sort_by])
+
+
+    def _retrieve_multi(self, obj_uri: URI, obj_type: Type[T], expand: Optional[List[str]] = None) -> Iterator[T]:
+        self.log.debug(F"_retrieve_multi: obj_uri {obj_uri}")
+        if self._capture_query:
+            raise _CapturedQuery(obj_uri, obj_type)
+        if expand is not None and len(expand) > 0:
+            # Expand the results a page at a time, yielding each page as it
+            # is expanded rather than holding all the results:
+            page = [] # type: List[T]
+            for obj in self._retrieve_multi(obj_uri, obj_type):
+                page.append(obj)
+                if len(page) == self._EXPAND_PAGE_SIZE:
+                    self._expand(page, expand)
+                    yield from page
+                    page = []
+            if len(page) > 0:
+                self._expand(page, expand)
+                yield from page
+            return
+        for obj_json in self._retrieve_multi_json(obj_uri):
             #fetch_obj = self.pavlova.from_mapping(obj_json, obj_type) # type: T
             try:
                 fetch_obj = obj_type(**obj_json)
+                if self._batch is not None:
+                    self._batch_register(fetch_obj)
                 yield fetch_obj
             except ValidationError as e:
                 self.log.error(f"Cannot parse response {obj_json}: {e.errors()}")
 
 
+    # ----------------------------------------------------------------------------------------------------------------------------
+    # Private methods to expand references to other objects:
+    #
+    # List methods that take an `expand` parameter retrieve the objects that
+    # the listed fields refer to, and attach them to the results, so they can
+    # be accessed using Resource.expanded(). The distinct URIs referenced by
+    # the results are found, then the objects they refer to are retrieved in
+    # bulk, using a `<key>__in=...` query for each endpoint. Objects that are
+    # already in the cache are not re-fetched, and any object that cannot be
+    # retrieved in bulk is retrieved individually.
+
+    _BULK_SIZE        = 50
+    _EXPAND_PAGE_SIZE = 100     # The page size used by _datatracker_get_multi()
+
+    def _endpoint(self, uri: str) -> str:
+        return "/".join(uri.split("/")[:5]) + "/"
+
+
+    def _bulk_get(self, endpoint: str, params: Dict[str, Any]) -> Optional[List[Dict[str, Any]]]:
+        try:
+            r = self._session_get(self.base_url + endpoint, params)
+        except (requests.exceptions.ConnectionError, DataTrackerOfflineError):
+            return None
+        if r.status_code != 200:
+            self.log.debug(F"_bulk_get: ({r.status_code}) {endpoint} {params}")
+            return None
+        objs = r.json()['objects'] # type: List[Dict[str, Any]]
+        return objs
+
+
+    def _retrieve_bulk(self, uris: List[URI], fallback: bool = True) -> Dict[str, Resource]:
+        """
+        Retrieve the objects referred to by a list of URIs, returning a
+        dictionary mapping URI to object. If `fallback` is set, objects that
+        cannot be retrieved in bulk are retrieved individually.
+        """
+        result      = {} # type: Dict[str, Resource]
+        by_endpoint = {} # type: Dict[str, Dict[str, URI]]
+        for uri in uris:
+            assert uri.uri is not None
+            endpoint = self._endpoint(uri.uri)
+            key      = uri.uri.rstrip("/").split("/")[-1]
+            by_endpoint.setdefault(endpoint, {})[key] = uri
+
+        for endpoint, pending in by_endpoint.items():
+            if endpoint not in self._hints:
+                self.log.debug(F"_retrieve_bulk: no hints for {endpoint}")
+                continue
+            hint = self._hints[endpoint]
+            if self.cache is not None:
+                for key, uri in list(pending.items()):
+                    assert uri.uri is not None
+                    r = self._session_get(self.base_url + uri.uri, {}, only_if_cached = True)
+                    if r.status_code == 200:
+                        try:
+                            result[uri.uri] = hint.obj_type(**r.json())
+                            del pending[key]
+                        except ValidationError:
+                            pass
+
+            uri_key = hint.uri_key if hint.uri_key is not None else hint.sort_by
+            keys    = sorted(pending) if endpoint not in self._no_bulk else []
+            for i in range(0, len(keys), self._BULK_SIZE):
+                batch = keys[i:i + self._BULK_SIZE]
+                objs  = self._bulk_get(endpoint, {f"{uri_key}__in": ",".join(batch), "limit": len(batch)})
+                wanted = set(pending[k].uri for k in batch)
+                if objs is None or any(obj["resource_uri"] not in wanted for obj in objs):
+                    # The endpoint doesn't support filtering by that key, so the
+                    # remaining objects are retrieved individually:
+                    self.log.debug(F"_retrieve_bulk: cannot bulk retrieve from {endpoint} using {uri_key}__in")
+                    self._no_bulk.add(endpoint)
+                    break
+                for obj_json in objs:
+                    try:
+                        result[obj_json["resource_uri"]] = hint.obj_type(**obj_json)
+                    except ValidationError as e:
+                        self.log.error(f"Cannot parse response {obj_json}: {e.errors()}")
+
+            for uri in pending.values() if fallback else []:
+                assert uri.uri is not None
+                if uri.uri not in result:
+                    obj = self._retrieve_one(uri, hint.obj_type)
+                    if obj is not None:
+                        result[uri.uri] = obj
+        return result
+
+
+    def _expand(self, objs: List[T], fields: List[str]) -> None:
+        uris = {} # type: Dict[str, URI]
+        for obj in objs:
+            for field in fields:
+                if field not in type(obj).model_fields:
+                    raise ValueError(f"{type(obj).__name__} has no field {field}")
+                value = getattr(obj, field)
+                for uri in value if isinstance(value, list) else [value]:
+                    if isinstance(uri, URI) and uri.uri is not None:
+                        uris[uri.uri] = uri
+        resolved = self._retrieve_bulk(list(uris.values()))
+        for obj in objs:
+            for field in fields:
+                value = getattr(obj, field)
+                if isinstance(value, list):
+                    obj._expanded[field] = [resolved.get(str(uri.uri)) for uri in value]
+                elif isinstance(value, URI):
+                    obj._expanded[field] = resolved.get(str(value.uri))
+                else:
+                    obj._expanded[field] = None
+
+
+    # ----------------------------------------------------------------------------------------------------------------------------
+    # Batching of requests for individual objects:
+    #
+    # Within a `with dt.batching():` block, the URIs referenced by objects that
+    # are returned are queued. When an object is then requested, for example
+    # by calling dt.person(), it is retrieved in a single bulk request along
+    # with the other queued URIs for the same endpoint, and those objects are
+    # held until they are requested in turn. This turns loops that request
+    # the objects referenced by a list of results one at a time into a small
+    # number of bulk requests, without changing the code of the loop.
+
+    @contextmanager
+    def batching(self) -> Iterator[None]:
+        """
+        A context manager that batches requests for individual objects. For
+        example, the following makes a few bulk requests to retrieve the people
+        holding roles, rather than one request per person:
+
+            with dt.batching():
+                for role in dt.group_roles(name=chair):
+                    person = dt.person(role.person)
+
+        Objects retrieved inside the block are held in memory until it exits.
+        """
+        if self._batch is not None:
+            yield
+            return
+        self._batch = _BatchState()
+        try:
+            yield
+        finally:
+            self._batch = None
+
+
+    def _batch_register(self, obj: Resource) -> None:
+        assert self._batch is not None
+        for name in type(obj).model_fields:
+            if name == "resource_uri":
+                continue
+            value = getattr(obj, name)
+            for uri in value if isinstance(value, list) else [value]:
+                if isinstance(uri, URI) and uri.uri is not None and len(uri.params) == 0 and uri.uri not in self._batch.loaded:
+                    self._batch.pending.setdefault(self._endpoint(uri.uri), {})[uri.uri] = uri
+
+
+    def _retrieve_batched(self, obj_uri: URI, obj_type: Type[T]) -> Optional[T]:
+        assert self._batch   is not None
+        assert obj_uri.uri is not None
+        if obj_uri.uri not in self._batch.loaded:
+            endpoint = self._endpoint(obj_uri.uri)
+            pending  = self._batch.pending.get(endpoint, {})
+            pending.pop(obj_uri.uri, None)
+            batch    = [obj_uri]
+            # If the endpoint cannot be retrieved in bulk, the other queued
+            # objects are left queued until they are requested.
+            while endpoint not in self._no_bulk and len(pending) > 0 and len(batch) < self._BULK_SIZE:
+                batch.append(pending.pop(next(iter(pending))))
+            self.log.debug(F"_retrieve_batched: {endpoint} batch of {len(batch)}")
+            resolved = self._retrieve_bulk(batch, fallback = False)
+            for uri in batch:
+                assert uri.uri is not None
+                if uri.uri in resolved:
+                    self._batch.loaded[uri.uri] = resolved[uri.uri]
+            if obj_uri.uri not in self._batch.loaded:
+                self._batch.loaded[obj_uri.uri] = self._retrieve_one(obj_uri, obj_type)
+            for fetched in resolved.values():
+                self._batch_register(fetched)
+        result = self._batch.loaded[obj_uri.uri]
+        if result is None or isinstance(result, obj_type):
+            return result
+        return self._retrieve_one(obj_uri, obj_type)
+
+
+    # ----------------------------------------------------------------------------------------------------------------------------
+    # Methods to retrieve the results of list methods without constructing objects:
+    #
+    # Constructing an object for each result is the main cost of methods that
+    # return many results. The records() method runs a list method, such as
+    # emails() or documents(), in a mode where the call to _retrieve_multi()
+    # that it makes is captured rather than run, then fetches the results of
+    # that query as JSON.
+
+    def _captured_query(self, method: Callable[..., Iterator[T]], *args: Any, **kwargs: Any) -> Tuple[URI, Type[Resource]]:
+        self._capture_query = True
+        try:
+            for _ in method(*args, **kwargs):
+                break
+        except _CapturedQuery as query:
+            return query.obj_uri, query.obj_type
+        finally:
+            self._capture_query = False
+        raise TypeError(f"{method.__name__} does not return a list of objects from the datatracker")
+
+
+    def records(self, method: Callable[..., Iterator[T]], *args: Any, fields: Optional[List[str]] = None, **kwargs: Any) -> Iterator[Any]:
+        """
+        A generator returning the results of a list method as dictionaries
+        holding the decoded JSON from the datatracker, or as named tuples of
+        the specified fields, rather than as objects. For example:
+
+            for email in dt.records(dt.emails, addr_contains="csperkins", fields=["address", "person"]):
+                print(email.address, email.person)
+
+        Parameters:
+            method -- The list method to run (e.g., dt.emails)
+            fields -- If set, return named tuples containing these fields
+            *args, **kwargs -- Parameters for the list method
+
+        Returns:
+            An iterator, where each element is a dictionary or a named tuple.
+            Fields that refer to other objects are returned as URI strings.
+        """
+        obj_uri, obj_type = self._captured_query(method, *args, **kwargs)
+        if fields is None:
+            yield from self._retrieve_multi_json(obj_uri)
+        else:
+            for f in fields:
+                if f not in obj_type.model_fields:
+                    raise ValueError(f"{obj_type.__name__} has no field {f}")
+            record = namedtuple(f"{obj_type.__name__}Record", fields) # type: ignore[misc]
+            for obj_json in self._retrieve_multi_json(obj_uri):
+                yield record._make(obj_json.get(f) for f in fields)
+
+
+    def _column_kind(self, annotation: Any) -> str:
+        if get_origin(annotation) is Union:
+            args = [a for a in get_args(annotation) if a is not type(None)]
+            if len(args) == 1:
+                annotation = args[0]
+        if isinstance(annotation, type):
+            if issubclass(annotation, URI):
+                return "category"
+            if issubclass(annotation, datetime):
+                return "datetime"
+            if issubclass(annotation, bool):
+                return "bool"
+            if issubclass(annotation, int):
+                return "int"
+            if issubclass(annotation, float):
+                return "float"
+        return "object"
+
+
+    def to_dataframe(self, method: Callable[..., Iterator[T]], *args: Any, fields: Optional[List[str]] = None, chunk_size: int = 10000, **kwargs: Any) -> "pd.DataFrame":
+        """
+        Run a list method, such as dt.meeting_registrations, and return the
+        results as a pandas DataFrame with one column per field. For example:
+
+            df = dt.to_dataframe(dt.document_events, since="2024-01-01T00:00:00", fields=["id", "doc", "type", "time"])
+
+        The results are converted to columns in chunks of `chunk_size` rows as
+        they are fetched, without constructing an object for each result.
+        Fields that refer to other objects are returned as categorical columns
+        of URI strings, as is the `slug` field of name tables; times are
+        returned as UTC timestamps.
+
+        Parameters:
+            method -- The list method to run (e.g., dt.document_events)
+            fields -- If set, only include these fields
+            chunk_size -- The number of results to convert at once
+            *args, **kwargs -- Parameters for the list method
+
+        Returns:
+            A DataFrame, ordered in the same way as the results of the list method
+        """
+        import pandas as pd
+        from pandas.api.types import union_categoricals
+
+        obj_uri, obj_type = self._captured_query(method, *args, **kwargs)
+        assert obj_uri.uri is not None
+        if fields is None:
+            fields = list(obj_type.model_fields)
+        for f in fields:
+            if f not in obj_type.model_fields:
+                raise ValueError(f"{obj_type.__name__} has no field {f}")
+        kinds = {f: self._column_kind(obj_type.model_fields[f].annotation) for f in fields}
+        if "slug" in kinds:
+            kinds["slug"] = "category"
+        if "resource_uri" in kinds:
+            kinds["resource_uri"] = "object"   # Unique, so nothing is saved by making it categorical
+        sort_by = self._hints[obj_uri.uri].sort_by
+
+        def make_chunk(columns: Dict[str, List[Any]]) -> pd.DataFrame:
+            chunk = {} # type: Dict[str, Any]
+            for f, values in columns.items():
+                if kinds.get(f) == "category":
+                    chunk[f] = pd.Categorical(values)
+                elif kinds.get(f) == "datetime":
+                    chunk[f] = pd.to_datetime(pd.Series(values, dtype=object), utc=True, format="ISO8601")
+                elif kinds.get(f) == "bool":
+                    chunk[f] = pd.array(values, dtype="boolean")
+                elif kinds.get(f) == "int":
+                    chunk[f] = pd.array(values, dtype="Int64")
+                elif kinds.get(f) == "float":
+                    chunk[f] = pd.array(values, dtype="Float64")
+                else:
+                    chunk[f] = pd.Series(values, dtype=object)
+            return pd.DataFrame(chunk)
+
+        # The sort field is needed to order the results, even if not requested:
+        columns = fields if sort_by in fields else fields + [sort_by]
+        chunks  = [] # type: List[pd.DataFrame]
+        current = {f: [] for f in columns} # type: Dict[str, List[Any]]
+        for obj_json in self._datatracker_get_multi(obj_uri):
+            for f in columns:
+                current[f].append(obj_json.get(f))
+            if len(current[sort_by]) >= chunk_size:
+                chunks.append(make_chunk(current))
+                current = {f: [] for f in columns}
+        chunks.append(make_chunk(current))
+
+        # Give each categorical column the same categories in every chunk, so
+        # they remain categorical when the chunks are concatenated:
+        for f in columns:
+            if kinds.get(f) == "category":
+                categories = union_categoricals([c[f] for c in chunks]).categories
+                for c in chunks:
+                    c[f] = c[f].cat.set_categories(categories)
+
+        df = pd.concat(chunks, ignore_index=True)
+        df = df.sort_values(sort_by, kind="stable", ignore_index=True)
+        return df[fields]
+
+
     # ----------------------------------------------------------------------------------------------------------------------------
     # Datatracker API endpoints returning information about people:
     # * https://datatracker.ietf.org/api/v1/person/person/
@@ -2294,7 +2882,8 @@ class DataTracker:
                         until      : str = "2038-01-19T03:14:07",
                         doc        : Optional[Document] = None,
                         by         : Optional[Person]   = None,
-                        event_type : Optional[str]      = None) -> Iterator[DocumentEvent]:
+                        event_type : Optional[str]      = None,
+                        expand     : Optional[List[str]] = None) -> Iterator[DocumentEvent]:
         """
         A generator returning information about document events.
 
@@ -2304,6 +2893,8 @@ class DataTracker:
             doc        -- Only return document events for this document
             by         -- Only return document events by this person
             event_type -- Only return document events with this type
+            expand     -- Retrieve the objects referred to by these fields (e.g., ["by", "doc"])
+                          in bulk, and make them available via DocumentEvent.expanded()
 
         Returns:
            A sequence of DocumentEvent objects
@@ -2317,7 +2908,7 @@ class DataTracker:
             url.params["by"]   = by.id
         if event_type is not None:
             url.params["type"] = event_type
-        yield from self._retrieve_multi(url, DocumentEvent)
+        yield from self._retrieve_multi(url, DocumentEvent, expand)
 
 
     # Datatracker API endpoints returning information about document authorship:
@@ -2325,10 +2916,10 @@ class DataTracker:
     # * https://datatracker.ietf.org/api/v1/doc/documentauthor/?person=...       - documents by person
     # * https://datatracker.ietf.org/api/v1/doc/documentauthor/?email=...        - documents by person
 
-    def document_authors(self, document : Document) -> Iterator[DocumentAuthor]:
+    def document_authors(self, document : Document, expand : Optional[List[str]] = None) -> Iterator[DocumentAuthor]:
         url = DocumentAuthorURI(uri="/api/v1/doc/documentauthor/")
         url.params["document"] = document.id
-        yield from self._retrieve_multi(url, DocumentAuthor)
+        yield from self._retrieve_multi(url, DocumentAuthor, expand)
 
 
     def documents_authored_by_person(self, person : Person) -> Iterator[DocumentAuthor]:
@@ -2352,7 +2943,8 @@ class DataTracker:
                           source                 : Optional[Document]         = None,
                           target                 : Optional[Document]         = None,
                           relationship_type      : Optional[RelationshipType] = None,
-                          relationship_type_slug : Optional[str] = None) -> Iterator[RelatedDocument]:
+                          relationship_type_slug : Optional[str] = None,
+                          expand                 : Optional[List[str]] = None) -> Iterator[RelatedDocument]:
 
         url = RelatedDocumentURI(uri="/api/v1/doc/relateddocument/")
         if source is not None:
@@ -2363,7 +2955,7 @@ class DataTracker:
             url.params["relationship"] = relationship_type.slug
         if relationship_type_slug is not None:
             url.params["relationship"] = relationship_type_slug
-        yield from self._retrieve_multi(url, RelatedDocument)
+        yield from self._retrieve_multi(url, RelatedDocument, expand)
 
 
     def relationship_type(self, relationship_type_uri: RelationshipTypeURI) -> Optional[RelationshipType]:
@@ -2746,7 +3338,8 @@ class DataTracker:
             email         : Optional[str]           = None,
             group         : Optional[Group]         = None,
             name          : Optional[RoleName]      = None,
-            person        : Optional[Person]        = None) -> Iterator[GroupRole]:
+            person        : Optional[Person]        = None,
+            expand        : Optional[List[str]]     = None) -> Iterator[GroupRole]:
         url = GroupRoleURI(uri="/api/v1/group/role/")
         if email is not None:
             url.params["email"] = email
@@ -2756,7 +3349,7 @@ class DataTracker:
             url.params["name"] = name.slug
         if person is not None:
             url.params["person"] = person.id
-        yield from self._retrieve_multi(url, GroupRole)
+        yield from self._retrieve_multi(url, GroupRole, expand)
 
 
     def group_role_history(self, group_role_history_uri : GroupRoleHistoryURI) -> Optional[GroupRoleHistory]:
@@ -0,0 +1,786 @@
+# Copyright (C) 2024 University of Glasgow
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions
+# are met:
+#
+# 1. Redistributions of source code must retain the above copyright notice,
+#    this list of conditions and the following disclaimer.
+#
+# 2. Redistributions in binary form must reproduce the above copyright
+#    notice, this list of conditions and the following disclaimer in the
+#    documentation and/or other materials provided with the distribution.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+# ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE
+# LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR
+# CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF
+# SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS
+# INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN
+# CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)
+# ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+# POSSIBILITY OF SUCH DAMAGE.
+
+# This module manages the MongoDB cache used to store responses from the
+# IETF Datatracker.
+#
+# The cache is a `requests_cache.MongoCache` stored in the `ietfdata_requests`
+# database. Responses are kept in the `responses` collection, keyed by the
+# cache key generated by `requests_cache`, with documents of the form:
+#
+#   {
+#     "_id":         "8c2f0e3a61e4d7b1",
+#     "url":         "https://datatracker.ietf.org/api/v1/doc/document/?limit=100&...",
+#     "status_code": 200,
+#     "created_at":  2024-05-21T10:11:47.000+00:00,
+#     "expires":     2024-05-21T10:26:47.000+00:00,
+#     ...
+#     "_accessed":   2024-05-21T10:13:02.000+00:00,
+#     "_hits":       3
+#   }
+#
+# The `_accessed` and `_hits` fields are maintained by this module, and are
+# used to choose which responses to evict when the cache grows larger than
+# its configured maximum size. They are reset whenever `requests_cache`
+# rewrites a response.
+#
+# If compression is enabled, the body of each response document is encoded
+# as BSON and compressed, and the document is stored in the form:
+#
+#   {
+#     "_id":         "8c2f0e3a61e4d7b1",
+#     "url":         "https://datatracker.ietf.org/api/v1/doc/document/?limit=100&...",
+#     "status_code": 200,
+#     "created_at":  2024-05-21T10:11:47.000+00:00,
+#     "expires":     2024-05-21T10:26:47.000+00:00,
+#     "_codec":      "zstd",
+#     "_dict":       ObjectId("6650a2c35b1f9e2d4c8a7b10"),
+#     "_z":          BinData(...)
+#   }
+#
+# where `_dict` refers to a compression dictionary, trained on responses from
+# the same API endpoint, that is held in the `dictionaries` collection:
+#
+#   {
+#     "_id":      ObjectId("6650a2c35b1f9e2d4c8a7b10"),
+#     "endpoint": "/api/v1/doc/document/",
+#     "codec":    "zstd",
+#     "created":  2024-05-21T10:11:47.000+00:00,
+#     "data":     BinData(...)
+#   }
+#
+# Documents without a `_z` field are stored uncompressed, and are read as-is.
+#
+# The `crawls` collection records list queries that have been fetched in
+# full, so that narrower queries to the same endpoint can be answered from
+# the cache by filtering the results of the wider query:
+#
+#   {
+#     "_id":       "/api/v1/doc/document/?time__gte=1970-01-01T00:00:00&time__lt=2038-01-19T03:14:07",
+#     "endpoint":  "/api/v1/doc/document/",
+#     "params":    {"time__gte": "1970-01-01T00:00:00", "time__lt": "2038-01-19T03:14:07"},
+#     "count":     532193,
+#     "completed": 2024-05-21T10:11:47.000+00:00
+#   }
+
+import bson
+import logging
+import re
+import urllib.parse
+import zlib
+
+from dataclasses      import dataclass
+from datetime         import datetime, timezone
+from typing           import Any, Dict, Iterator, List, Mapping, Optional, Tuple
+
+import requests_cache
+
+from bson.objectid    import ObjectId
+from pymongo          import MongoClient, ASCENDING, UpdateOne
+from pymongo.database import Database
+from requests_cache.serializers.pipeline import SerializerPipeline
+from requests_cache.serializers.preconf  import bson_preconf_stage
+
+try:
+    import zstandard
+    _have_zstd = True
+except ImportError:
+    _have_zstd = False
+
+# =================================================================================================================================
+
+def parse_size(size: str) -> int:
+    """
+    Parse a size in bytes, optionally with a K, M, G, or T suffix (e.g.,
+    "500M" or "20G"), as used in the IETFDATA_CACHE_MAX_SIZE variable.
+    """
+    match = re.fullmatch(r"\s*(\d+)\s*([KMGT]?)B?\s*", size.upper())
+    if match is None:
+        raise ValueError(f"Cannot parse size: {size}")
+    multiplier = {"": 1, "K": 1024, "M": 1024**2, "G": 1024**3, "T": 1024**4}[match.group(2)]
+    return int(match.group(1)) * multiplier
+
+
+def endpoint_for_url(url: str) -> str:
+    """
+    Return the API endpoint for a Datatracker URL. For example, both
+    "https://datatracker.ietf.org/api/v1/doc/document/?limit=100" and
+    "https://datatracker.ietf.org/api/v1/doc/document/rfc3550/" map to
+    "/api/v1/doc/document/".
+    """
+    path  = urllib.parse.urlsplit(url).path
+    parts = path.split("/")
+    if len(parts) >= 5 and parts[1] == "api":
+        return "/".join(parts[:5]) + "/"
+    return path
+
+
+class CompressionStage:
+    """
+    A `requests_cache` serializer stage that compresses response documents
+    before they are stored in MongoDB, and decompresses them when they are
+    loaded. Documents stored without compression are loaded unchanged.
+
+    The `codec` is "zstd" (requires the `zstandard` package) or "zlib".
+    Once enough responses from an API endpoint have been seen, a dictionary
+    is trained on them and used to compress later responses from that
+    endpoint. Datatracker responses are highly repetitive, so this gives
+    much better compression than compressing each response separately.
+    """
+    codec          : str
+    _db            : Database
+    _dicts         : Dict[ObjectId, bytes]
+    _endpoint_dict : Dict[str, ObjectId]
+    _samples       : Dict[str, List[bytes]]
+
+    _TRAIN_SAMPLES   = 100         # Number of responses from an endpoint to collect before training a dictionary
+    _ZSTD_DICT_SIZE  = 64 * 1024
+    _ZLIB_DICT_SIZE  = 32 * 1024   # The zlib window size limits the useful size of a preset dictionary
+
+    def __init__(self, db: Database, codec: str) -> None:
+        if codec == "zstd" and not _have_zstd:
+            raise RuntimeError("zstd compression requires the zstandard package")
+        if codec not in ["zstd", "zlib"]:
+            raise ValueError(f"Unknown compression codec: {codec}")
+        self.log            = logging.getLogger("ietfdata")
+        self.codec          = codec
+        self._db            = db
+        self._dicts         = {}
+        self._endpoint_dict = {}
+        self._samples       = {}
+        for d in self._db.dictionaries.find({"codec": codec}).sort("created", ASCENDING):
+            self._dicts[d["_id"]] = d["data"]
+            self._endpoint_dict[d["endpoint"]] = d["_id"]
+
+
+    def copy(self) -> "CompressionStage":
+        return self
+
+
+    def _dictionary(self, dict_id: ObjectId) -> bytes:
+        if dict_id not in self._dicts:
+            d = self._db.dictionaries.find_one({"_id": dict_id})
+            if d is None:
+                raise RuntimeError(f"Missing compression dictionary {dict_id}")
+            self._dicts[dict_id] = d["data"]
+        return self._dicts[dict_id]
+
+
+    def _train(self, endpoint: str, samples: List[bytes]) -> None:
+        if self.codec == "zstd":
+            try:
+                data = zstandard.train_dictionary(self._ZSTD_DICT_SIZE, list(samples)).as_bytes()
+            except zstandard.ZstdError as e:
+                self.log.debug(f"CompressionStage: cannot train dictionary for {endpoint}: {e}")
+                return
+        else:
+            # zlib has no dictionary trainer, but a preset dictionary made
+            # from representative content works well: put the most recent
+            # samples last, since zlib favours matches at short distances.
+            data = b"".join(samples)[-self._ZLIB_DICT_SIZE:]
+        dict_id = ObjectId()
+        self._db.dictionaries.insert_one({"_id": dict_id, "endpoint": endpoint, "codec": self.codec, "created": datetime.now(timezone.utc), "data": data})
+        self._dicts[dict_id] = data
+        self._endpoint_dict[endpoint] = dict_id
+        self.log.debug(f"CompressionStage: trained {self.codec} dictionary for {endpoint}")
+
+
+    def _compress(self, data: bytes, zdict: Optional[bytes]) -> bytes:
+        if self.codec == "zstd":
+            if zdict is not None:
+                return zstandard.ZstdCompressor(dict_data=zstandard.ZstdCompressionDict(zdict)).compress(data)
+            return zstandard.ZstdCompressor().compress(data)
+        else:
+            compressor = zlib.compressobj(zdict=zdict) if zdict is not None else zlib.compressobj()
+            return compressor.compress(data) + compressor.flush()
+
+
+    def dumps(self, doc: Dict[str, Any]) -> Dict[str, Any]:
+        data     = bson.encode(doc)
+        endpoint = endpoint_for_url(doc.get("url", ""))
+        dict_id  = self._endpoint_dict.get(endpoint)
+        if dict_id is None:
+            samples = self._samples.setdefault(endpoint, [])
+            samples.append(data)
+            if len(samples) >= self._TRAIN_SAMPLES:
+                del self._samples[endpoint]
+                self._train(endpoint, samples)
+        zdict = self._dicts[dict_id] if dict_id is not None else None
+        return {"url"         : doc.get("url"),
+                "status_code" : doc.get("status_code"),
+                "created_at"  : doc.get("created_at"),
+                "expires"     : doc.get("expires"),
+                "_codec"      : self.codec,
+                "_dict"       : dict_id,
+                "_z"          : bson.Binary(self._compress(data, zdict))}
+
+
+    def loads(self, doc: Mapping[str, Any]) -> Mapping[str, Any]:
+        if "_z" not in doc:
+            return doc
+        zdict = self._dictionary(doc["_dict"]) if doc["_dict"] is not None else None
+        if doc["_codec"] == "zstd":
+            if not _have_zstd:
+                raise RuntimeError("zstd compressed cache entry, but the zstandard package is not installed")
+            if zdict is not None:
+                data = zstandard.ZstdDecompressor(dict_data=zstandard.ZstdCompressionDict(zdict)).decompress(doc["_z"])
+            else:
+                data = zstandard.ZstdDecompressor().decompress(doc["_z"])
+        elif doc["_codec"] == "zlib":
+            decompressor = zlib.decompressobj(zdict=zdict) if zdict is not None else zlib.decompressobj()
+            data = decompressor.decompress(doc["_z"]) + decompressor.flush()
+        else:
+            raise RuntimeError(f"Unknown compression codec {doc['_codec']} in cache")
+        result : Mapping[str, Any] = bson.decode(data)
+        return result
+
+
+def compressed_serializer(db: Database, codec: str) -> SerializerPipeline:
+    """
+    A serializer for `requests_cache.MongoCache` that compresses responses.
+    """
+    return SerializerPipeline([bson_preconf_stage, CompressionStage(db, codec)], name=f"bson_{codec}", is_binary=False)
+
+
+# =================================================================================================================================
+# Query subsumption:
+#
+# Datatracker list queries filter the results using Tastypie-style query
+# parameters, of the form `field` or `field__op`. The functions below check
+# whether one query returns a superset of the results of another, and
+# apply the filters of a query to objects that have already been fetched.
+
+_LOWER_BOUNDS = ["gt", "gte"]
+_UPPER_BOUNDS = ["lt", "lte"]
+
+
+def _split_filter(param: str) -> Tuple[str, str]:
+    field, _, op = param.partition("__")
+    return field, op if op != "" else "exact"
+
+
+def _as_datetime(value: Any) -> Optional[datetime]:
+    if not isinstance(value, str):
+        return None
+    try:
+        ts = datetime.fromisoformat(value)
+    except ValueError:
+        return None
+    if ts.tzinfo is not None:
+        ts = ts.astimezone(timezone.utc).replace(tzinfo=None)
+    return ts
+
+
+def _is_number(value: Any) -> bool:
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+
+def _comparable(value: Any, param: Any) -> Optional[Tuple[Any, Any]]:
+    """
+    Convert a field value and a query parameter to a form in which they can
+    be ordered. Numeric fields are compared as numbers, and timestamps as
+    naive UTC datetimes. Other strings are compared as strings, so "01" does
+    not match "1". Returns None if the parameter cannot be converted to the
+    type of the field.
+    """
+    if _is_number(value):
+        try:
+            return value, float(param)
+        except ValueError:
+            return None
+    value_ts = _as_datetime(value)
+    param_ts = _as_datetime(param)
+    if value_ts is not None and param_ts is not None:
+        return value_ts, param_ts
+    if isinstance(value, str):
+        return value, str(param)
+    return None
+
+
+def _bound_within(op: str, value: Any, wide_op: str, wide_value: Any) -> bool:
+    """
+    Check if the bound `field__op=value` is at least as tight as the bound
+    `field__wide_op=wide_value`. Both are query parameters, so the type of
+    the field is not known: only numbers and timestamps are compared.
+    """
+    if _is_number(value) and _is_number(wide_value):
+        a, b = value, wide_value
+    else:
+        a, b = _as_datetime(value), _as_datetime(wide_value)
+        if a is None or b is None:
+            return False
+    if op in _LOWER_BOUNDS:
+        return bool(a > b) or (a == b and (op == wide_op or wide_op == "gte"))
+    else:
+        return bool(a < b) or (a == b and (op == wide_op or wide_op == "lte"))
+
+
+def query_subsumes(wide: Mapping[str, Any], narrow: Mapping[str, Any]) -> bool:
+    """
+    Check if a query to an endpoint with parameters `wide` returns all the
+    objects that a query to the same endpoint with parameters `narrow` would
+    return. Parameters of the narrow query that are not constrained by the
+    wide query are not considered: they must be checked using filter_matches().
+    """
+    for param, wide_value in wide.items():
+        if narrow.get(param) == wide_value:
+            continue
+        field, wide_op = _split_filter(param)
+        if wide_op in _LOWER_BOUNDS:
+            candidates = _LOWER_BOUNDS
+        elif wide_op in _UPPER_BOUNDS:
+            candidates = _UPPER_BOUNDS
+        else:
+            return False
+        if not any(f"{field}__{op}" in narrow and _bound_within(op, narrow[f"{field}__{op}"], wide_op, wide_value) for op in candidates):
+            return False
+    return True
+
+
+def _value_matches(value: Any, op: str, param: Any) -> Optional[bool]:
+    if isinstance(value, list):
+        if op != "exact":
+            return None
+        results = [_value_matches(v, op, param) for v in value]
+        if any(r is True for r in results):
+            return True
+        if any(r is None for r in results):
+            return None
+        return False
+    if value is None:
+        return False
+    if isinstance(value, bool):
+        if op != "exact":
+            return None
+        return value == (str(param).lower() in ["true", "1"])
+    if isinstance(value, str) and value.startswith("/api/v1/"):
+        # A related object: the query parameter is its primary key
+        if op != "exact":
+            return None
+        key = value.rstrip("/").split("/")[-1]
+        if key == str(param):
+            return True
+        if str(param).isdigit() and not key.isdigit():
+            return None    # Filtered by id, but the URI uses a different key
+        return False
+    if op == "exact":
+        if isinstance(value, str):
+            return value == str(param)
+        pair = _comparable(value, param)
+        return bool(pair[0] == pair[1]) if pair is not None else None
+    if op == "contains":
+        return str(param) in str(value)
+    if op in _LOWER_BOUNDS + _UPPER_BOUNDS:
+        pair = _comparable(value, param)
+        if pair is None:
+            return None
+        a, b = pair
+        return bool({"gt": a > b, "gte": a >= b, "lt": a < b, "lte": a <= b}[op])
+    return None
+
+
+def filter_matches(obj: Mapping[str, Any], params: Mapping[str, Any]) -> Optional[bool]:
+    """
+    Check if an object returned by the Datatracker matches the filters in
+    the query parameters `params`. Returns None if that cannot be decided
+    locally (e.g., the filter follows a relation to another object).
+    """
+    result = True
+    for param, param_value in params.items():
+        field, op = _split_filter(param)
+        if field not in obj or "__" in op:
+            return None
+        match = _value_matches(obj[field], op, param_value)
+        if match is None:
+            return None
+        result = result and match
+    return result
+
+
+def _uri_key(value: str) -> str:
+    return value.rstrip("/").split("/")[-1]
+
+
+def filters_are_local(sample: Mapping[str, Any], params: Mapping[str, Any]) -> bool:
+    """
+    Check, before fetching the objects to filter, whether filter_matches()
+    can apply the filters in `params` to objects of the same type as
+    `sample`. This is false for filters that follow relations, and for
+    filters on related objects by id where the related object URIs use a
+    different key (e.g., documents are identified by name).
+    """
+    for param, param_value in params.items():
+        field, op = _split_filter(param)
+        if field not in sample or "__" in op:
+            return False
+        if op not in ["exact", "contains"] + _LOWER_BOUNDS + _UPPER_BOUNDS:
+            return False
+        value = sample[field]
+        if isinstance(value, list):
+            if op != "exact":
+                return False
+            value = value[0] if len(value) > 0 else None
+        if isinstance(value, bool) and op != "exact":
+            return False
+        if isinstance(value, str) and value.startswith("/api/v1/"):
+            if op != "exact":
+                return False
+            if str(param_value).isdigit() and not _uri_key(value).isdigit():
+                return False
+    return True
+
+
+class CrawlObjects:
+    """
+    The decoded objects returned by a cached crawl, with indexes on the
+    fields used in exact match filters, built on first use. If `expires`
+    is set, it is the time the first of the cached pages expires.
+    """
+    def __init__(self, crawl: "CachedCrawl", objs: List[Dict[str, Any]], expires: Optional[datetime] = None) -> None:
+        self.crawl    = crawl
+        self.objs     = objs
+        self.expires  = expires
+        self._indexes = {} # type: Dict[str, Optional[Dict[str, List[int]]]]
+
+
+    def is_fresh(self, now: Optional[datetime] = None) -> bool:
+        """
+        Check that none of the cached pages the objects were decoded from
+        have expired.
+        """
+        if self.expires is None:
+            return True
+        if now is None:
+            now = datetime.now(timezone.utc)
+        return now < self.expires
+
+
+    def _index(self, field: str) -> Optional[Dict[str, List[int]]]:
+        """
+        Index the objects by the value of a string or related object field,
+        returning None if the field has values of other types.
+        """
+        if field not in self._indexes:
+            index = {} # type: Optional[Dict[str, List[int]]]
+            for pos, obj in enumerate(self.objs):
+                values = obj.get(field)
+                for value in values if isinstance(values, list) else [values]:
+                    if value is None:
+                        continue
+                    if not isinstance(value, str) or index is None:
+                        index = None
+                        break
+                    key = _uri_key(value) if value.startswith("/api/v1/") else value
+                    positions = index.setdefault(key, [])
+                    if len(positions) == 0 or positions[-1] != pos:
+                        positions.append(pos)
+            self._indexes[field] = index
+        return self._indexes[field]
+
+
+    def filter(self, params: Mapping[str, Any]) -> Optional[List[Dict[str, Any]]]:
+        """
+        Return the objects matching the filters in `params`, or None if the
+        filters cannot be applied locally. An exact match filter is answered
+        using an index, and the others are checked on the objects it selects.
+        """
+        if len(self.objs) == 0:
+            return []
+        if not filters_are_local(self.objs[0], params):
+            return None
+        candidates = self.objs
+        remaining  = dict(params)
+        for param, param_value in params.items():
+            field, op = _split_filter(param)
+            if op == "exact" and "__" not in field:
+                index = self._index(field)
+                if index is not None:
+                    candidates = [self.objs[pos] for pos in index.get(str(param_value), [])]
+                    del remaining[param]
+                    break
+        result = []
+        for obj in candidates:
+            match = filter_matches(obj, remaining)
+            if match is None:
+                return None
+            if match:
+                result.append(obj)
+        return result
+
+
+@dataclass
+class CachedCrawl:
+    endpoint  : str
+    params    : Dict[str, Any]
+    count     : int
+    completed : datetime
+
+
+# =================================================================================================================================
+
+@dataclass
+class CacheUsage:
+    endpoint : str
+    entries  : int
+    size     : int   # Size in bytes of the BSON documents stored for this endpoint
+
+
+@dataclass
+class CacheCompaction:
+    expired    : int
+    duplicates : int
+    redirects  : int
+
+
+class RequestCache:
+    """
+    The MongoDB cache used to store responses from the Datatracker.
+
+    If `max_size` is set, the cache is limited to (approximately) that
+    many bytes. When it grows larger, the least recently used (policy
+    "lru") or least frequently used (policy "lfu") responses are evicted
+    until the cache is back under 90% of the limit.
+
+    If `compression` is set to "zstd" or "zlib", responses are compressed
+    using that codec before they are stored; "auto" selects "zstd" if the
+    `zstandard` package is installed, and "zlib" otherwise. Responses that
+    were stored uncompressed remain readable.
+    
+    The cache also records which list queries have been fetched in full, so
+    that narrower queries can be answered from those responses (see
+    record_crawl() and find_crawls()).
+    """
+    backend       : requests_cache.MongoCache
+    max_size      : Optional[int]
+    policy        : str
+
+    _db           : Database
+    _crawls       : Dict[str, List[CachedCrawl]]
+    _pending      : Dict[str, datetime]
+    _writes       : int
+
+    _FLUSH_INTERVAL = 100    # Number of accesses to buffer before updating the database
+    _CHECK_INTERVAL = 1000   # Number of new responses to store between checks of the cache size
+
+    def __init__(self,
+                 connection : MongoClient,
+                 db_name    : str           = "ietfdata_requests",
+                 max_size   : Optional[int] = None,
+                 policy     : str           = "lru",
+                 compression: Optional[str] = None) -> None:
+        if policy not in ["lru", "lfu"]:
+            raise ValueError(f"Unknown cache eviction policy: {policy}")
+        self.log      = logging.getLogger("ietfdata")
+        self.max_size = max_size
+        self.policy   = policy
+        self._db      = connection[db_name]
+        if compression == "auto":
+            compression = "zstd" if _have_zstd else "zlib"
+        if compression is not None and compression != "none":
+            serializer   = compressed_serializer(self._db, compression)
+            self.backend = requests_cache.MongoCache(db_name=db_name, connection=connection, serializer=serializer)
+        else:
+            self.backend = requests_cache.MongoCache(db_name=db_name, connection=connection)
+        self._crawls  = {}
+        self._pending = {}
+        self._writes  = 0
+        self._db.responses.create_index([("_accessed", ASCENDING)])
+        self._db.responses.create_index([("_hits", ASCENDING), ("_accessed", ASCENDING)])
+        self._db.responses.create_index([("url", ASCENDING)])
+
+
+    def record_access(self, cache_key: str, from_cache: bool) -> None:
+        """
+        Record that the response with the specified cache key has been used.
+        Updates are buffered and written to the database in batches.
+        """
+        self._pending[cache_key] = datetime.now(timezone.utc)
+        if len(self._pending) >= self._FLUSH_INTERVAL:
+            self.flush()
+        if not from_cache:
+            self._writes += 1
+            if self.max_size is not None and self._writes >= self._CHECK_INTERVAL:
+                self._writes = 0
+                self.evict()
+
+
+    def flush(self) -> None:
+        """
+        Write buffered access records to the database.
+        """
+        if len(self._pending) == 0:
+            return
+        updates = []
+        for cache_key, accessed in self._pending.items():
+            updates.append(UpdateOne({"_id": cache_key}, {"$set": {"_accessed": accessed}, "$inc": {"_hits": 1}}))
+        self._pending = {}
+        self._db.responses.bulk_write(updates, ordered=False)
+
+
+    def size(self) -> int:
+        """
+        The total size, in bytes, of the responses held in the cache.
+        """
+        for stats in self._db.responses.aggregate([{"$collStats": {"storageStats": {}}}]):
+            return int(stats["storageStats"]["size"])
+        return 0
+
+
+    def usage(self) -> List[CacheUsage]:
+        """
+        Report the number of cached responses, and their size, for each
+        Datatracker API endpoint. The result is sorted by decreasing size.
+        """
+        usage = {} # type: Dict[str, CacheUsage]
+        pipeline = [{"$project": {"url": True, "size": {"$bsonSize": "$$ROOT"}}}] # type: List[Mapping[str, Any]]
+        for doc in self._db.responses.aggregate(pipeline, allowDiskUse=True):
+            endpoint = endpoint_for_url(doc.get("url", ""))
+            if endpoint not in usage:
+                usage[endpoint] = CacheUsage(endpoint, 0, 0)
+            usage[endpoint].entries += 1
+            usage[endpoint].size    += doc["size"]
+        return sorted(usage.values(), key=lambda u: u.size, reverse=True)
+
+
+    def _eviction_order(self) -> Iterator[Dict[str, Any]]:
+        # Responses that have never had an access recorded sort first, and
+        # so are evicted before any response known to have been used.
+        if self.policy == "lru":
+            order = {"_accessed": 1}
+        else:
+            order = {"_hits": 1, "_accessed": 1}
+        pipeline = [{"$sort": order},
+                    {"$project": {"size": {"$bsonSize": "$$ROOT"}}}] # type: List[Mapping[str, Any]]
+        yield from self._db.responses.aggregate(pipeline, allowDiskUse=True)
+
+
+    def _delete(self, cache_keys: List[str]) -> None:
+        self._db.responses.delete_many({"_id": {"$in": cache_keys}})
+        self._db.redirects.delete_many({"data": {"$in": cache_keys}})
+
+
+    def evict(self, max_size: Optional[int] = None) -> int:
+        """
+        Evict responses from the cache, according to the eviction policy,
+        until it is smaller than 90% of `max_size` (or the configured maximum
+        size, if not specified). Returns the number of responses evicted.
+        """
+        self.flush()
+        limit = max_size if max_size is not None else self.max_size
+        if limit is None:
+            return 0
+        curr_size = self.size()
+        if curr_size <= limit:
+            return 0
+        to_free = curr_size - int(limit * 0.9)
+        freed   = 0
+        evicted = 0
+        batch   = [] # type: List[str]
+        for doc in self._eviction_order():
+            batch.append(doc["_id"])
+            freed += doc["size"]
+            if len(batch) == 1000:
+                self._delete(batch)
+                evicted += len(batch)
+                batch = []
+            if freed >= to_free:
+                break
+        if len(batch) > 0:
+            self._delete(batch)
+            evicted += len(batch)
+        self.log.info(f"RequestCache: evicted {evicted} responses ({freed} bytes) using {self.policy} policy")
+        return evicted
+
+
+    def compact(self) -> CacheCompaction:
+        """
+        Remove expired responses, duplicate responses for the same URL (keeping
+        the most recent), and redirects to responses that no longer exist.
+        """
+        self.flush()
+        now     = datetime.now(timezone.utc)
+        expired = self._db.responses.delete_many({"expires": {"$lt": now}}).deleted_count
+
+        duplicates = 0
+        pipeline = [{"$group": {"_id": "$url", "count": {"$sum": 1}, "entries": {"$push": {"key": "$_id", "created_at": "$created_at"}}}},
+                    {"$match": {"count": {"$gt": 1}}}] # type: List[Mapping[str, Any]]
+        for group in self._db.responses.aggregate(pipeline, allowDiskUse=True):
+            entries = sorted(group["entries"], key=lambda e: e["created_at"], reverse=True)
+            remove  = [e["key"] for e in entries[1:]]
+            self._delete(remove)
+            duplicates += len(remove)
+
+        redirects = 0
+        for redirect in self._db.redirects.find({}):
+            if self._db.responses.count_documents({"_id": redirect["data"]}, limit=1) == 0:
+                self._db.redirects.delete_one({"_id": redirect["_id"]})
+                redirects += 1
+
+        self.log.info(f"RequestCache: compacted: {expired} expired, {duplicates} duplicates, {redirects} redirects removed")
+        return CacheCompaction(expired, duplicates, redirects)
+
+
+    def _crawl_key(self, endpoint: str, params: Mapping[str, Any]) -> str:
+        return endpoint + "?" + urllib.parse.urlencode(sorted(params.items()))
+
+
+    def record_crawl(self, endpoint: str, params: Mapping[str, Any], count: int) -> None:
+        """
+        Record that all results of the list query to `endpoint` with the given
+        query parameters have been fetched, and are held in the cache.
+        """
+        crawl = CachedCrawl(endpoint, dict(params), count, datetime.now(timezone.utc))
+        key   = self._crawl_key(endpoint, params)
+        self._db.crawls.replace_one({"_id": key}, {"_id": key, **crawl.__dict__}, upsert=True)
+        crawls = self._crawls.get(endpoint)
+        if crawls is not None:
+            self._crawls[endpoint] = [c for c in crawls if self._crawl_key(c.endpoint, c.params) != key] + [crawl]
+
+
+    def forget_crawl(self, crawl: CachedCrawl) -> None:
+        """
+        Forget a crawl whose results are no longer held in the cache.
+        """
+        key = self._crawl_key(crawl.endpoint, crawl.params)
+        self._db.crawls.delete_one({"_id": key})
+        if crawl.endpoint in self._crawls:
+            self._crawls[crawl.endpoint] = [c for c in self._crawls[crawl.endpoint] if self._crawl_key(c.endpoint, c.params) != key]
+
+
+    def find_crawls(self, endpoint: str, params: Mapping[str, Any]) -> List[CachedCrawl]:
+        """
+        Find recorded crawls that include all the results of a query to
+        `endpoint` with the given parameters, smallest first. A crawl of the
+        query itself is not included.
+        """
+        if endpoint not in self._crawls:
+            self._crawls[endpoint] = [CachedCrawl(c["endpoint"], c["params"], c["count"], c["completed"])
+                                      for c in self._db.crawls.find({"endpoint": endpoint})]
+        found = [c for c in self._crawls[endpoint] if c.params != params and query_subsumes(c.params, params)]
+        return sorted(found, key=lambda c: c.count)
+
+
+# =================================================================================================================================
+# vim: set tw=0 ai:
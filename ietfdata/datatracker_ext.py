@@ -23,7 +23,14 @@
 # ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
 # POSSIBILITY OF SUCH DAMAGE.
 
-from datetime             import datetime, timedelta
+import re
+import unicodedata
+
+from bisect               import bisect_right
+from collections          import Counter
+from datetime             import datetime, timedelta, timezone
+from itertools            import chain
+from typing               import Iterable, Set
 from ietfdata.datatracker import *
 from ietfdata.rfcindex    import *
 
@@ -83,6 +90,30 @@ def names_to_try(name: str, email: str) -> List[str]:
 
     return utf8_safe_names
 
+
+def decode_dmarc(email_addr: str) -> str:
+    # Decode DMARC (e.g., arnaud.taddei=40broadcom.com@dmarc.ietf.org -> arnaud.taddei@broadcom.com)
+    if email_addr.endswith("@dmarc.ietf.org"):
+        email_addr = email_addr[:-15].replace("=40", "@")
+    return email_addr
+
+
+def base_address(email_addr: str) -> Optional[str]:
+    # If given, e.g., "user+suffix@example.com" return "user@example.com"
+    if "@" in email_addr:
+        local, remote = email_addr.rsplit("@", 1)
+        if local.count("+") == 1:
+            base, suffix = local.rsplit("+", 1)
+            return F"{base}@{remote}"
+    return None
+
+
+def strip_name_suffix(name: str) -> str:
+    for suffix in [" via Datatracker", " via RT"]:
+        if name.endswith(suffix):
+            name = name[:-len(suffix)]
+    return name
+
 # =================================================================================================================================
 
 @dataclass
@@ -93,6 +124,631 @@ class DraftHistory:
     submission : Optional[Submission]
 
 
+def _slug(uri: URI) -> str:
+    assert uri.uri is not None
+    return uri.uri.rstrip("/").split("/")[-1]
+
+
+class GroupIndex:
+    """
+    An in-memory index of groups, holding the group hierarchy and the group
+    states and types as slugs, so that queries over the set of groups can be
+    answered without further requests to the datatracker. Use
+    `DataTrackerExt.group_index()` to build an index.
+    """
+    def __init__(self, groups: Iterable[Group] = ()) -> None:
+        self._by_id      : Dict[int, Group]     = {}
+        self._by_acronym : Dict[str, int]       = {}
+        self._children   : Dict[int, List[int]] = {}
+        self.last_updated : Optional[datetime]  = None
+        self.update(groups)
+
+
+    def update(self, groups: Iterable[Group]) -> None:
+        """
+        Add groups to the index, replacing any existing entries for the same groups.
+        """
+        changed = False
+        for group in groups:
+            old = self._by_id.get(group.id)
+            if old is not None and self._by_acronym.get(old.acronym) == old.id:
+                del self._by_acronym[old.acronym]
+            self._by_id[group.id] = group
+            self._by_acronym[group.acronym] = group.id
+            if self.last_updated is None or group.time > self.last_updated:
+                self.last_updated = group.time
+            changed = True
+        if changed:
+            self._children = {}
+            for group in self._by_id.values():
+                if group.parent is not None:
+                    self._children.setdefault(int(_slug(group.parent)), []).append(group.id)
+            for child_ids in self._children.values():
+                child_ids.sort()
+
+
+    def __len__(self) -> int:
+        return len(self._by_id)
+
+
+    def group(self, group_id: int) -> Optional[Group]:
+        return self._by_id.get(group_id)
+
+
+    def group_from_acronym(self, acronym: str) -> Optional[Group]:
+        group_id = self._by_acronym.get(acronym)
+        return self._by_id[group_id] if group_id is not None else None
+
+
+    def parent(self, group: Group) -> Optional[Group]:
+        return self._by_id.get(int(_slug(group.parent))) if group.parent is not None else None
+
+
+    def state(self, group: Group) -> str:
+        return _slug(group.state)
+
+
+    def type(self, group: Group) -> str:
+        return _slug(group.type)
+
+
+    def groups(self,
+            parent    : Optional[Group] = None,
+            state     : Optional[str]   = None,
+            type      : Optional[str]   = None,
+            recursive : bool            = False) -> Iterator[Group]:
+        """
+        Find groups in the given state (e.g., "active") and of the given type
+        (e.g., "wg"), ordered by id. If `parent` is given, only the children of
+        that group are returned, or all of its descendants if `recursive` is set.
+        """
+        if parent is None:
+            group_ids = sorted(self._by_id)
+        elif recursive:
+            visited  = set() # type: Set[int]
+            to_visit = list(self._children.get(parent.id, []))
+            while len(to_visit) > 0:
+                group_id = to_visit.pop()
+                if group_id not in visited:
+                    visited.add(group_id)
+                    to_visit.extend(self._children.get(group_id, []))
+            group_ids = sorted(visited)
+        else:
+            group_ids = self._children.get(parent.id, [])
+        for group_id in group_ids:
+            group = self._by_id[group_id]
+            if (state is None or self.state(group) == state) and (type is None or self.type(group) == type):
+                yield group
+
+
+@dataclass
+class RoleInterval:
+    person : PersonURI
+    email  : EmailURI
+    start  : datetime
+    end    : Optional[datetime]     # None if the role is still held
+
+
+class RoleTimeline:
+    """
+    An in-memory index of who held each role in each group over time. The
+    roles held in a group are recorded as a series of snapshots, each valid
+    from the time it was taken until the next snapshot, and are merged into
+    intervals keyed by group id and role name slug. Use
+    `DataTrackerExt.role_timeline()` to build a timeline.
+    """
+    def __init__(self) -> None:
+        self._snapshots : Dict[int, Dict[datetime, List[Tuple[str, PersonURI, EmailURI]]]] = {}
+        self._current   : Dict[int, Tuple[datetime, List[Tuple[str, PersonURI, EmailURI]]]] = {}
+        self._intervals : Dict[int, Dict[str, List[RoleInterval]]] = {}
+        self._starts    : Dict[int, Dict[str, List[datetime]]]     = {}
+        self._dirty     : Set[int] = set()
+        self.history_ids  : Set[int] = set()
+        self.last_updated : Optional[datetime] = None
+
+
+    def add_snapshot(self, group_id: int, time: datetime, roles: List[Tuple[str, PersonURI, EmailURI]], history_id: Optional[int] = None) -> None:
+        """
+        Record the roles held in a group from `time`, as given by a GroupHistory
+        and its GroupRoleHistory entries. Each role is a (name slug, person,
+        email) tuple. The id of the GroupHistory, if given, is recorded in
+        `history_ids`.
+        """
+        self._snapshots.setdefault(group_id, {})[time] = roles
+        if history_id is not None:
+            self.history_ids.add(history_id)
+        self._dirty.add(group_id)
+
+
+    def set_current(self, group_id: int, since: datetime, roles: List[Tuple[str, PersonURI, EmailURI]]) -> None:
+        """
+        Record the roles currently held in a group, which have been held since
+        the group was last modified.
+        """
+        self._current[group_id] = (since, roles)
+        if self.last_updated is None or since > self.last_updated:
+            self.last_updated = since
+        self._dirty.add(group_id)
+
+
+    def _rebuild(self) -> None:
+        # Merge the snapshots of each changed group into intervals, each
+        # ending when the next snapshot without that role holder was taken.
+        for group_id in self._dirty:
+            snapshots = sorted(self._snapshots.get(group_id, {}).items(), key = lambda s: s[0])
+            if group_id in self._current:
+                since, roles = self._current[group_id]
+                snapshots = [s for s in snapshots if s[0] < since] + [(since, roles)]
+            intervals      : Dict[str, List[RoleInterval]]        = {}
+            open_intervals : Dict[Tuple[str, str], RoleInterval]  = {}
+            for time, roles in snapshots:
+                held = set()
+                for name, person, email in roles:
+                    assert person.uri is not None
+                    held.add((name, person.uri))
+                    if (name, person.uri) not in open_intervals:
+                        interval = RoleInterval(person, email, time, None)
+                        open_intervals[(name, person.uri)] = interval
+                        intervals.setdefault(name, []).append(interval)
+                for ended in [ended for ended in open_intervals if ended not in held]:
+                    open_intervals.pop(ended).end = time
+            self._intervals[group_id] = intervals
+            self._starts[group_id]    = {name: [i.start for i in role_intervals] for name, role_intervals in intervals.items()}
+        self._dirty.clear()
+
+
+    def holders(self, group_id: int, role: str, at: datetime) -> List[RoleInterval]:
+        """
+        Find who held the role with the given name slug (e.g., "chair") in the
+        group at time `at`, which must be timezone aware.
+        """
+        if len(self._dirty) > 0:
+            self._rebuild()
+        if role not in self._intervals.get(group_id, {}):
+            return []
+        candidates = self._intervals[group_id][role][:bisect_right(self._starts[group_id][role], at)]
+        return [interval for interval in candidates if interval.end is None or interval.end > at]
+
+
+    def all_holders(self, role: str, at: datetime) -> Iterator[Tuple[int, RoleInterval]]:
+        """
+        Find everyone who held the role with the given name slug in any group
+        at time `at`, as (group id, interval) tuples ordered by group id.
+        """
+        if len(self._dirty) > 0:
+            self._rebuild()
+        for group_id in sorted(self._intervals):
+            for interval in self.holders(group_id, role, at):
+                yield group_id, interval
+
+
+def name_tokens(name: str) -> List[str]:
+    """
+    Normalise a name to a list of lower case ASCII tokens, removing accents,
+    punctuation, and parenthesised comments. The tokens are sorted, so that
+    "Perkins, Colin" and "Colin Perkins" give the same result.
+    """
+    name = re.sub(r"\([^)]*\)", " ", name)
+    name = unicodedata.normalize("NFKD", name)
+    name = "".join(c for c in name if not unicodedata.combining(c)).lower()
+    return sorted(re.sub(r"[^a-z0-9]+", " ", name).split())
+
+
+def _trigrams(key: str) -> Set[str]:
+    padded = f" {key} "
+    return {padded[i:i+3] for i in range(len(padded) - 2)}
+
+
+@dataclass
+class NameMatch:
+    person : PersonURI
+    name   : str        # The name or alias that matched
+    score  : float      # From 0.0 to 1.0, where 1.0 is an exact match after normalisation
+
+
+class NameMatcher:
+    """
+    An approximate name matching index. Names are normalised by `name_tokens()`
+    and compared using the Jaccard similarity of their character trigrams,
+    found using an inverted index from trigram to name. Names that match
+    after normalisation have score 1.0. Use `PersonIndex.name_matcher()` to
+    build an index of the names and aliases of all people.
+    """
+    def __init__(self) -> None:
+        self._names    : List[Tuple[PersonURI, str, str, int]] = [] # (person, name, key, number of trigrams)
+        self._exact    : Dict[str, List[int]] = {}
+        self._postings : Dict[str, List[int]] = {}
+
+
+    def add(self, person: PersonURI, name: str) -> None:
+        key = " ".join(name_tokens(name))
+        if key == "":
+            return
+        trigrams = _trigrams(key)
+        entry    = len(self._names)
+        self._names.append((person, name, key, len(trigrams)))
+        self._exact.setdefault(key, []).append(entry)
+        for trigram in trigrams:
+            self._postings.setdefault(trigram, []).append(entry)
+
+
+    def __len__(self) -> int:
+        return len(self._names)
+
+
+    def match(self, name: str, limit: int = 5, threshold: float = 0.5) -> List[NameMatch]:
+        """
+        Find the people whose name or alias best matches `name`, returning at
+        most `limit` matches with score at least `threshold`, best first. Each
+        person appears at most once, with the score of their best matching name.
+        """
+        key = " ".join(name_tokens(name))
+        if key == "":
+            return []
+        scores : Dict[int, float] = {entry: 1.0 for entry in self._exact.get(key, [])}
+        if len(scores) < limit:
+            trigrams = _trigrams(key)
+            hits     = Counter(chain.from_iterable(self._postings.get(trigram, []) for trigram in trigrams))
+            # The similarity cannot exceed count / len(trigrams), so entries
+            # with fewer hits than min_count cannot reach the threshold.
+            min_count = threshold * len(trigrams)
+            for entry, count in hits.items():
+                if count >= min_count and entry not in scores:
+                    score = count / (len(trigrams) + self._names[entry][3] - count)
+                    if score >= threshold:
+                        scores[entry] = score
+        best : Dict[str, NameMatch] = {}
+        for entry, score in sorted(scores.items(), key = lambda e: (-e[1], e[0])):
+            person, entry_name, _, _ = self._names[entry]
+            assert person.uri is not None
+            if person.uri not in best:
+                best[person.uri] = NameMatch(person, entry_name, score)
+        return list(best.values())[:limit]
+
+
+    def match_many(self, names: Iterable[str], limit: int = 5, threshold: float = 0.5) -> Dict[str, List[NameMatch]]:
+        """
+        Match many names, returning a dictionary mapping each name to its
+        matches. Names that normalise to the same key are only matched once.
+        """
+        by_key : Dict[str, List[NameMatch]] = {}
+        result : Dict[str, List[NameMatch]] = {}
+        for name in names:
+            if name not in result:
+                key = " ".join(name_tokens(name))
+                if key not in by_key:
+                    by_key[key] = self.match(name, limit, threshold)
+                result[name] = by_key[key]
+        return result
+
+
+def _normalise_name(name: str) -> str:
+    return " ".join(name.split())
+
+
+class PersonIndex:
+    """
+    An in-memory index of people, their email addresses, and their aliases,
+    used to resolve names and email addresses to people without requests to
+    the datatracker. Use `DataTrackerExt.person_index()` to build an index.
+    """
+    def __init__(self) -> None:
+        self._people     : Dict[int, Person]          = {}
+        self._by_address : Dict[str, int]             = {}
+        self._by_name    : Dict[str, Set[int]]        = {}
+        self._by_ascii   : Dict[str, Set[int]]        = {}
+        self._aliases    : Dict[int, List[str]]       = {}
+        self._by_alias   : Dict[str, List[int]]       = {}
+        self.last_updated : Optional[datetime]        = None
+        self.log = logging.getLogger("ietfdata")
+
+
+    def _updated(self, time: datetime) -> None:
+        if self.last_updated is None or time > self.last_updated:
+            self.last_updated = time
+
+
+    def update_people(self, people: Iterable[Person]) -> None:
+        for person in people:
+            old = self._people.get(person.id)
+            if old is not None:
+                self._by_name.get(_normalise_name(old.name),  set()).discard(old.id)
+                self._by_ascii.get(_normalise_name(old.ascii), set()).discard(old.id)
+            self._people[person.id] = person
+            self._by_name.setdefault(_normalise_name(person.name),   set()).add(person.id)
+            self._by_ascii.setdefault(_normalise_name(person.ascii), set()).add(person.id)
+            self._updated(person.time)
+
+
+    def update_emails(self, emails: Iterable[Email]) -> None:
+        for email in emails:
+            if email.person is not None:
+                self._by_address[email.address] = int(_slug(email.person))
+            else:
+                self._by_address.pop(email.address, None)
+            self._updated(email.time)
+
+
+    def update_aliases(self, person_ids: Iterable[int], aliases: Iterable[PersonAlias]) -> None:
+        """
+        Replace the aliases of the given people, or of all people mentioned
+        in `aliases` if `person_ids` is empty.
+        """
+        replaced = set(person_ids)
+        for person_id in replaced:
+            for alias_name in self._aliases.pop(person_id, []):
+                self._by_alias[alias_name].remove(person_id)
+        for alias in aliases:
+            person_id = int(_slug(alias.person))
+            name      = _normalise_name(alias.name)
+            self._aliases.setdefault(person_id, []).append(name)
+            self._by_alias.setdefault(name, []).append(person_id)
+
+
+    def __len__(self) -> int:
+        return len(self._people)
+
+
+    def person(self, person_id: int) -> Optional[Person]:
+        return self._people.get(person_id)
+
+
+    def person_for_address(self, email_addr: str) -> Optional[Person]:
+        person_id = self._by_address.get(email_addr)
+        return self._people.get(person_id) if person_id is not None else None
+
+
+    def people_named(self, name: str) -> List[Person]:
+        return [self._people[p] for p in sorted(self._by_name.get(_normalise_name(name), set()))]
+
+
+    def people_named_ascii(self, name: str) -> List[Person]:
+        return [self._people[p] for p in sorted(self._by_ascii.get(_normalise_name(name), set()))]
+
+
+    def people_with_alias(self, name: str) -> List[Optional[Person]]:
+        """
+        Find the people with an alias matching `name`, one entry per alias.
+        """
+        return [self._people.get(p) for p in self._by_alias.get(_normalise_name(name), [])]
+
+
+    def name_matcher(self) -> NameMatcher:
+        """
+        Build an approximate name matching index of the names, ASCII names,
+        and aliases of the people in this index.
+        """
+        matcher = NameMatcher()
+        for person in self._people.values():
+            for name in {person.name, person.ascii} | set(self._aliases.get(person.id, [])):
+                matcher.add(person.resource_uri, name)
+        return matcher
+
+
+    def person_from_name_email(self, name: str, email_addr: str) -> Optional[Person]:
+        """
+        As `DataTrackerExt.person_from_name_email()`, but using the index.
+        """
+        assert len(email_addr) > 0
+        email_addr = decode_dmarc(email_addr)
+
+        person = self.person_for_address(email_addr)
+        if person is not None:
+            self.log.debug(f"person_from_name_email: {name} <{email_addr}> -> {person.resource_uri} (email match)")
+            return person
+
+        email_base = base_address(email_addr)
+        if email_base is not None:
+            person = self.person_for_address(email_base)
+            if person is not None:
+                self.log.debug(f"person_from_name_email: {name} <{email_addr}> -> {person.resource_uri} (email match as {email_base})")
+                return person
+
+        name = strip_name_suffix(name)
+        for n in names_to_try(name, email_addr):
+            people = self.people_named(n)
+            if len(people) == 1:
+                self.log.debug(f"person_from_name_email: {name} <{email_addr}> -> {people[0].resource_uri} (name match)")
+                return people[0]
+
+            people = self.people_named_ascii(n)
+            if len(people) == 1:
+                self.log.debug(f"person_from_name_email: {name} <{email_addr}> -> {people[0].resource_uri} (name_ascii match)")
+                return people[0]
+
+            aliases = self.people_with_alias(n)
+            if len(aliases) == 1:
+                uri = aliases[0].resource_uri if aliases[0] is not None else None
+                self.log.debug(f"person_from_name_email: {name} <{email_addr}> -> {uri} (alias match)")
+                return aliases[0]
+
+        self.log.debug(f"person_from_name_email: {name} <{email_addr}> failed to match")
+        return None
+
+
+class DraftLineage:
+    """
+    An in-memory graph of the revisions and submissions of each draft, and of
+    the drafts that each draft replaces, built from bulk crawls of document
+    events, submissions, and related documents. Documents are identified by
+    the `uri` of their DocumentURI. Use `DataTrackerExt.draft_lineage()` to
+    build a graph.
+    """
+    def __init__(self) -> None:
+        self._revisions   : Dict[str, Dict[int, Tuple[str, datetime]]] = {}
+        self._submissions : Dict[str, Dict[int, Submission]]           = {}
+        self._replaces    : Dict[str, Set[str]]                        = {}
+        self.last_event      : Optional[datetime] = None
+        self.last_submission : Optional[date]     = None
+
+
+    def add_revisions(self, events: Iterable[DocumentEvent]) -> None:
+        for event in events:
+            assert event.doc.uri is not None
+            self._revisions.setdefault(event.doc.uri, {})[event.id] = (event.rev, event.time)
+            if self.last_event is None or event.time > self.last_event:
+                self.last_event = event.time
+
+
+    def add_submissions(self, submissions: Iterable[Submission]) -> None:
+        for submission in submissions:
+            assert submission.draft.uri is not None
+            self._submissions.setdefault(submission.draft.uri, {})[submission.id] = submission
+            if self.last_submission is None or submission.submission_date > self.last_submission:
+                self.last_submission = submission.submission_date
+
+
+    def set_replaces(self, related: Iterable[RelatedDocument]) -> None:
+        """
+        Replace the "replaces" relationships with those given.
+        """
+        self._replaces = {}
+        for r in related:
+            assert r.source.uri is not None and r.target.uri is not None
+            self._replaces.setdefault(r.source.uri, set()).add(r.target.uri)
+
+
+    def replaces(self, doc: str) -> List[str]:
+        """
+        Find the documents directly replaced by `doc`, as listed in its
+        submissions and then in its related documents.
+        """
+        result = []
+        for submission in self.submissions(doc):
+            if submission.replaces != "":
+                for name in submission.replaces.split(","):
+                    replaced = f"/api/v1/doc/document/{name}/"
+                    if replaced not in result:
+                        result.append(replaced)
+        for replaced in sorted(self._replaces.get(doc, set())):
+            if replaced not in result:
+                result.append(replaced)
+        return result
+
+
+    def revisions(self, doc: str) -> List[Tuple[str, datetime]]:
+        return [self._revisions[doc][e] for e in sorted(self._revisions.get(doc, {}))]
+
+
+    def submissions(self, doc: str) -> List[Submission]:
+        return [self._submissions[doc][s] for s in sorted(self._submissions.get(doc, {}))]
+
+
+    def lineage(self, doc: str) -> List[str]:
+        """
+        Find `doc` and all the documents it transitively replaces, depth first.
+        """
+        seen   : Set[str]  = set()
+        result : List[str] = []
+        to_visit = [doc]
+        while len(to_visit) > 0:
+            current = to_visit.pop()
+            if current not in seen:
+                seen.add(current)
+                result.append(current)
+                to_visit.extend(reversed(self.replaces(current)))
+        return result
+
+
+@dataclass
+class RFCJoin:
+    """
+    An RFC, as listed in the RFC index, joined with the datatracker document
+    for the RFC. The `draft` is the name, without revision, of the draft that
+    became the RFC.
+    """
+    doc_id      : DocID
+    rfc         : Optional[RfcEntry]
+    document    : Optional[Document]
+    draft       : Optional[str]
+    group       : Optional[GroupURI]
+    stream      : Optional[str]
+
+
+class RFCDocumentIndex:
+    """
+    An in-memory join between the RFC index and the datatracker documents for
+    RFCs, built from the RFC index and one crawl of the documents with type
+    "rfc". Use `DataTrackerExt.rfc_document_index()` to build an index.
+    """
+    def __init__(self, rfcs: Iterable[RfcEntry] = (), documents: Iterable[Document] = ()) -> None:
+        self._rfcs      : Dict[int, RfcEntry] = {}
+        self._documents : Dict[int, Document] = {}
+        self._drafts    : Dict[str, int]      = {}
+        self.last_updated : Optional[datetime] = None
+        self.update_rfcs(rfcs)
+        self.update_documents(documents)
+
+
+    def update_rfcs(self, rfcs: Iterable[RfcEntry]) -> None:
+        for rfc in rfcs:
+            number = int(rfc.doc_id[3:])
+            self._rfcs[number] = rfc
+            if rfc.draft is not None:
+                self._drafts[rfc.draft[:-3]] = number
+
+
+    def update_documents(self, documents: Iterable[Document]) -> None:
+        """
+        Add the documents for RFCs to the index, replacing any existing entries
+        for the same RFCs. Documents that are not RFCs are ignored.
+        """
+        for doc in documents:
+            if doc.rfc_number is None:
+                continue
+            old = self._documents.get(doc.rfc_number)
+            if old is None or _slug(old.type) != "rfc" or _slug(doc.type) == "rfc":
+                self._documents[doc.rfc_number] = doc
+            if self.last_updated is None or doc.time > self.last_updated:
+                self.last_updated = doc.time
+
+
+    def __len__(self) -> int:
+        return len(self._rfcs.keys() | self._documents.keys())
+
+
+    def _join(self, number: int) -> RFCJoin:
+        rfc = self._rfcs.get(number)
+        doc = self._documents.get(number)
+        return RFCJoin(doc_id   = rfc.doc_id if rfc is not None else DocID(f"RFC{number:04d}"),
+                       rfc      = rfc,
+                       document = doc,
+                       draft    = rfc.draft[:-3] if rfc is not None and rfc.draft is not None else None,
+                       group    = doc.group if doc is not None else None,
+                       stream   = _slug(doc.stream) if doc is not None and doc.stream is not None else None)
+
+
+    def join(self, doc_id: str) -> Optional[RFCJoin]:
+        """
+        Find an RFC by its doc_id (e.g., "RFC3550" or "rfc3550").
+        """
+        number = int(doc_id[3:])
+        if number not in self._rfcs and number not in self._documents:
+            return None
+        return self._join(number)
+
+
+    def join_from_draft(self, draft: str) -> Optional[RFCJoin]:
+        """
+        Find the RFC that a draft, named without revision, became.
+        """
+        number = self._drafts.get(draft)
+        return self._join(number) if number is not None else None
+
+
+    def document(self, doc_id: str) -> Optional[Document]:
+        return self._documents.get(int(doc_id[3:]))
+
+
+    def joins(self) -> Iterator[RFCJoin]:
+        """
+        Join all RFCs, ordered by RFC number, including those only found in
+        one of the RFC index or the datatracker.
+        """
+        for number in sorted(self._rfcs.keys() | self._documents.keys()):
+            yield self._join(number)
+
+
 class DataTrackerExt(DataTracker):
     """
     The `DataTrackerExt` class extends the `DataTracker` with methods that
@@ -105,18 +761,205 @@ class DataTrackerExt(DataTracker):
                  mongodb_port  : str  = os.getenv("IETFDATA_CACHE_PORT", "27017"),
                  mongodb_user  : Optional[str] = os.getenv("IETFDATA_CACHE_USER"),
                  mongodb_pass  : Optional[str] = os.getenv("IETFDATA_CACHE_PASSWORD"),
-                 cache_timeout : Optional[timedelta] = None):
-        super().__init__(use_cache, mongodb_host, mongodb_port, mongodb_user, mongodb_pass, cache_timeout)
+                 cache_timeout : Optional[timedelta] = None,
+                 cache_max_size: Optional[int] = None,
+                 cache_policy  : str  = os.getenv("IETFDATA_CACHE_POLICY", "lru"),
+                 cache_compression: Optional[str] = os.getenv("IETFDATA_CACHE_COMPRESSION"),
+                 offline       : bool = False):
+        super().__init__(use_cache, mongodb_host, mongodb_port, mongodb_user, mongodb_pass, cache_timeout, cache_max_size, cache_policy, cache_compression, offline)
+        self._group_index : Optional[GroupIndex] = None
+        self._role_timeline : Optional[RoleTimeline] = None
+        self._person_index  : Optional[PersonIndex]  = None
+        self._draft_lineage : Optional[DraftLineage] = None
+        self._rfc_document_index : Optional[RFCDocumentIndex] = None
+
+
+    def group_index(self, refresh: bool = False) -> GroupIndex:
+        """
+        Return an index of all groups. The index is built on first use, and
+        is updated with any groups that have changed since it was built when
+        `refresh` is set.
+        """
+        if self._group_index is None:
+            self._group_index = GroupIndex(self.groups())
+        elif refresh and self._group_index.last_updated is not None:
+            since = self._group_index.last_updated.astimezone(timezone.utc).strftime("%Y-%m-%dT%H:%M:%S")
+            self._group_index.update(self.groups(since = since))
+        return self._group_index
+
+
+    def role_timeline(self, refresh: bool = False) -> RoleTimeline:
+        """
+        Return a timeline of the roles held in each group, built from the group
+        histories and role histories. The timeline is built on first use, and
+        is updated with the groups that have changed since it was built when
+        `refresh` is set.
+        """
+        if self._role_timeline is not None and not refresh:
+            return self._role_timeline
+
+        index = self.group_index(refresh = refresh)
+        if self._role_timeline is None:
+            timeline   = RoleTimeline()
+            histories  = {h.id: h for h in self.group_histories()}
+            role_hists = self.group_role_histories()
+            groups     = list(index.groups())
+            current    = self.group_roles()
+        else:
+            # A GroupHistory has the time of the version of the group that it
+            # replaced, so new histories cannot be found by time. Instead, find
+            # the histories of the groups that have changed, and keep those not
+            # already in the timeline.
+            timeline   = self._role_timeline
+            assert timeline.last_updated is not None
+            since      = timeline.last_updated
+            groups     = [g for g in index.groups() if g.time >= since]
+            histories  = {h.id: h for g in groups for h in self.group_histories(group = g) if h.id not in timeline.history_ids}
+            role_hists = (r for h in histories.values() for r in self.group_role_histories(group = h))
+            current    = (r for g in groups for r in self.group_roles(group = g))
+
+        snapshots : Dict[int, List[Tuple[str, PersonURI, EmailURI]]] = {h: [] for h in histories}
+        for role_hist in role_hists:
+            history_id = int(_slug(role_hist.group))
+            if history_id in snapshots:
+                snapshots[history_id].append((_slug(role_hist.name), role_hist.person, role_hist.email))
+        for history_id, roles in snapshots.items():
+            history = histories[history_id]
+            timeline.add_snapshot(int(_slug(history.group)), history.time, roles, history_id)
+
+        roles_by_group : Dict[int, List[Tuple[str, PersonURI, EmailURI]]] = {g.id: [] for g in groups}
+        for role in current:
+            group_id = int(_slug(role.group))
+            if group_id in roles_by_group:
+                roles_by_group[group_id].append((_slug(role.name), role.person, role.email))
+        for group in groups:
+            timeline.set_current(group.id, group.time, roles_by_group[group.id])
+
+        self._role_timeline = timeline
+        return timeline
+
+
+    def person_index(self, refresh: bool = False) -> PersonIndex:
+        """
+        Return an index of all people, email addresses, and aliases. The index
+        is built on first use, and is updated with the people and addresses
+        that have changed since it was built when `refresh` is set.
+        """
+        if self._person_index is None:
+            index = PersonIndex()
+            index.update_people(self.people())
+            index.update_emails(self.emails())
+            index.update_aliases([], self.person_aliases())
+            self._person_index = index
+        elif refresh and self._person_index.last_updated is not None:
+            index   = self._person_index
+            assert index.last_updated is not None
+            since   = index.last_updated.astimezone(timezone.utc).strftime("%Y-%m-%dT%H:%M:%S")
+            changed = list(self.people(since = since))
+            index.update_people(changed)
+            index.update_emails(self.emails(since = since))
+            index.update_aliases([p.id for p in changed], (a for p in changed for a in self.person_aliases(person = p)))
+        return self._person_index
+
+
+    def role_holders(self, group: Group, role: RoleName, at: datetime) -> List[Person]:
+        """
+        Find the people who held a role in a group at the given time.
+        """
+        people = []
+        with self.batching():
+            for interval in self.role_timeline().holders(group.id, role.slug, at):
+                person = self.person(interval.person)
+                assert person is not None
+                people.append(person)
+        return people
 
 
-    def draft_history(self, draft: Document, drafts_seen: List[Document] = []) -> List[DraftHistory]:
+    def draft_lineage(self, refresh: bool = False) -> DraftLineage:
+        """
+        Return a graph of the revisions, submissions, and replacements of all
+        drafts. The graph is built on first use, and is updated with the events
+        and submissions since it was built when `refresh` is set. Once built,
+        draft_history() and draft_history_for_rfc() use the graph rather than
+        querying the datatracker for each draft.
+        """
+        if self._draft_lineage is None:
+            lineage = DraftLineage()
+            lineage.add_revisions(self.document_events(event_type = "new_revision"))
+            lineage.add_submissions(self.submissions())
+            lineage.set_replaces(self.related_documents(relationship_type_slug = "replaces"))
+            self._draft_lineage = lineage
+        elif refresh:
+            lineage = self._draft_lineage
+            if lineage.last_event is not None:
+                since = lineage.last_event.astimezone(timezone.utc).strftime("%Y-%m-%dT%H:%M:%S")
+                lineage.add_revisions(self.document_events(since = since, event_type = "new_revision"))
+            if lineage.last_submission is not None:
+                lineage.add_submissions(self.submissions(date_since = lineage.last_submission.isoformat()))
+            lineage.set_replaces(self.related_documents(relationship_type_slug = "replaces"))
+        return self._draft_lineage
+
+
+    def rfc_document_index(self, rfc_index: RFCIndex, refresh: bool = False) -> RFCDocumentIndex:
+        """
+        Return an index joining the RFCs in `rfc_index` with their datatracker
+        documents. The index is built on first use, and is updated with the
+        RFCs in `rfc_index` and the documents that have changed since it was
+        built when `refresh` is set. Once built, draft_history_for_rfc() uses
+        the index rather than looking up the document for each RFC.
+        """
+        if self._rfc_document_index is None:
+            doctype = self.document_type_from_slug("rfc")
+            assert doctype is not None
+            self._rfc_document_index = RFCDocumentIndex(rfc_index.rfcs(), self.documents(doctype = doctype))
+        elif refresh:
+            self._rfc_document_index.update_rfcs(rfc_index.rfcs())
+            if self._rfc_document_index.last_updated is not None:
+                doctype = self.document_type_from_slug("rfc")
+                assert doctype is not None
+                since = self._rfc_document_index.last_updated.astimezone(timezone.utc).strftime("%Y-%m-%dT%H:%M:%S")
+                self._rfc_document_index.update_documents(self.documents(since = since, doctype = doctype))
+        return self._rfc_document_index
+
+
+    def _draft_history_from_lineage(self, draft: Document, lineage: DraftLineage) -> List[DraftHistory]:
+        assert draft.resource_uri.uri is not None
+        doc_uris  = lineage.lineage(draft.resource_uri.uri)
+        documents = self._retrieve_bulk([DocumentURI(uri=uri) for uri in doc_uris[1:]])
+        documents[draft.resource_uri.uri] = draft
+
+        drafts : List[DraftHistory] = []
+        for doc_uri in doc_uris:
+            document = documents.get(doc_uri)
+            if not isinstance(document, Document):
+                continue
+            doc_drafts = [DraftHistory(document, rev, time, None) for rev, time in lineage.revisions(doc_uri)]
+            for submission in lineage.submissions(doc_uri):
+                found = False
+                for d in doc_drafts:
+                    if d.rev == submission.rev:
+                        d.submission = submission
+                        found = True
+                        break
+                if not found:
+                    doc_drafts.append(DraftHistory(document, submission.rev, submission.submission_date, submission))
+            drafts.extend(doc_drafts)
+        return list(reversed(sorted(drafts, key=lambda d: d.date)))
+
+
+    def draft_history(self, draft: Document, drafts_seen: Optional[List[Document]] = None) -> List[DraftHistory]:
         """
         Find the previous versions of an Internet-Draft
         """
         assert draft.type == DocumentTypeURI(uri="/api/v1/name/doctypename/draft/")
 
+        if self._draft_lineage is not None:
+            return self._draft_history_from_lineage(draft, self._draft_lineage)
+
         drafts : List[DraftHistory] = []
 
+        if drafts_seen is None:
+            drafts_seen = []
         if draft in drafts_seen:
             return []
         else:
@@ -193,14 +1036,21 @@ class DataTrackerExt(DataTracker):
         form, so this may return an empty list.
         """
         final_draft = None
-        if rfc.draft is not None:
-            final_draft = self.document_from_draft(rfc.draft[:-3])
-            if final_draft is None:
-                final_draft = self.document_from_rfc(rfc.doc_id)
-        else:
+        draft_name  = rfc.draft[:-3] if rfc.draft is not None else None
+        if self._rfc_document_index is not None:
+            # The index holds the document for the RFC itself, so use it to
+            # find the name of the final draft rather than its history:
+            join = self._rfc_document_index.join(rfc.doc_id)
+            if join is not None and join.document is not None and _slug(join.document.type) == "draft":
+                final_draft = join.document
+            elif join is not None and join.draft is not None:
+                draft_name = join.draft
+        if final_draft is None and draft_name is not None:
+            final_draft = self.document_from_draft(draft_name)
+        if final_draft is None:
             final_draft = self.document_from_rfc(rfc.doc_id)
 
-        if final_draft is not None:
+        if final_draft is not None and _slug(final_draft.type) == "draft":
             return self.draft_history(final_draft)
         else:
             return []
@@ -252,14 +1102,10 @@ class DataTrackerExt(DataTracker):
 
 
     def active_research_groups(self) -> Iterator[Group]:
-        active_state   = self.group_state_from_slug("active")
-        research_group = self.group_type_name_from_slug("rg")
-
-        for group in self.groups(parent = self.group_from_acronym("irtf")):
-            t = self.group_type_name(group.type)
-            s = self.group_state(group.state)
-            if s == active_state and t == research_group:
-                yield group
+        index = self.group_index()
+        irtf  = index.group_from_acronym("irtf")
+        if irtf is not None:
+            yield from index.groups(parent = irtf, state = "active", type = "rg")
 
 
     def research_group_chairs(self) -> Iterator[Person]:
@@ -275,27 +1121,18 @@ class DataTrackerExt(DataTracker):
 
 
     def concluded_research_groups(self) -> Iterator[Group]:
-        concluded_state = self.group_state_from_slug("conclude")
-        research_group  = self.group_type_name_from_slug("wg")
-
-        for group in self.groups(parent = self.group_from_acronym("irtf")):
-            t = self.group_type_name(group.type)
-            s = self.group_state(group.state)
-            if s == concluded_state and t == research_group:
-                yield group
+        index = self.group_index()
+        irtf  = index.group_from_acronym("irtf")
+        if irtf is not None:
+            yield from index.groups(parent = irtf, state = "conclude", type = "rg")
 
 
     def active_working_groups(self) -> Iterator[Group]:
-        active_state  = self.group_state_from_slug("active")
-        working_group = self.group_type_name_from_slug("wg")
-
-        for area in self.groups(parent = self.group_from_acronym("iesg")):
-            if self.group_state(area.state) == active_state:
-                for group in self.groups(parent = area):
-                    t = self.group_type_name(group.type)
-                    s = self.group_state(group.state)
-                    if s == active_state and t == working_group:
-                        yield group
+        index = self.group_index()
+        iesg  = index.group_from_acronym("iesg")
+        if iesg is not None:
+            for area in index.groups(parent = iesg, state = "active"):
+                yield from index.groups(parent = area, state = "active", type = "wg")
 
 
     def working_group_chairs(self) -> Iterator[Person]:
@@ -335,9 +1172,7 @@ class DataTrackerExt(DataTracker):
         """
         assert len(email_addr) > 0
 
-        # Decode DMARC (e.g., arnaud.taddei=40broadcom.com@dmarc.ietf.org -> arnaud.taddei@broadcom.com)
-        if email_addr.endswith("@dmarc.ietf.org"):
-            email_addr = email_addr[:-15].replace("=40", "@")
+        email_addr = decode_dmarc(email_addr)
 
         # Try to match on the email address:
         email = self.email_for_address(email_addr)
@@ -346,20 +1181,15 @@ class DataTrackerExt(DataTracker):
             return self.person(email.person)
 
         # Try to match on the base email address:
-        if "@" in email_addr:
-            local, remote = email_addr.rsplit("@", 1)
-            if local.count("+") == 1:
-                base, suffix = local.rsplit("+", 1)
-                email_base = F"{base}@{remote}"
-                email = self.email_for_address(email_base)
-                if email is not None and email.person is not None:
-                    self.log.debug(f"person_from_name_email: {name} <{email_addr}> -> {email.person} (email match as {email_base})")
-                    return self.person(email.person)
+        email_base = base_address(email_addr)
+        if email_base is not None:
+            email = self.email_for_address(email_base)
+            if email is not None and email.person is not None:
+                self.log.debug(f"person_from_name_email: {name} <{email_addr}> -> {email.person} (email match as {email_base})")
+                return self.person(email.person)
 
         # Try to match on the name:
-        for suffix in [" via Datatracker", " via RT"]:
-            if name.endswith(suffix):
-                name = name[:-len(suffix)]
+        name = strip_name_suffix(name)
 
         for n in names_to_try(name, email_addr):
             people = list(self.people(name = n))
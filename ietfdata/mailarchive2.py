@@ -27,23 +27,26 @@ from __future__    import annotations
 
 import concurrent.futures
 import email
-import pandas as pd
 import os
 import logging
 import time
 
 from datetime           import datetime, timedelta
 from graphlib           import TopologicalSorter
-from typing             import Dict, Iterator, List, Optional, Tuple, Union, Any
+from typing             import Dict, Iterator, List, Optional, Tuple, Union, Any, TYPE_CHECKING
 from gridfs             import GridFS
 from pymongo            import MongoClient, ASCENDING, ReplaceOne, UpdateOne
 from pymongo.database   import Database
 from email              import policy, utils
 from email.message      import Message
 from email_reply_parser import EmailReplyParser
-from imapclient         import IMAPClient
 from dataclasses        import field
 
+# pandas and imapclient are slow to import, and are only needed by some
+# methods, so are imported when first used:
+if TYPE_CHECKING:
+    import pandas as pd
+
 # =================================================================================================
 # Database design for the mail archive:
 #
@@ -365,6 +368,7 @@ class MailingList:
         self._list_name    = list_name
         ml = self._mail_archive._db.lists.find_one({"list": list_name})
         if ml is None:
+            from imapclient import IMAPClient
             imap = IMAPClient(host=self._mail_archive._imap_server, ssl=True, use_uid=True)
             imap.login("anonymous", "anonymous")
 
@@ -451,6 +455,8 @@ class MailingList:
         Return a dataframe containing information about the specified messages from
         this mailing list.
         """
+        import pandas as pd
+
         messages_as_dict = []
         for message in self.messages(received_after = received_after, received_before = received_before):
             mdict = {"Message-ID"  : message.header("message-id")[0] if message.header("message-id") != [] else None,
@@ -484,6 +490,7 @@ class MailingList:
 
         # Login to the IMAP server:
         self._log.info(f"Updating list {self.name()}")
+        from imapclient import IMAPClient
         imap = IMAPClient(host=self._mail_archive._imap_server, ssl=True, use_uid=True)
         imap.login("anonymous", "anonymous")
         _, _, imap_ns_shared = imap.namespace()
@@ -771,6 +778,7 @@ class MailArchive:
         """
         Yield the names of the mailing lists that exist in the mail archive.
         """
+        from imapclient import IMAPClient
         imap = IMAPClient(host=self._imap_server, ssl=True, use_uid=True)
         imap.login("anonymous", "anonymous")
         folders = imap.list_folders()
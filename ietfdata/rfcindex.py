@@ -23,26 +23,104 @@
 # ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
 # POSSIBILITY OF SUCH DAMAGE.
 
-from typing   import NewType, Iterator, List, Optional, Tuple, Dict
-from datetime import datetime, timedelta
-from pathlib  import Path
+from array       import array
+from bisect      import bisect_left, bisect_right
+from typing      import Any, Generic, NewType, Iterable, Iterator, List, Optional, Sequence, Set, Tuple, TypeVar, Dict, IO, Union, cast, overload
+from datetime    import datetime, timedelta
+from pathlib     import Path
+from dataclasses import dataclass, field
 
 import xml.etree.ElementTree as ET
+import concurrent.futures
+import hashlib
+import json
+import logging
+import math
+import os
+import pickle
+import re
 import requests
+import sys
+import threading
+import time
+import unicodedata
 import unittest
 
 # ==================================================================================================
 
 DocID = NewType('DocID', str)
 
+_T = TypeVar('_T')
+
+def _temp_filepath(filepath: Path) -> Path:
+    """
+    The name of a temporary file to write before renaming it to `filepath`,
+    unique to this process and thread.
+    """
+    return filepath.with_name(f"{filepath.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+
+_MONTHS = ["January", "February", "March", "April", "May", "June", "July",
+           "August", "September", "October", "November", "December"]
+
+
+class _ListField(Generic[_T]):
+    """
+    A list field of an entry. Most list fields are empty, so an empty list is
+    stored as None, and a new empty list is created for the entry the first
+    time the field is read. Entries never share a list, so the lists can be
+    modified as usual.
+    """
+    def __set_name__(self, owner: type, name: str) -> None:
+        self._slot = "_" + name
+
+
+    @overload
+    def __get__(self, obj: None, objtype: Optional[type] = None) -> "_ListField[_T]": ...
+    @overload
+    def __get__(self, obj: object, objtype: Optional[type] = None) -> List[_T]: ...
+
+    def __get__(self, obj: Optional[object], objtype: Optional[type] = None) -> Union["_ListField[_T]", List[_T]]:
+        if obj is None:
+            return self
+        value = getattr(obj, self._slot) # type: Optional[List[_T]]
+        if value is None:
+            value = []
+            setattr(obj, self._slot, value)
+        return value
+
+
+    def __set__(self, obj: object, value: List[_T]) -> None:
+        setattr(obj, self._slot, value)
+
+
+    def compact(self, obj: object) -> None:
+        """
+        Intern the strings in the field of `obj`, storing an empty list as None.
+        """
+        value = getattr(obj, self._slot) # type: Optional[List[str]]
+        setattr(obj, self._slot, [sys.intern(v) for v in value] if value else None)
+
+
+def _intern(value: Optional[str]) -> Optional[str]:
+    return sys.intern(value) if value is not None else None
+
+
 class RfcEntry:
     """
     An RFC entry in the rfc-index.xml file. No attempt is made to
     normalise the data included here.
+
+    Empty list fields are not stored until used, and repeated strings are
+    interned, to reduce the memory used by an RFCIndex.
     """
+    __slots__ = ("doc_id", "title", "_authors", "doi", "stream", "wg", "area", "publ_status",
+                 "curr_status", "day", "month", "year", "_formats", "draft", "_keywords", "_updates",
+                 "_updated_by", "_obsoletes", "_obsoleted_by", "_is_also", "_see_also", "errata_url",
+                 "_abstract", "_abstract_xml", "page_count", "_date")
+
     doc_id       : DocID                # DocumentID (e.g., "RFC8700")
     title        : str
-    authors      : List[str]
+    authors      = _ListField[str]()
     doi          : str
     stream       : str
     wg           : Optional[str]        # For IETF stream RFCs, the working group
@@ -52,18 +130,20 @@ class RfcEntry:
     day          : Optional[int]        # The publication day; only recorded for 1 April RFCs
     month        : str                  # The publication month (e.g., "December")
     year         : int                  # The publication year
-    formats      : List[str]
+    formats      = _ListField[str]()
     draft        : Optional[str]        # The Internet-draft that became this RFC
-    keywords     : List[str]
-    updates      : List[DocID]
-    updated_by   : List[DocID]
-    obsoletes    : List[DocID]
-    obsoleted_by : List[DocID]
-    is_also      : List[DocID]
-    see_also     : List[DocID]
+    keywords     = _ListField[str]()
+    updates      = _ListField[DocID]()
+    updated_by   = _ListField[DocID]()
+    obsoletes    = _ListField[DocID]()
+    obsoleted_by = _ListField[DocID]()
+    is_also      = _ListField[DocID]()
+    see_also     = _ListField[DocID]()
     errata_url   : Optional[str]
-    abstract     : Optional[ET.Element] # The abstract, as formatted XML
+    _abstract    : Optional[ET.Element] # The abstract, as formatted XML; see the abstract property
+    _abstract_xml: Optional[bytes]      # The abstract, serialised, if not yet parsed
     page_count   : int
+    _date        : datetime
 
 
     def __init__(self, rfc_element: ET.Element) -> None:
@@ -71,7 +151,8 @@ class RfcEntry:
         self.area         = None
         self.day          = None
         self.errata_url   = None
-        self.abstract     = None
+        self._abstract    = None
+        self._abstract_xml = None
         self.draft        = None
         self.authors      = []
         self.keywords     = []
@@ -202,7 +283,7 @@ class RfcEntry:
             elif elem.tag == "{http://www.rfc-editor.org/rfc-index}abstract":
                 # The <abstract>...</abstract> contains formatted XML, most
                 # typically a sequence of <p>...</p> tags.
-                self.abstract = elem
+                self._abstract = elem
             elif elem.tag == "{http://www.rfc-editor.org/rfc-index}page-count":
                 assert elem.text is not None
                 self.page_count = int(elem.text)
@@ -210,6 +291,57 @@ class RfcEntry:
                 print("Unknown tag: " + elem.tag)
                 raise NotImplementedError
 
+        self.doc_id       = DocID(sys.intern(self.doc_id))
+        self.stream       = sys.intern(self.stream)
+        self.wg           = _intern(self.wg)
+        self.area         = _intern(self.area)
+        self.publ_status  = sys.intern(self.publ_status)
+        self.curr_status  = sys.intern(self.curr_status)
+        self.month        = sys.intern(self.month)
+        RfcEntry.authors.compact(self)
+        RfcEntry.formats.compact(self)
+        RfcEntry.keywords.compact(self)
+        RfcEntry.updates.compact(self)
+        RfcEntry.updated_by.compact(self)
+        RfcEntry.obsoletes.compact(self)
+        RfcEntry.obsoleted_by.compact(self)
+        RfcEntry.is_also.compact(self)
+        RfcEntry.see_also.compact(self)
+        self._date        = datetime(self.year, _MONTHS.index(self.month) + 1, self.day if self.day is not None else 1)
+
+
+    @property
+    def abstract(self) -> Optional[ET.Element]:
+        """
+        The abstract, as formatted XML. When loaded from a snapshot, the
+        abstract is parsed on first use.
+        """
+        if self._abstract is None and self._abstract_xml is not None:
+            self._abstract     = ET.fromstring(self._abstract_xml)
+            self._abstract_xml = None
+        return self._abstract
+
+
+    @abstract.setter
+    def abstract(self, abstract: Optional[ET.Element]) -> None:
+        self._abstract     = abstract
+        self._abstract_xml = None
+
+
+    def __getstate__(self) -> Dict[str, object]:
+        # Pickle the abstract as serialised XML, which is much faster to
+        # load than an Element tree.
+        state = {name: getattr(self, name) for name in self.__slots__ if hasattr(self, name)}
+        if self._abstract is not None:
+            state["_abstract"]     = None
+            state["_abstract_xml"] = ET.tostring(self._abstract)
+        return state
+
+
+    def __setstate__(self, state: Dict[str, object]) -> None:
+        for name, value in state.items():
+            setattr(self, name, value)
+
 
     def __str__(self) -> str:
         return "RFC {\n" \
@@ -307,12 +439,7 @@ class RfcEntry:
 
 
     def date(self) -> datetime:
-        if self.day != None:
-            date = "{} {} {}".format(self.day, self.month, self.year)
-            return datetime.strptime(date, "%d %B %Y")
-        else:
-            date = "{} {}".format(self.month, self.year)
-            return datetime.strptime(date, "%B %Y")
+        return self._date
 
 
 
@@ -322,6 +449,8 @@ class RfcNotIssuedEntry:
     """
       An RFC that was not issued in the rfc-index.xml file.
     """
+    __slots__ = ("doc_id",)
+
     doc_id : DocID
 
 
@@ -346,8 +475,10 @@ class BcpEntry:
     """
       A BCP entry in the rfc-index.xml file.
     """
+    __slots__ = ("doc_id", "_is_also")
+
     doc_id  : DocID
-    is_also : List[DocID]
+    is_also = _ListField[DocID]()
 
 
     def __init__(self, bcp_element: ET.Element) -> None:
@@ -367,6 +498,8 @@ class BcpEntry:
             else:
                 raise NotImplementedError
 
+        BcpEntry.is_also.compact(self)
+
 
     def __str__(self) -> str:
         return "BCP {\n" \
@@ -381,9 +514,11 @@ class StdEntry:
     """
       An STD entry in the rfc-index.xml file.
     """
+    __slots__ = ("doc_id", "title", "_is_also")
+
     doc_id  : DocID
     title   : str
-    is_also : List[DocID]
+    is_also = _ListField[DocID]()
 
 
     def __init__(self, std_element: ET.Element) -> None:
@@ -405,6 +540,8 @@ class StdEntry:
             else:
                 raise NotImplementedError
 
+        StdEntry.is_also.compact(self)
+
 
     def __str__(self) -> str:
         return "STD {\n" \
@@ -419,8 +556,10 @@ class FyiEntry:
     """
       A FYI entry in the rfc-index.xml file.
     """
+    __slots__ = ("doc_id", "_is_also")
+
     doc_id   : DocID
-    is_also  : List[DocID]
+    is_also  = _ListField[DocID]()
 
 
     def __init__(self, fyi_element: ET.Element) -> None:
@@ -440,6 +579,8 @@ class FyiEntry:
             else:
                 raise NotImplementedError
 
+        FyiEntry.is_also.compact(self)
+
 
     def __str__(self) -> str:
         return "FYI {\n" \
@@ -448,6 +589,296 @@ class FyiEntry:
              + "}\n"
 
 
+# ==================================================================================================
+
+class RFCGraph:
+    """
+    The relationships between RFCs, as recorded in the rfc-index.xml file.
+    Each document is numbered, and the edges for each relationship are held
+    in compressed sparse row form: the targets of the edges from document
+    `n` are targets[offsets[n]:offsets[n+1]]. Use `RFCIndex.graph()` to get
+    the graph for an index.
+
+    The relationships are "updates", "updated_by", "obsoletes", "obsoleted_by",
+    "is_also", and "see_also".
+    """
+    _INVERSE = {"updates"      : "updated_by",
+                "updated_by"   : "updates",
+                "obsoletes"    : "obsoleted_by",
+                "obsoleted_by" : "obsoletes",
+                "is_also"      : "is_also",
+                "see_also"     : "see_also"}
+
+    def __init__(self, rfcs: Iterator[RfcEntry]) -> None:
+        self._doc_ids : List[DocID]     = []
+        self._number  : Dict[DocID, int] = {}
+        edges : Dict[str, List[Tuple[int, int]]] = {relation: [] for relation in self._INVERSE}
+        for rfc in rfcs:
+            source = self._node(rfc.doc_id)
+            for relation in self._INVERSE:
+                for target in getattr(rfc, relation):
+                    edges[relation].append((source, self._node(target)))
+
+        self._offsets : Dict[str, array] = {}
+        self._targets : Dict[str, array] = {}
+        for relation, relation_edges in edges.items():
+            self._offsets[relation], self._targets[relation] = self._csr(relation_edges)
+        self._current : Optional[Tuple[array, array]] = None
+
+
+    def _node(self, doc_id: DocID) -> int:
+        if doc_id not in self._number:
+            self._number[doc_id] = len(self._doc_ids)
+            self._doc_ids.append(doc_id)
+        return self._number[doc_id]
+
+
+    def _csr(self, edges: List[Tuple[int, int]]) -> Tuple[array, array]:
+        edges.sort()
+        offsets = array("i", [0] * (len(self._doc_ids) + 1))
+        for source, target in edges:
+            offsets[source + 1] += 1
+        for n in range(len(self._doc_ids)):
+            offsets[n + 1] += offsets[n]
+        return offsets, array("i", [target for source, target in edges])
+
+
+    def _edges(self, node: int, relation: str) -> Sequence[int]:
+        offsets = self._offsets[relation]
+        return self._targets[relation][offsets[node]:offsets[node + 1]]
+
+
+    def _reachable(self, start: int, relation: str) -> List[int]:
+        seen     = {start}
+        result   = []
+        to_visit = [start]
+        while len(to_visit) > 0:
+            node = to_visit.pop()
+            for target in self._edges(node, relation):
+                if target not in seen:
+                    seen.add(target)
+                    result.append(target)
+                    to_visit.append(target)
+        return sorted(result)
+
+
+    def related(self, doc_id: str, relation: str) -> List[DocID]:
+        """
+        Find the documents directly related to `doc_id` by `relation`.
+        """
+        if doc_id not in self._number:
+            return []
+        return [self._doc_ids[n] for n in self._edges(self._number[DocID(doc_id)], relation)]
+
+
+    def descendants(self, doc_id: str, relation: str) -> List[DocID]:
+        """
+        Find the documents transitively related to `doc_id` by `relation`. For
+        example, descendants("RFC0793", "updated_by") finds every RFC that
+        updates RFC 793, or that updates an RFC that does, and so on.
+        """
+        if doc_id not in self._number:
+            return []
+        return [self._doc_ids[n] for n in self._reachable(self._number[DocID(doc_id)], relation)]
+
+
+    def ancestors(self, doc_id: str, relation: str) -> List[DocID]:
+        """
+        Find the documents from which `doc_id` can be reached by `relation`.
+        For example, ancestors("RFC9293", "obsoleted_by") finds every RFC that
+        RFC 9293 transitively obsoletes.
+        """
+        return self.descendants(doc_id, self._INVERSE[relation])
+
+
+    def current_versions(self, doc_id: str) -> List[DocID]:
+        """
+        Find the current versions of `doc_id`, following the "obsoleted_by"
+        relationship to the documents that are not themselves obsoleted. A
+        document that is not obsoleted is its own current version. This is
+        computed for all documents on first use.
+        """
+        if doc_id not in self._number:
+            return []
+        if self._current is None:
+            edges = []
+            for node in range(len(self._doc_ids)):
+                if len(self._edges(node, "obsoleted_by")) == 0:
+                    edges.append((node, node))
+                else:
+                    for target in self._reachable(node, "obsoleted_by"):
+                        if len(self._edges(target, "obsoleted_by")) == 0:
+                            edges.append((node, target))
+            self._current = self._csr(edges)
+        offsets, targets = self._current
+        node = self._number[DocID(doc_id)]
+        return [self._doc_ids[n] for n in targets[offsets[node]:offsets[node + 1]]]
+
+
+# ==================================================================================================
+
+def search_tokens(text: str) -> List[str]:
+    """
+    Split text into lower case ASCII search terms, removing accents and
+    punctuation.
+    """
+    text = unicodedata.normalize("NFKD", text)
+    text = "".join(c for c in text if not unicodedata.combining(c)).lower()
+    return re.findall(r"[a-z0-9]+", text)
+
+
+class RFCSearchIndex:
+    """
+    A full-text search index over the titles, keywords, and abstracts of
+    RFCs, ranked using BM25. Use `RFCIndex.search_index()` to get the search
+    index for an RFCIndex.
+    """
+    _VERSION = 1
+    _K1      = 1.2
+    _B       = 0.75
+
+    def __init__(self, rfcs: Iterator[RfcEntry]) -> None:
+        self._doc_ids   : List[DocID] = []
+        self._lengths   : array       = array("i")
+        self._postings  : Dict[str, Dict[int, List[int]]] = {}  # term -> document -> positions
+        for rfc in rfcs:
+            text = [rfc.title] + list(rfc.keywords)
+            if rfc.abstract is not None:
+                text.append(" ".join(rfc.abstract.itertext()))
+            doc    = len(self._doc_ids)
+            tokens = search_tokens(" ".join(text))
+            for pos, token in enumerate(tokens):
+                self._postings.setdefault(token, {}).setdefault(doc, []).append(pos)
+            self._doc_ids.append(rfc.doc_id)
+            self._lengths.append(len(tokens))
+        self._terms     = sorted(self._postings)
+        self._avglength = sum(self._lengths) / max(1, len(self._lengths))
+
+
+    def _idf(self, term: str) -> float:
+        n = len(self._postings.get(term, {}))
+        return math.log(1 + (len(self._doc_ids) - n + 0.5) / (n + 0.5))
+
+
+    def _bm25(self, term: str, doc: int) -> float:
+        tf   = len(self._postings[term][doc])
+        norm = 1 - self._B + self._B * self._lengths[doc] / self._avglength
+        return float(self._idf(term) * tf * (self._K1 + 1) / (tf + self._K1 * norm))
+
+
+    def _phrase_matches(self, terms: List[str]) -> Set[int]:
+        docs = set(self._postings.get(terms[0], {}))
+        for term in terms[1:]:
+            docs &= set(self._postings.get(term, {}))
+        result = set()
+        for doc in docs:
+            starts = set(self._postings[terms[0]][doc])
+            for offset, term in enumerate(terms[1:], start=1):
+                starts &= {pos - offset for pos in self._postings[term][doc]}
+            if len(starts) > 0:
+                result.add(doc)
+        return result
+
+
+    def search(self, query: str, limit: int = 10) -> List[Tuple[DocID, float]]:
+        """
+        Find the RFCs matching all the clauses of a query, best first, with
+        their BM25 scores. Each clause is a word, a "quoted phrase" whose words
+        must appear consecutively, or a prefix ending in * (e.g., "congest*")
+        that matches any word starting with it.
+        """
+        scores : Optional[Dict[int, float]] = None
+        for phrase, word in re.findall(r'"([^"]*)"|(\S+)', query):
+            clause : Dict[int, float] = {}
+            if phrase != "":
+                terms = search_tokens(phrase)
+                if len(terms) == 0:
+                    continue
+                for doc in self._phrase_matches(terms):
+                    clause[doc] = sum(self._bm25(term, doc) for term in terms)
+            elif word.endswith("*"):
+                terms = search_tokens(word[:-1])
+                if len(terms) != 1:
+                    continue
+                start = bisect_left(self._terms, terms[0])
+                for term in self._terms[start:]:
+                    if not term.startswith(terms[0]):
+                        break
+                    for doc in self._postings[term]:
+                        clause[doc] = max(clause.get(doc, 0.0), self._bm25(term, doc))
+            else:
+                terms = search_tokens(word)
+                if len(terms) == 0:
+                    continue
+                for doc in self._phrase_matches(terms):
+                    clause[doc] = sum(self._bm25(term, doc) for term in terms)
+            if scores is None:
+                scores = clause
+            else:
+                scores = {doc: score + clause[doc] for doc, score in scores.items() if doc in clause}
+        if scores is None:
+            return []
+        ranked = sorted(scores.items(), key = lambda s: (-s[1], s[0]))[:limit]
+        return [(self._doc_ids[doc], score) for doc, score in ranked]
+
+
+    def save(self, filepath: Path, index_sha256: str) -> None:
+        """
+        Save the search index, recording the hash of the rfc-index.xml file
+        it was built from.
+        """
+        temp_filepath = _temp_filepath(filepath)
+        with open(temp_filepath, "wb") as outf:
+            pickle.dump({"version": self._VERSION, "sha256": index_sha256}, outf, protocol=pickle.HIGHEST_PROTOCOL)
+            pickle.dump(self, outf, protocol=pickle.HIGHEST_PROTOCOL)
+        temp_filepath.replace(filepath)
+
+
+    @classmethod
+    def load(cls, filepath: Path, index_sha256: str) -> Optional["RFCSearchIndex"]:
+        """
+        Load a saved search index, if it was built from the rfc-index.xml file
+        with the given hash.
+        """
+        if not filepath.exists():
+            return None
+        try:
+            with open(filepath, "rb") as inf:
+                header = pickle.load(inf)
+                if header.get("version") != cls._VERSION or header.get("sha256") != index_sha256:
+                    return None
+                search = pickle.load(inf)
+                if isinstance(search, RFCSearchIndex):
+                    return search
+                return None
+        except (OSError, EOFError, pickle.UnpicklingError, AttributeError, ValueError) as e:
+            logging.getLogger("ietfdata").warning(f"RFCSearchIndex: cannot load {filepath}: {e}")
+            return None
+
+
+# ==================================================================================================
+
+@dataclass
+class RFCIndexChange:
+    """
+    A change to an RFC between two versions of the RFC index. For status and
+    errata URL changes, `old` and `new` hold the previous and current values.
+    For new updated-by and obsoleted-by links, `new` is the RFC linked to. For
+    new RFCs, `new` is the status of the RFC.
+    """
+    NEW_RFC      = "new-rfc"
+    NOT_ISSUED   = "not-issued"
+    STATUS       = "status"
+    UPDATED_BY   = "updated-by"
+    OBSOLETED_BY = "obsoleted-by"
+    ERRATA_URL   = "errata-url"
+
+    change : str
+    doc_id : DocID
+    old    : Optional[str]
+    new    : Optional[str]
+
+
 # ==================================================================================================
 
 class RFCIndex:
@@ -461,77 +892,291 @@ class RFCIndex:
     _fyi            : Dict[str, FyiEntry]
 
 
-    def _download_index(self) -> Optional[str]:
-        with requests.Session() as session:
-            response = session.get("https://www.rfc-editor.org/rfc-index.xml", verify=True)
-            if response.status_code == 200:
-                return response.text
-            else:
-                return None
-
+    _INDEX_URL = "https://www.rfc-editor.org/rfc-index.xml"
 
     def _is_cached(self, cache_filepath : Path) -> bool:
         if cache_filepath.exists():
             curr_time = datetime.now()
             prev_time = datetime.fromtimestamp(cache_filepath.stat().st_mtime)
-            if curr_time < prev_time + timedelta(days = 1):
+            if curr_time < prev_time + self.max_age:
                 return True
         return False
 
 
-    def _retrieve_index(self) -> Optional[str]:
-        if self.cache_dir is not None:
-            cache_filepath = Path(self.cache_dir, "rfc", "rfc-index.xml")
-            if self._is_cached(cache_filepath):
-                with open(cache_filepath, "r") as cache_file:
-                    return cache_file.read()
+    def _download_index(self, cache_filepath: Path) -> bool:
+        """
+        Download the index to `cache_filepath`, writing it to a temporary file
+        that is renamed once complete, so readers never see a partial index.
+        If there is a cached copy, the request is conditional on the ETag and
+        Last-Modified validators recorded when it was downloaded, and a "304
+        Not Modified" response marks the cached copy as fresh. The validators
+        record the hash of the index they were sent with, and are only used
+        if that matches the cached copy.
+        """
+        validators_filepath = cache_filepath.with_suffix(".validators")
+        headers = {"Accept-Encoding": "gzip, deflate"}
+        if cache_filepath.exists() and validators_filepath.exists():
+            with open(validators_filepath, "r") as inf:
+                validators = json.load(inf)
+            if validators.get("sha256") != self._sha256(cache_filepath):
+                validators = {}
+            if validators.get("etag") is not None:
+                headers["If-None-Match"] = validators["etag"]
+            if validators.get("last_modified") is not None:
+                headers["If-Modified-Since"] = validators["last_modified"]
+
+        with requests.Session() as session:
+            with session.get(self._INDEX_URL, headers=headers, verify=True, stream=True) as response:
+                if response.status_code == 304:
+                    os.utime(cache_filepath)
+                    return True
+                if response.status_code != 200:
+                    return False
+                cache_filepath.parent.mkdir(parents=True, exist_ok=True)
+                temp_filepath = _temp_filepath(cache_filepath)
+                sha256 = hashlib.sha256()
+                with open(temp_filepath, "wb") as cache_file:
+                    for chunk in response.iter_content(chunk_size=65536):
+                        sha256.update(chunk)
+                        cache_file.write(chunk)
+                # Replace the validators before the index. If interrupted between
+                # the two, the validators do not match the hash of the cached
+                # index, and so are not used:
+                temp_validators_filepath = _temp_filepath(validators_filepath)
+                with open(temp_validators_filepath, "w") as outf:
+                    json.dump({"etag"          : response.headers.get("ETag"),
+                               "last_modified" : response.headers.get("Last-Modified"),
+                               "sha256"        : sha256.hexdigest()}, outf)
+                temp_validators_filepath.replace(validators_filepath)
+                temp_filepath.replace(cache_filepath)
+                return True
+
+
+    def _load_index(self, source: Union[Path, IO[bytes]]) -> None:
+        """
+        Parse the index incrementally, constructing each entry as its closing
+        tag is read and then discarding the parsed XML, so the whole document
+        tree is never held in memory.
+        """
+        depth = 0
+        root  = None
+        for event, elem in ET.iterparse(source, events=("start", "end")):
+            if event == "start":
+                if depth == 0:
+                    root = elem
+                depth += 1
+                continue
+            depth -= 1
+            if depth != 1:
+                continue
+            if   elem.tag == "{http://www.rfc-editor.org/rfc-index}rfc-entry":
+                rfc = RfcEntry(elem)
+                self._rfc[rfc.doc_id] = rfc
+            elif elem.tag == "{http://www.rfc-editor.org/rfc-index}rfc-not-issued-entry":
+                rne = RfcNotIssuedEntry(elem)
+                self._rfc_not_issued[rne.doc_id] = rne
+            elif elem.tag == "{http://www.rfc-editor.org/rfc-index}bcp-entry":
+                bcp = BcpEntry(elem)
+                self._bcp[bcp.doc_id] = bcp
+            elif elem.tag == "{http://www.rfc-editor.org/rfc-index}std-entry":
+                std = StdEntry(elem)
+                self._std[std.doc_id] = std
+            elif elem.tag == "{http://www.rfc-editor.org/rfc-index}fyi-entry":
+                fyi = FyiEntry(elem)
+                self._fyi[fyi.doc_id] = fyi
             else:
-                response = self._download_index()
-                if response is not None:
-                    cache_filepath.parent.mkdir(parents=True, exist_ok=True)
-                    with open(cache_filepath, "w") as cache_file:
-                        cache_file.write(response)
-                        return response
-                else:
-                    return None
-        else:
-            return self._download_index()
+                raise NotImplementedError
+            # Detach the entry from the root, so it can be freed. The
+            # <abstract> element of an RfcEntry survives, detached from
+            # the rest of the tree.
+            assert root is not None
+            root.remove(elem)
+
 
+    # The parsed index is stored in a snapshot file alongside the cached XML.
+    # The snapshot records the modification time and SHA-256 hash of the XML
+    # it was parsed from, and is used in place of the XML if either matches.
+    # Increment _SNAPSHOT_VERSION when the entry classes change.
+    _SNAPSHOT_VERSION = 3
 
-    def __init__(self, cache_dir: Optional[Path] = None):
+    def _sha256(self, filepath: Path) -> str:
+        sha256 = hashlib.sha256()
+        with open(filepath, "rb") as inf:
+            for chunk in iter(lambda: inf.read(1024 * 1024), b""):
+                sha256.update(chunk)
+        return sha256.hexdigest()
+
+
+    def _load_snapshot(self, cache_filepath: Optional[Path], snapshot_filepath: Path) -> bool:
+        """
+        Load a snapshot of the index, if it was taken from the current version
+        of `cache_filepath`. If `cache_filepath` is None, the snapshot is loaded
+        whatever version of the index it was taken from. If the snapshot is
+        found to match by its hash, its header is updated with the current
+        modification time, so later loads do not hash the index again.
+        """
+        if not snapshot_filepath.exists():
+            return False
+        try:
+            with open(snapshot_filepath, "rb") as inf:
+                header = pickle.load(inf)
+                if header.get("version") != self._SNAPSHOT_VERSION:
+                    return False
+                mtime = cache_filepath.stat().st_mtime_ns if cache_filepath is not None else None
+                if cache_filepath is not None and header.get("mtime") != mtime and header.get("sha256") != self._sha256(cache_filepath):
+                    return False
+                body = inf.read()
+            self._rfc, self._rfc_not_issued, self._bcp, self._std, self._fyi = pickle.loads(body)
+            self._index_sha256 = header["sha256"]
+        except (OSError, EOFError, pickle.UnpicklingError, AttributeError, ValueError) as e:
+            logging.getLogger("ietfdata").warning(f"RFCIndex: cannot load snapshot {snapshot_filepath}: {e}")
+            return False
+        if mtime is not None and header.get("mtime") != mtime:
+            # Copy the pickled index unchanged, replacing only the header:
+            temp_filepath = _temp_filepath(snapshot_filepath)
+            try:
+                with open(temp_filepath, "wb") as outf:
+                    pickle.dump({**header, "mtime": mtime}, outf, protocol=pickle.HIGHEST_PROTOCOL)
+                    outf.write(body)
+                temp_filepath.replace(snapshot_filepath)
+            except OSError as e:
+                logging.getLogger("ietfdata").warning(f"RFCIndex: cannot update snapshot {snapshot_filepath}: {e}")
+        return True
+
+
+    def _save_snapshot(self, cache_filepath: Path, snapshot_filepath: Path) -> None:
+        index_sha256 = self._sha256(cache_filepath)
+        header = {"version": self._SNAPSHOT_VERSION,
+                  "mtime"  : cache_filepath.stat().st_mtime_ns,
+                  "sha256" : index_sha256}
+        temp_filepath = _temp_filepath(snapshot_filepath)
+        with open(temp_filepath, "wb") as outf:
+            pickle.dump(header, outf, protocol=pickle.HIGHEST_PROTOCOL)
+            pickle.dump((self._rfc, self._rfc_not_issued, self._bcp, self._std, self._fyi), outf, protocol=pickle.HIGHEST_PROTOCOL)
+        temp_filepath.replace(snapshot_filepath)
+        self._index_sha256 = index_sha256
+
+
+    def __init__(self, cache_dir: Optional[Path] = None, max_age: timedelta = timedelta(days = 1)):
         """
         Parameters:
             cache_dir      -- If set, use this directory as a cache for Datatracker objects
+            max_age        -- How long a cached copy of the index is used before
+                              checking with the RFC Editor for a newer version
         """
+        self._clear(cache_dir, max_age)
+
+        if self.cache_dir is not None:
+            cache_filepath = Path(self.cache_dir, "rfc", "rfc-index.xml")
+            snapshot_filepath = Path(self.cache_dir, "rfc", "rfc-index.pickle")
+            if not self._is_cached(cache_filepath) and not self._download_index(cache_filepath):
+                raise RuntimeError
+            if not self._load_snapshot(cache_filepath, snapshot_filepath):
+                self._load_index(cache_filepath)
+                if snapshot_filepath.exists():
+                    # Keep the snapshot of the index being replaced, so previous() can report what changed
+                    snapshot_filepath.replace(Path(self.cache_dir, "rfc", "rfc-index.previous.pickle"))
+                self._save_snapshot(cache_filepath, snapshot_filepath)
+        else:
+            with requests.Session() as session:
+                with session.get(self._INDEX_URL, verify=True, stream=True) as response:
+                    if response.status_code != 200:
+                        raise RuntimeError
+                    response.raw.decode_content = True
+                    self._load_index(cast(IO[bytes], response.raw))
+
+
+    def _clear(self, cache_dir: Optional[Path], max_age: timedelta) -> None:
         self.cache_dir       = cache_dir
+        self.max_age         = max_age
         self._rfc            = {}
         self._rfc_not_issued = {}
         self._bcp            = {}
         self._std            = {}
         self._fyi            = {}
+        self._rfc_list       = None
+        self._graph          = None
+        self._search         = None
+        self._index_sha256   = None
 
-        xml = self._retrieve_index()
-        if xml is None:
-            raise RuntimeError
 
-        for doc in ET.fromstring(xml):
-            if   doc.tag == "{http://www.rfc-editor.org/rfc-index}rfc-entry":
-                rfc = RfcEntry(doc)
-                self._rfc[rfc.doc_id] = rfc
-            elif doc.tag == "{http://www.rfc-editor.org/rfc-index}rfc-not-issued-entry":
-                rne = RfcNotIssuedEntry(doc)
-                self._rfc_not_issued[rne.doc_id] = rne
-            elif doc.tag == "{http://www.rfc-editor.org/rfc-index}bcp-entry":
-                bcp = BcpEntry(doc)
-                self._bcp[bcp.doc_id] = bcp
-            elif doc.tag == "{http://www.rfc-editor.org/rfc-index}std-entry":
-                std = StdEntry(doc)
-                self._std[std.doc_id] = std
-            elif doc.tag == "{http://www.rfc-editor.org/rfc-index}fyi-entry":
-                fyi = FyiEntry(doc)
-                self._fyi[fyi.doc_id] = fyi
-            else:
-                raise NotImplementedError
+    def previous(self) -> Optional["RFCIndex"]:
+        """
+        Return the version of the index that the cached copy replaced when it
+        was last refreshed, or None if not known. Use `changes_since()` to find
+        what changed between the two.
+        """
+        if self.cache_dir is None:
+            return None
+        previous = RFCIndex.__new__(RFCIndex)
+        previous._clear(None, self.max_age)
+        if not previous._load_snapshot(None, Path(self.cache_dir, "rfc", "rfc-index.previous.pickle")):
+            return None
+        return previous
+
+
+    def changes_since(self, previous: "RFCIndex") -> List[RFCIndexChange]:
+        """
+        Compare this index with an earlier version, returning the changes in
+        the order of the RFCs they affect. The comparison looks up each entry
+        of this index in the earlier version, so takes time proportional to
+        the size of the index.
+        """
+        changes = []
+        for doc_id, rfc in self._rfc.items():
+            prev = previous._rfc.get(doc_id)
+            if prev is None:
+                changes.append(RFCIndexChange(RFCIndexChange.NEW_RFC, rfc.doc_id, None, rfc.curr_status))
+                continue
+            if rfc.curr_status != prev.curr_status:
+                changes.append(RFCIndexChange(RFCIndexChange.STATUS, rfc.doc_id, prev.curr_status, rfc.curr_status))
+            for updated_by in rfc.updated_by:
+                if updated_by not in prev.updated_by:
+                    changes.append(RFCIndexChange(RFCIndexChange.UPDATED_BY, rfc.doc_id, None, updated_by))
+            for obsoleted_by in rfc.obsoleted_by:
+                if obsoleted_by not in prev.obsoleted_by:
+                    changes.append(RFCIndexChange(RFCIndexChange.OBSOLETED_BY, rfc.doc_id, None, obsoleted_by))
+            if rfc.errata_url != prev.errata_url:
+                changes.append(RFCIndexChange(RFCIndexChange.ERRATA_URL, rfc.doc_id, prev.errata_url, rfc.errata_url))
+        for doc_id, not_issued in self._rfc_not_issued.items():
+            if doc_id not in previous._rfc_not_issued:
+                changes.append(RFCIndexChange(RFCIndexChange.NOT_ISSUED, not_issued.doc_id, None, None))
+        return changes
+
+
+    def graph(self) -> RFCGraph:
+        """
+        Return the graph of relationships between RFCs, built on first use.
+        """
+        if self._graph is None:
+            self._graph = RFCGraph(iter(self._rfc.values()))
+        return self._graph
+
+
+    def search_index(self) -> RFCSearchIndex:
+        """
+        Return a full-text search index of the RFCs, built on first use. If
+        there is a cache directory, the search index is saved there, and is
+        reused while the cached rfc-index.xml is unchanged.
+        """
+        if self._search is not None:
+            return self._search
+        search_filepath = Path(self.cache_dir, "rfc", "rfc-search.pickle") if self.cache_dir is not None else None
+        if search_filepath is not None and self._index_sha256 is not None:
+            self._search = RFCSearchIndex.load(search_filepath, self._index_sha256)
+        if self._search is None:
+            self._search = RFCSearchIndex(iter(self._rfc.values()))
+            if search_filepath is not None and self._index_sha256 is not None:
+                self._search.save(search_filepath, self._index_sha256)
+        return self._search
+
+
+    def search(self, query: str, limit: int = 10) -> List[Tuple[RfcEntry, float]]:
+        """
+        Search the titles, keywords, and abstracts of the RFCs. See
+        `RFCSearchIndex.search()` for the query syntax.
+        """
+        return [(self._rfc[doc_id], score) for doc_id, score in self.search_index().search(query, limit)]
 
 
     def rfc(self, rfc_id: str) -> Optional[RfcEntry]:
@@ -554,28 +1199,290 @@ class RFCIndex:
         return self._std[std_id]
 
 
+    # Secondary indexes used by rfcs(), built on first use. The RFCs are
+    # numbered by their position in _rfc_list. The _by_* dictionaries map
+    # each value of a field to the ascending positions of the RFCs with that
+    # value. The _date_keys array holds the publication date of each RFC,
+    # as year * 12 * 32 + (month - 1) * 32 + day, in ascending order, and the
+    # _date_order array holds the position of the RFC with that date.
+    _graph        : Optional[RFCGraph]
+    _search       : Optional[RFCSearchIndex]
+    _index_sha256 : Optional[str]             # The hash of the cached XML the index was loaded from
+    _rfc_list   : Optional[List[RfcEntry]]
+    _by_stream  : Dict[str, List[int]]
+    _by_area    : Dict[str, List[int]]
+    _by_wg      : Dict[str, List[int]]
+    _by_status  : Dict[str, List[int]]
+    _by_author  : Dict[str, List[int]]
+    _date_keys  : array
+    _date_order : array
+
+    def _date_key(self, year: int, month: int, day: int) -> int:
+        return (year * 12 + month - 1) * 32 + day
+
+
+    def _build_indexes(self) -> None:
+        rfc_list  = list(self._rfc.values())
+        self._by_stream = {}
+        self._by_area   = {}
+        self._by_wg     = {}
+        self._by_status = {}
+        self._by_author = {}
+        date_keys = []
+        for pos, rfc in enumerate(rfc_list):
+            self._by_stream.setdefault(rfc.stream, []).append(pos)
+            self._by_status.setdefault(rfc.curr_status, []).append(pos)
+            if rfc.area is not None:
+                self._by_area.setdefault(rfc.area, []).append(pos)
+            if rfc.wg is not None:
+                self._by_wg.setdefault(rfc.wg, []).append(pos)
+            for author in set(rfc.authors):
+                self._by_author.setdefault(author, []).append(pos)
+            day = rfc.day if rfc.day is not None else 1
+            date_keys.append((self._date_key(rfc.year, _MONTHS.index(rfc.month) + 1, day), pos))
+        date_keys.sort()
+        self._date_keys  = array("i", [key for key, pos in date_keys])
+        self._date_order = array("i", [pos for key, pos in date_keys])
+        self._rfc_list   = rfc_list
+
+
     def rfcs(self,
             since:  str = "1969-01",  # The first RFCs were published in 1969
             until:  str = "2038-01",
             stream: Optional[str] = None,
             area:   Optional[str] = None,
             wg:     Optional[str] = None,
-            status: Optional[str] = None) -> Iterator[RfcEntry]:
-        for rfc_id in self._rfc:
-            rfc = self._rfc[rfc_id]
-            if stream is not None and rfc.stream != stream:
-                continue
-            if area   is not None and rfc.area   != area:
-                continue
-            if wg     is not None and rfc.wg     != wg:
-                continue
-            if status is not None and rfc.curr_status != status:
-                continue
-            if rfc.date() < datetime.strptime(since, "%Y-%m"):
-                continue
-            if rfc.date() > datetime.strptime(until, "%Y-%m"):
-                continue
-            yield(rfc)
+            status: Optional[str] = None,
+            author: Optional[str] = None) -> Iterator[RfcEntry]:
+        """
+        Find RFCs published between `since` and `until` inclusive, given as
+        "YYYY-MM", that match all the other parameters given. The `author` is
+        matched against the author names as they appear in the index (e.g.,
+        "C. Perkins"). RFCs are returned in the order listed in the index.
+        """
+        if self._rfc_list is None:
+            self._build_indexes()
+        assert self._rfc_list is not None
+
+        since_year, since_month = since.split("-")
+        until_year, until_month = until.split("-")
+        lo = bisect_left (self._date_keys, self._date_key(int(since_year), int(since_month), 1))
+        hi = bisect_right(self._date_keys, self._date_key(int(until_year), int(until_month), 1))
+
+        # Intersect the matching positions, starting with the smallest set:
+        candidates : List[Sequence[int]] = []
+        for index, value in [(self._by_stream, stream), (self._by_area, area), (self._by_wg, wg),
+                             (self._by_status, status), (self._by_author, author)]:
+            if value is not None:
+                candidates.append(index.get(value, []))
+        if hi - lo < len(self._rfc_list):
+            candidates.append(self._date_order[lo:hi])
+        if len(candidates) == 0:
+            yield from self._rfc_list
+            return
+        candidates.sort(key = len)
+        positions = set(candidates[0])
+        for other in candidates[1:]:
+            positions.intersection_update(other)
+            if len(positions) == 0:
+                return
+        for pos in sorted(positions):
+            yield self._rfc_list[pos]
+
+
+# ==================================================================================================
+
+@dataclass
+class RFCContentUpdate:
+    fetched   : List[Tuple[DocID, str]] = field(default_factory=list)  # Downloaded, because new or changed
+    unchanged : List[Tuple[DocID, str]] = field(default_factory=list)  # Already in the store
+    failed    : List[Tuple[DocID, str]] = field(default_factory=list)
+
+
+class RFCContentStore:
+    """
+    A local store of the content of RFCs, as published by the RFC Editor.
+
+    Each downloaded file is saved under `cache_dir/rfc/content/objects/`,
+    named by the SHA-256 hash of its content. A manifest records which
+    file holds each format of each RFC, along with the ETag and Last-Modified
+    validators sent when it was downloaded. Several processes can share a
+    store: each merges its changes into the manifest on disk when it saves.
+
+    The content of an RFC rarely changes once published, so `update()` does
+    not check RFCs that are already in the store by default. An RFC that
+    has changed upstream, for example when the RFC Editor regenerates its
+    HTML rendering, is only fetched again by `update(revalidate=True)`.
+    """
+    _CONTENT_URL = "https://www.rfc-editor.org/rfc/"
+
+    def __init__(self, cache_dir: Path, max_workers: int = 8, rate: float = 10.0) -> None:
+        """
+        Parameters:
+            cache_dir   -- The directory in which to store the content
+            max_workers -- The number of downloads to run in parallel
+            rate        -- The maximum number of requests per second
+        """
+        self._store_dir   = Path(cache_dir, "rfc", "content")
+        self._max_workers = max_workers
+        self._interval    = 1.0 / rate if rate > 0 else 0.0
+        self._next_start  = time.monotonic()
+        self._lock        = threading.Lock()
+        self._local       = threading.local()
+        self._log         = logging.getLogger("ietfdata")
+        self._manifest    = {} # type: Dict[str, Dict[str, Dict[str, Optional[str]]]]
+        manifest_filepath = Path(self._store_dir, "manifest.json")
+        if manifest_filepath.exists():
+            with open(manifest_filepath, "r") as inf:
+                self._manifest = json.load(inf)
+
+
+    def _object_filepath(self, sha256: str) -> Path:
+        return Path(self._store_dir, "objects", sha256[:2], sha256)
+
+
+    def _save_manifest(self, changes: Dict[str, Dict[str, Dict[str, Optional[str]]]]) -> None:
+        # Merge the changes into the manifest on disk, which another process
+        # sharing the store may have updated since it was loaded:
+        manifest_filepath = Path(self._store_dir, "manifest.json")
+        if manifest_filepath.exists():
+            with open(manifest_filepath, "r") as inf:
+                self._manifest = json.load(inf)
+        for doc_id, entries in changes.items():
+            self._manifest.setdefault(doc_id, {}).update(entries)
+        self._store_dir.mkdir(parents=True, exist_ok=True)
+        temp_filepath = _temp_filepath(manifest_filepath)
+        with open(temp_filepath, "w") as outf:
+            json.dump(self._manifest, outf)
+        temp_filepath.replace(manifest_filepath)
+
+
+    def _session(self) -> requests.Session:
+        # Each thread has its own session, since sessions are not thread safe.
+        # The session keeps its connection to the server open between requests.
+        if not hasattr(self._local, "session"):
+            self._local.session = requests.Session()
+        session = self._local.session # type: requests.Session
+        return session
+
+
+    def _wait_for_rate_limit(self) -> None:
+        with self._lock:
+            now   = time.monotonic()
+            start = max(now, self._next_start)
+            self._next_start = start + self._interval
+        if start > now:
+            time.sleep(start - now)
+
+
+    def _download(self, url: str, entry: Optional[Dict[str, Optional[str]]]) -> Optional[Dict[str, Optional[str]]]:
+        """
+        Download `url` into the store, returning its new manifest entry. If it
+        is already in the store, the request is conditional, and the existing
+        manifest entry is returned if it has not changed.
+        """
+        headers = {"Accept-Encoding": "gzip, deflate"}
+        if entry is not None:
+            if entry.get("etag") is not None:
+                headers["If-None-Match"] = cast(str, entry["etag"])
+            if entry.get("last_modified") is not None:
+                headers["If-Modified-Since"] = cast(str, entry["last_modified"])
+        self._wait_for_rate_limit()
+        with self._session().get(url, headers=headers, verify=True, stream=True) as response:
+            if response.status_code == 304 and entry is not None:
+                return entry
+            if response.status_code != 200:
+                self._log.warning(f"RFCContentStore: cannot fetch {url}: {response.status_code}")
+                return None
+            objects_dir = Path(self._store_dir, "objects")
+            objects_dir.mkdir(parents=True, exist_ok=True)
+            temp_filepath = _temp_filepath(Path(objects_dir, "download"))
+            digest = hashlib.sha256()
+            with open(temp_filepath, "wb") as outf:
+                for chunk in response.iter_content(chunk_size=65536):
+                    digest.update(chunk)
+                    outf.write(chunk)
+            sha256 = digest.hexdigest()
+            object_filepath = self._object_filepath(sha256)
+            object_filepath.parent.mkdir(exist_ok=True)
+            temp_filepath.replace(object_filepath)
+            return {"sha256"        : sha256,
+                    "etag"          : response.headers.get("ETag"),
+                    "last_modified" : response.headers.get("Last-Modified")}
+
+
+    def update(self, rfcs: Iterable[RfcEntry], formats: Sequence[str] = ("ASCII",), revalidate: bool = False) -> RFCContentUpdate:
+        """
+        Download the given formats of the RFCs into the store, in parallel.
+        Formats that an RFC is not published in are skipped.
+
+        RFCs already in the store are not fetched again, unless `revalidate`
+        is set, in which case a conditional request is made for each, and
+        only those that have changed are downloaded.
+        """
+        result  = RFCContentUpdate()
+        changes = {} # type: Dict[str, Dict[str, Dict[str, Optional[str]]]]
+        with concurrent.futures.ThreadPoolExecutor(max_workers = self._max_workers) as executor:
+            futures = {}
+            for rfc in rfcs:
+                for fmt in formats:
+                    content_url = rfc.content_url(fmt)
+                    if content_url is None:
+                        continue
+                    entry = self._manifest.get(rfc.doc_id, {}).get(fmt)
+                    if entry is not None and self._object_filepath(cast(str, entry["sha256"])).exists():
+                        if not revalidate:
+                            result.unchanged.append((rfc.doc_id, fmt))
+                            continue
+                    else:
+                        entry = None
+                    url = self._CONTENT_URL + content_url.rsplit("/", 1)[1]
+                    futures[executor.submit(self._download, url, entry)] = (rfc.doc_id, fmt, entry)
+            try:
+                for future in concurrent.futures.as_completed(futures):
+                    doc_id, fmt, entry = futures[future]
+                    try:
+                        new_entry = future.result()
+                    except requests.RequestException as e:
+                        self._log.warning(f"RFCContentStore: cannot fetch {doc_id} ({fmt}): {e}")
+                        new_entry = None
+                    if new_entry is None:
+                        result.failed.append((doc_id, fmt))
+                    elif new_entry is entry:
+                        result.unchanged.append((doc_id, fmt))
+                    else:
+                        self._manifest.setdefault(doc_id, {})[fmt] = new_entry
+                        changes.setdefault(doc_id, {})[fmt] = new_entry
+                        result.fetched.append((doc_id, fmt))
+            finally:
+                self._save_manifest(changes)
+        return result
+
+
+    def content(self, rfc: RfcEntry, fmt: str = "ASCII") -> Optional[bytes]:
+        """
+        Return the stored content of an RFC in the given format, or None if
+        it has not been downloaded.
+        """
+        entry = self._manifest.get(rfc.doc_id, {}).get(fmt)
+        if entry is None:
+            return None
+        object_filepath = self._object_filepath(cast(str, entry["sha256"]))
+        if not object_filepath.exists():
+            return None
+        with open(object_filepath, "rb") as inf:
+            return inf.read()
+
+
+    def text(self, rfc: RfcEntry, fmt: str = "ASCII") -> Optional[str]:
+        """
+        Return the stored content of an RFC in one of the text formats
+        (ASCII, HTML, or XML), decoded using the character set of the RFC.
+        """
+        content = self.content(rfc, fmt)
+        if content is None:
+            return None
+        return content.decode(rfc.charset())
 
 
 # ==================================================================================================
@@ -0,0 +1,78 @@
+# Copyright (C) 2024 University of Glasgow
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions
+# are met:
+#
+# 1. Redistributions of source code must retain the above copyright notice,
+#    this list of conditions and the following disclaimer.
+#
+# 2. Redistributions in binary form must reproduce the above copyright
+#    notice, this list of conditions and the following disclaimer in the
+#    documentation and/or other materials provided with the distribution.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+# ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE
+# LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR
+# CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF
+# SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS
+# INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN
+# CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)
+# ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+# POSSIBILITY OF SUCH DAMAGE.
+
+# Manage the MongoDB cache of Datatracker responses. The cache is located
+# using the IETFDATA_CACHE_* environment variables. Usage:
+#
+#   python3 -m ietfdata.tools.cache report          - show cache size by endpoint
+#   python3 -m ietfdata.tools.cache compact         - remove expired and duplicate responses
+#   python3 -m ietfdata.tools.cache evict [size]    - evict responses until smaller than size
+
+import sys
+
+from ietfdata.datatracker       import *
+from ietfdata.datatracker_cache import parse_size
+
+
+def usage() -> None:
+    print("Usage: python3 -m ietfdata.tools.cache report")
+    print("   or: python3 -m ietfdata.tools.cache compact")
+    print("   or: python3 -m ietfdata.tools.cache evict [size]")
+    sys.exit(1)
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2 or sys.argv[1] not in ["report", "compact", "evict"]:
+        usage()
+
+    dt = DataTracker(use_cache = True)
+    assert dt.cache is not None
+
+    if sys.argv[1] == "report" and len(sys.argv) == 2:
+        total_entries = 0
+        total_size    = 0
+        print(f"{'Endpoint':50} {'Entries':>10} {'Size (MB)':>12}")
+        for u in dt.cache.usage():
+            print(f"{u.endpoint:50} {u.entries:10} {u.size / 1024**2:12.1f}")
+            total_entries += u.entries
+            total_size    += u.size
+        print(f"{'Total':50} {total_entries:10} {total_size / 1024**2:12.1f}")
+    elif sys.argv[1] == "compact" and len(sys.argv) == 2:
+        result = dt.cache.compact()
+        print(f"Removed {result.expired} expired responses")
+        print(f"Removed {result.duplicates} duplicate responses")
+        print(f"Removed {result.redirects} stale redirects")
+    elif sys.argv[1] == "evict" and len(sys.argv) in [2, 3]:
+        max_size = parse_size(sys.argv[2]) if len(sys.argv) == 3 else dt.cache.max_size
+        if max_size is None:
+            print("ERROR: no size given and IETFDATA_CACHE_MAX_SIZE not set")
+            sys.exit(2)
+        evicted = dt.cache.evict(max_size)
+        print(f"Evicted {evicted} responses")
+    else:
+        usage()
+
+# =================================================================================================================================
+# vim: set tw=0 ai:
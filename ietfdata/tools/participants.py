@@ -264,13 +264,14 @@ if __name__ == "__main__":
     # Add identifiers based on the IETF DataTracker:
     seen_addr = set()
     dt  = DataTrackerExt(cache_timeout = timedelta(hours=12))
+    dt_people = dt.person_index()
     for msg in dt.emails():
         if msg.address in ignore:
             continue
         pdb.person_with_identifier("email", msg.address)
         pdb.identifies_same_person("email", msg.address, "dt_person_uri", str(msg.person))
         seen_addr.add(msg.address)
-        # We don't need to add names here. The call to dt.person_by_name_email()
+        # We don't need to add names here. The call to dt_people.person_from_name_email()
         # below handles name matching.
 
 
@@ -318,7 +319,7 @@ if __name__ == "__main__":
                     continue
                 if email_full not in seen_full:
                     pdb.person_with_identifier("email", email_addr)
-                    person = dt.person_from_name_email(email_name, email_addr)
+                    person = dt_people.person_from_name_email(email_name, email_addr)
                     if person is not None and envelope.header("X-Spam-Flag") != "YES":
                         pdb.identifies_same_person("email", email_addr, "dt_person_uri", str(person.resource_uri))
                     seen_full.add(email_full)
@@ -0,0 +1,278 @@
+# Copyright (C) 2024 University of Glasgow
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions
+# are met:
+#
+# 1. Redistributions of source code must retain the above copyright notice,
+#    this list of conditions and the following disclaimer.
+#
+# 2. Redistributions in binary form must reproduce the above copyright
+#    notice, this list of conditions and the following disclaimer in the
+#    documentation and/or other materials provided with the distribution.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+# ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE
+# LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR
+# CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF
+# SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS
+# INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN
+# CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)
+# ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+# POSSIBILITY OF SUCH DAMAGE.
+
+# Populate the MongoDB cache of Datatracker responses by running a set of
+# queries in parallel. The cache is located using the IETFDATA_CACHE_*
+# environment variables. Usage:
+#
+#   python3 -m ietfdata.tools.warm [--jobs N] [--rate R] [--state FILE] [queries.json]
+#
+# The queries are given as a JSON list, where each entry names either a
+# DataTracker method to call, or a pattern matching API endpoints to fetch
+# in full. For example:
+#
+#   [
+#     {"endpoint": "/api/v1/name/*"},
+#     {"method": "groups"},
+#     {"method": "group_roles"},
+#     {"method": "documents", "kwargs": {"doctype": {"method": "document_type_from_slug", "args": ["draft"]}}},
+#     {"method": "document_events", "kwargs": {"since": "$last_run"}}
+#   ]
+#
+# Arguments given as {"method": ..., "args": [...]} are replaced by the
+# result of calling that method. The value "$last_run" is replaced by the
+# time the previous successful run started, as recorded in the state file;
+# on the first run, arguments with that value are omitted. If no query file
+# is given, DEFAULT_QUERIES is used.
+#
+# At most N queries run at once (default 4), and no more than R requests
+# per second (default 10) are sent to the Datatracker; responses served
+# from the cache are not rate limited. The state file also lists the
+# queries that failed, if any, in which case the time of the last run is
+# not updated.
+
+import argparse
+import fnmatch
+import json
+import logging
+import os
+import sys
+import threading
+import time
+
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses        import dataclass, field
+from datetime           import datetime, timezone
+from typing             import Any, Dict, List, Optional, Tuple
+
+from ietfdata.datatracker     import *
+from ietfdata.datatracker_ext import *
+
+
+DEFAULT_QUERIES = [
+    {"endpoint": "/api/v1/name/*"},
+    {"method": "groups"},
+    {"method": "group_roles"},
+    {"method": "documents", "kwargs": {"doctype": {"method": "document_type_from_slug", "args": ["draft"]}}},
+    {"method": "document_events", "kwargs": {"since": "$last_run"}},
+] # type: List[Dict[str, Any]]
+
+
+@dataclass
+class WarmQuery:
+    method   : Optional[str]  = None
+    endpoint : Optional[str]  = None
+    args     : List[Any]      = field(default_factory=list)
+    kwargs   : Dict[str, Any] = field(default_factory=dict)
+
+    def __str__(self) -> str:
+        if self.endpoint is not None:
+            return self.endpoint
+        args = [json.dumps(a) for a in self.args] + [f"{k}={json.dumps(v)}" for k, v in self.kwargs.items()]
+        return f"{self.method}({', '.join(args)})"
+
+
+def parse_queries(queries: List[Dict[str, Any]]) -> List[WarmQuery]:
+    result = []
+    for q in queries:
+        if ("method" in q) == ("endpoint" in q):
+            raise ValueError(f"Query must have exactly one of method or endpoint: {q}")
+        if "method" in q and not hasattr(DataTrackerExt, q["method"]):
+            raise ValueError(f"Unknown DataTracker method: {q['method']}")
+        result.append(WarmQuery(q.get("method"), q.get("endpoint"), q.get("args", []), q.get("kwargs", {})))
+    return result
+
+
+class TokenBucket:
+    """
+    A token bucket rate limiter, shared between threads.
+    """
+    def __init__(self, rate: float, burst: int) -> None:
+        self.rate   = rate
+        self.burst  = burst
+        self.tokens = float(burst)
+        self.last   = time.monotonic()
+        self.lock   = threading.Lock()
+
+
+    def take(self) -> None:
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.burst, self.tokens + (now - self.last) * self.rate)
+                self.last   = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+
+class RateLimitedAdapter(requests.adapters.HTTPAdapter):
+    """
+    A transport adapter that waits for a token before each request. The
+    cached session only uses its adapter for requests that the cache cannot
+    answer, so responses served from the cache are not rate limited.
+    """
+    def __init__(self, bucket: TokenBucket) -> None:
+        super().__init__()
+        self.bucket = bucket
+
+
+    def send(self, request: requests.PreparedRequest, *args: Any, **kwargs: Any) -> requests.Response:
+        self.bucket.take()
+        return super().send(request, *args, **kwargs)
+
+
+class WarmDataTracker(DataTrackerExt):
+    """
+    A DataTrackerExt that rate limits requests that are not answered from
+    the cache.
+    """
+    def set_rate_limit(self, bucket: TokenBucket) -> None:
+        adapter = RateLimitedAdapter(bucket)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://",  adapter)
+
+
+class Warmer:
+    def __init__(self, bucket: TokenBucket, last_run: Optional[str]) -> None:
+        self.log      = logging.getLogger("ietfdata")
+        self.bucket   = bucket
+        self.last_run = last_run
+        self.local    = threading.local()
+
+
+    def datatracker(self) -> WarmDataTracker:
+        # Each thread has its own DataTracker, since sessions are not thread safe
+        if not hasattr(self.local, "dt"):
+            self.local.dt = WarmDataTracker(use_cache = True)
+            self.local.dt.set_rate_limit(self.bucket)
+        dt = self.local.dt # type: WarmDataTracker
+        return dt
+
+
+    def resolve(self, dt: WarmDataTracker, value: Any) -> Any:
+        if isinstance(value, dict) and "method" in value:
+            return getattr(dt, value["method"])(*[self.resolve(dt, a) for a in value.get("args", [])])
+        return value
+
+
+    def run(self, query: WarmQuery) -> Tuple[int, float]:
+        """
+        Run a query, returning the number of objects retrieved and the time taken.
+        """
+        start = time.monotonic()
+        dt    = self.datatracker()
+        count = 0
+        if query.endpoint is not None:
+            for endpoint, hint in sorted(dt._hints.items()):
+                if fnmatch.fnmatch(endpoint, query.endpoint):
+                    for obj in dt._retrieve_multi(URI(uri=endpoint, params=dict(query.kwargs)), hint.obj_type):
+                        count += 1
+        else:
+            assert query.method is not None
+            args   = [self.resolve(dt, a) for a in query.args]
+            kwargs = {k: self.resolve(dt, v) for k, v in query.kwargs.items() if not (v == "$last_run" and self.last_run is None)}
+            kwargs = {k: self.last_run if v == "$last_run" else v for k, v in kwargs.items()}
+            result = getattr(dt, query.method)(*args, **kwargs)
+            if result is None or isinstance(result, Resource):
+                count = 0 if result is None else 1
+            else:
+                for obj in result:
+                    count += 1
+                    if count % 10000 == 0:
+                        self.log.info(f"warm: {query}: {count} objects")
+        return count, time.monotonic() - start
+
+
+def warm(warmer: Warmer, queries: List[WarmQuery], jobs: int) -> List[WarmQuery]:
+    """
+    Run the queries, at most `jobs` at once, returning those that failed.
+    """
+    log    = logging.getLogger("ietfdata")
+    failed = [] # type: List[WarmQuery]
+    with ThreadPoolExecutor(max_workers=jobs) as executor:
+        futures = {executor.submit(warmer.run, q): q for q in queries}
+        for done, future in enumerate(as_completed(futures), start=1):
+            query = futures[future]
+            try:
+                count, elapsed = future.result()
+                log.info(f"warm: [{done}/{len(queries)}] {query}: {count} objects in {elapsed:.1f}s")
+            except (Exception, SystemExit) as e:
+                # The DataTracker calls sys.exit() when it gives up retrying
+                # a request, which must not abort the other queries.
+                log.error(f"warm: [{done}/{len(queries)}] {query}: failed: {e!r}")
+                failed.append(query)
+    return failed
+
+
+def load_state(path: str) -> Dict[str, Any]:
+    if os.path.exists(path):
+        with open(path, "r") as inf:
+            state = json.load(inf) # type: Dict[str, Any]
+            return state
+    return {}
+
+
+def save_state(path: str, state: Dict[str, Any]) -> None:
+    with open(path + ".tmp", "w") as outf:
+        json.dump(state, outf, indent=2)
+    os.replace(path + ".tmp", path)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(prog="python3 -m ietfdata.tools.warm", description="Populate the Datatracker cache")
+    parser.add_argument("--jobs",  type=int,   default=4,   help="number of queries to run in parallel")
+    parser.add_argument("--rate",  type=float, default=10,  help="maximum number of requests per second")
+    parser.add_argument("--state", type=str,   default="ietfdata_warm_state.json", help="file recording the time of the last run")
+    parser.add_argument("queries", type=str,   nargs="?",   help="JSON file listing the queries to run")
+    opts = parser.parse_args()
+
+    if opts.queries is not None:
+        with open(opts.queries, "r") as inf:
+            queries = parse_queries(json.load(inf))
+    else:
+        queries = parse_queries(DEFAULT_QUERIES)
+
+    log      = logging.getLogger("ietfdata")
+    state    = load_state(opts.state)
+    started  = datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%S")
+    warmer   = Warmer(TokenBucket(opts.rate, max(1, int(opts.rate))), state.get("last_run"))
+    run_time = time.monotonic()
+    failed   = warm(warmer, queries, opts.jobs)
+
+    # The time of the last run only advances when all queries succeed, so
+    # that failed queries fetch everything since the last successful run:
+    log.info(f"warm: completed {len(queries) - len(failed)} of {len(queries)} queries in {time.monotonic() - run_time:.1f}s")
+    state["failed"] = [str(q) for q in failed]
+    if len(failed) == 0:
+        state["last_run"] = started
+    save_state(opts.state, state)
+    if len(failed) > 0:
+        sys.exit(1)
+
+# =================================================================================================================================
+# vim: set tw=0 ai:
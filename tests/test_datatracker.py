@@ -87,6 +87,37 @@ class TestDatatracker(unittest.TestCase):
         self.assertEqual(count, 8)
 
 
+    def test_records(self) -> None:
+        p = self.dt.person_from_email("csp@csperkins.org")
+        if p is not None:
+            es = list(self.dt.records(self.dt.email_for_person, p))
+            self.assertEqual(len(es), 5)
+            self.assertEqual(es[0]["address"], "c.perkins@cs.ucl.ac.uk")
+            self.assertEqual(es[0]["person"],  "/api/v1/person/person/20209/")
+            rs = list(self.dt.records(self.dt.email_for_person, p, fields=["address", "person"]))
+            self.assertEqual(len(rs), 5)
+            self.assertEqual(rs[4].address, "csp@isi.edu")
+            self.assertEqual(rs[4].person,  "/api/v1/person/person/20209/")
+            with self.assertRaises(ValueError):
+                list(self.dt.records(self.dt.email_for_person, p, fields=["nonexistent"]))
+        else:
+            self.fail("Cannot find person")
+
+
+    def test_to_dataframe(self) -> None:
+        p = self.dt.person_from_email("csp@csperkins.org")
+        if p is not None:
+            df = self.dt.to_dataframe(self.dt.email_for_person, p, fields=["address", "person", "time", "primary"])
+            self.assertEqual(list(df.columns), ["address", "person", "time", "primary"])
+            self.assertEqual(len(df), 5)
+            self.assertEqual(df["address"][0],    "c.perkins@cs.ucl.ac.uk")
+            self.assertEqual(df["person"][0],     "/api/v1/person/person/20209/")
+            self.assertEqual(df["person"].dtype,  "category")
+            self.assertEqual(str(df["time"].dt.tz), "UTC")
+        else:
+            self.fail("Cannot find person")
+
+
     # -----------------------------------------------------------------------------------------------------------------------------
     # Tests relating to email addresses:
 
@@ -1792,6 +1823,30 @@ class TestDatatracker(unittest.TestCase):
         self.assertEqual(group_roles[2].id, 3038)   # Chair is Mirja Kühlewind
 
 
+    def test_group_roles_expand(self) -> None:
+        group_roles = list(self.dt.group_roles(group=self.dt.group(GroupURI(uri="/api/v1/group/group/1997/")), expand=["person", "name"])) # SPUD BoF
+        self.assertEqual(len(group_roles), 3)
+        self.assertEqual(group_roles[0].expanded("person").name, "Spencer Dawkins")
+        self.assertEqual(group_roles[0].expanded("name").slug,   "ad")
+        self.assertEqual(group_roles[1].expanded("person").name, "Eliot Lear")
+        self.assertEqual(group_roles[1].expanded("name").slug,   "chair")
+        with self.assertRaises(KeyError):
+            group_roles[0].expanded("email")
+
+
+    def test_group_roles_batching(self) -> None:
+        group = self.dt.group(GroupURI(uri="/api/v1/group/group/1997/")) # SPUD BoF
+        assert group is not None
+        with self.dt.batching():
+            group_roles = list(self.dt.group_roles(group=group))
+            people      = [self.dt.person(role.person) for role in group_roles]
+            self.assertEqual(len(people), 3)
+            self.assertEqual(people[0].name, "Spencer Dawkins") # type: ignore
+            self.assertEqual(people[1].name, "Eliot Lear")      # type: ignore
+            self.assertIs(self.dt.person(group_roles[0].person), people[0])
+        self.assertIsNone(self.dt._batch)
+
+
     def test_group_roles_group_name(self) -> None:
         iab   = self.dt.group_from_acronym("iab")
         chair = self.dt.role_name_from_slug("chair")
@@ -0,0 +1,240 @@
+# Copyright (C) 2024 University of Glasgow
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions
+# are met:
+#
+# 1. Redistributions of source code must retain the above copyright notice,
+#    this list of conditions and the following disclaimer.
+#
+# 2. Redistributions in binary form must reproduce the above copyright
+#    notice, this list of conditions and the following disclaimer in the
+#    documentation and/or other materials provided with the distribution.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT thirdpartyS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+# ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE
+# LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR
+# CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF
+# SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS
+# INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN
+# CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)
+# ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+# POSSIBILITY OF SUCH DAMAGE.
+
+import unittest
+import os
+import sys
+
+import pymongo
+
+from datetime import datetime, timedelta, timezone
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from ietfdata.datatracker       import DataTracker, DataTrackerOfflineError, URI
+from ietfdata.datatracker_cache import *
+
+# =================================================================================================================================
+# Unit tests:
+
+class TestDatatrackerCacheHelpers(unittest.TestCase):
+    def test_parse_size(self) -> None:
+        self.assertEqual(parse_size("1024"), 1024)
+        self.assertEqual(parse_size("500M"), 500 * 1024**2)
+        self.assertEqual(parse_size("20g"),  20 * 1024**3)
+        self.assertEqual(parse_size("2KB"),  2048)
+        with self.assertRaises(ValueError):
+            parse_size("lots")
+
+
+    def test_endpoint_for_url(self) -> None:
+        self.assertEqual(endpoint_for_url("https://datatracker.ietf.org/api/v1/doc/document/?limit=100"), "/api/v1/doc/document/")
+        self.assertEqual(endpoint_for_url("https://datatracker.ietf.org/api/v1/doc/document/rfc3550/"),   "/api/v1/doc/document/")
+        self.assertEqual(endpoint_for_url("https://datatracker.ietf.org/api/v1/person/email/csp@csperkins.org/"), "/api/v1/person/email/")
+
+
+    def test_query_subsumes(self) -> None:
+        wide = {"time__gte": "1970-01-01T00:00:00", "time__lt": "2038-01-19T03:14:07"}
+        self.assertTrue(query_subsumes(wide,  {**wide, "type": "draft", "group": 2161}))
+        self.assertTrue(query_subsumes(wide,  {"time__gte": "2020-01-01T00:00:00", "time__lt": "2021-01-01T00:00:00"}))
+        self.assertTrue(query_subsumes({"type": "draft"}, {"type": "draft", "stream": "ietf"}))
+        self.assertFalse(query_subsumes(wide, {"time__gte": "1960-01-01T00:00:00", "time__lt": "2021-01-01T00:00:00"}))
+        self.assertFalse(query_subsumes(wide, {"type": "draft"}))
+        self.assertFalse(query_subsumes({"type": "draft"}, {"type": "rfc"}))
+        self.assertFalse(query_subsumes({"time__gt": "2020-01-01T00:00:00"}, {"time__gte": "2020-01-01T00:00:00"}))
+        self.assertTrue(query_subsumes({"time__gte": "2020-01-01T00:00:00"}, {"time__gt": "2020-01-01T00:00:00"}))
+
+
+    def test_filter_matches(self) -> None:
+        doc = {"name"   : "draft-ietf-quic-transport",
+               "time"   : "2021-05-27T14:01:09Z",
+               "type"   : "/api/v1/name/doctypename/draft/",
+               "group"  : "/api/v1/group/group/2161/",
+               "states" : ["/api/v1/doc/state/3/", "/api/v1/doc/state/7/"],
+               "stream" : None}
+        self.assertTrue(filter_matches(doc,  {"type": "draft", "group": 2161}))
+        self.assertTrue(filter_matches(doc,  {"states": 7, "name__contains": "quic"}))
+        self.assertTrue(filter_matches(doc,  {"time__gte": "2021-01-01T00:00:00", "time__lt": "2022-01-01T00:00:00"}))
+        self.assertFalse(filter_matches(doc, {"type": "rfc"}))
+        self.assertFalse(filter_matches(doc, {"stream": "ietf"}))
+        self.assertFalse(filter_matches(doc, {"time__lt": "2021-01-01T00:00:00"}))
+        self.assertIsNone(filter_matches(doc, {"group__acronym": "quic"}))
+        self.assertIsNone(filter_matches(doc, {"ad": 20209}))
+        self.assertIsNone(filter_matches({"source": "/api/v1/doc/document/draft-ietf-quic-transport/"}, {"source": 12345}))
+        self.assertTrue(filter_matches({"rev": "01", "id": 1}, {"rev": "01", "id": "1"}))
+        self.assertFalse(filter_matches({"rev": "01"}, {"rev": "1"}))
+        self.assertFalse(filter_matches({"rev": "1"},  {"rev": "1.0"}))
+        self.assertFalse(query_subsumes({"rev__gte": "9"}, {"rev__gte": "10"}))
+
+
+    def test_crawl_objects(self) -> None:
+        crawl = CachedCrawl("/api/v1/doc/docevent/", {}, 3, datetime.now(timezone.utc))
+        objs  = [{"id": 1, "doc": "/api/v1/doc/document/draft-a/", "type": "new_revision", "rev": "00"},
+                 {"id": 2, "doc": "/api/v1/doc/document/draft-b/", "type": "new_revision", "rev": "00"},
+                 {"id": 3, "doc": "/api/v1/doc/document/draft-a/", "type": "new_revision", "rev": "01"}]
+        self.assertTrue(filters_are_local(objs[0],  {"doc": "draft-a", "rev": "01"}))
+        self.assertFalse(filters_are_local(objs[0], {"doc": 1234}))
+        self.assertFalse(filters_are_local(objs[0], {"doc__name": "draft-a"}))
+        crawl_objs = CrawlObjects(crawl, objs)
+        self.assertEqual([o["id"] for o in crawl_objs.filter({"doc": "draft-a"})],              [1, 3]) # type: ignore
+        self.assertEqual([o["id"] for o in crawl_objs.filter({"doc": "draft-a", "rev": "01"})], [3])    # type: ignore
+        self.assertEqual(crawl_objs.filter({"doc": "draft-c"}), [])
+        self.assertIsNone(crawl_objs.filter({"doc": 1234}))
+
+        now = datetime.now(timezone.utc)
+        self.assertTrue(crawl_objs.is_fresh(now))
+        self.assertTrue(CrawlObjects(crawl, objs, now + timedelta(hours=1)).is_fresh(now))
+        self.assertFalse(CrawlObjects(crawl, objs, now - timedelta(hours=1)).is_fresh(now))
+
+
+    @unittest.skipIf(os.getenv("IETFDATA_CACHE_HOST") is not None, "IETFDATA_CACHE_HOST enables the cache")
+    def test_keep_crawl_objects(self) -> None:
+        class TestDataTracker(DataTracker):
+            _CRAWL_OBJECTS_LIMIT = 5
+
+        def crawl_objs(endpoint: str, count: int) -> CrawlObjects:
+            return CrawlObjects(CachedCrawl(endpoint, {}, count, datetime.now(timezone.utc)), [{"id": i} for i in range(count)])
+
+        dt = TestDataTracker(use_cache = False)
+        dt._keep_crawl_objects(crawl_objs("/api/v1/doc/docevent/", 2))
+        dt._keep_crawl_objects(crawl_objs("/api/v1/doc/document/", 2))
+        dt._keep_crawl_objects(dt._crawl_objects["/api/v1/doc/docevent/"])
+        self.assertEqual(list(dt._crawl_objects), ["/api/v1/doc/document/", "/api/v1/doc/docevent/"])
+
+        # The least recently used crawl is evicted to make space:
+        dt._keep_crawl_objects(crawl_objs("/api/v1/group/group/", 3))
+        self.assertEqual(list(dt._crawl_objects), ["/api/v1/doc/docevent/", "/api/v1/group/group/"])
+
+        # Crawls larger than the limit are not kept:
+        dt._keep_crawl_objects(crawl_objs("/api/v1/person/person/", 6))
+        self.assertEqual(list(dt._crawl_objects), ["/api/v1/doc/docevent/", "/api/v1/group/group/"])
+
+
+
+    @unittest.skipIf(os.getenv("IETFDATA_CACHE_HOST") is not None, "IETFDATA_CACHE_HOST enables the cache")
+    def test_offline_requires_cache(self) -> None:
+        with self.assertRaises(ValueError):
+            DataTracker(use_cache = False, offline = True)
+
+
+class TestRequestCache(unittest.TestCase):
+    db_conn : pymongo.MongoClient
+    cache   : RequestCache
+
+    @classmethod
+    def setUpClass(self) -> None:
+        host = os.environ.get("IETFDATA_CACHE_HOST", "localhost")
+        port = int(os.environ.get("IETFDATA_CACHE_PORT", "27017"))
+        try:
+            self.db_conn = pymongo.MongoClient(host=host, port=port, serverSelectionTimeoutMS=2000)
+            self.db_conn.admin.command("ping")
+        except pymongo.errors.ServerSelectionTimeoutError:
+            raise unittest.SkipTest("Couldn't connect to MongoDB instance -- skipping RequestCache tests")
+
+
+    def setUp(self) -> None:
+        self.db_conn.drop_database("ietfdata_requests_test")
+        self.cache = RequestCache(self.db_conn, "ietfdata_requests_test", policy="lru")
+        now = datetime.now(timezone.utc)
+        responses = self.db_conn.ietfdata_requests_test.responses
+        responses.insert_one({"_id": "a", "url": "https://datatracker.ietf.org/api/v1/doc/document/rfc1/",  "created_at": now - timedelta(hours=2), "expires": now - timedelta(hours=1), "pad": "x" * 1000})
+        responses.insert_one({"_id": "b", "url": "https://datatracker.ietf.org/api/v1/doc/document/rfc2/",  "created_at": now - timedelta(hours=2), "expires": now + timedelta(hours=1), "pad": "x" * 1000})
+        responses.insert_one({"_id": "c", "url": "https://datatracker.ietf.org/api/v1/doc/document/rfc2/",  "created_at": now - timedelta(hours=1), "expires": now + timedelta(hours=1), "pad": "x" * 1000})
+        responses.insert_one({"_id": "d", "url": "https://datatracker.ietf.org/api/v1/person/person/20209/", "created_at": now, "expires": None, "pad": "x" * 1000})
+
+
+    def tearDown(self) -> None:
+        self.db_conn.drop_database("ietfdata_requests_test")
+
+
+    def test_usage(self) -> None:
+        usage = {u.endpoint: u for u in self.cache.usage()}
+        self.assertEqual(usage["/api/v1/doc/document/"].entries, 3)
+        self.assertEqual(usage["/api/v1/person/person/"].entries, 1)
+        self.assertGreater(usage["/api/v1/doc/document/"].size, 3000)
+
+
+    def test_compact(self) -> None:
+        result = self.cache.compact()
+        self.assertEqual(result.expired,    1)
+        self.assertEqual(result.duplicates, 1)
+        remaining = sorted(d["_id"] for d in self.db_conn.ietfdata_requests_test.responses.find({}))
+        self.assertEqual(remaining, ["c", "d"])
+
+
+    def test_evict_lru(self) -> None:
+        self.cache.record_access("b", True)
+        self.cache.record_access("d", True)
+        self.cache.flush()
+        self.cache.evict(max_size = self.cache.size() * 3 // 4)
+        remaining = sorted(d["_id"] for d in self.db_conn.ietfdata_requests_test.responses.find({}))
+        self.assertEqual(remaining, ["b", "d"])
+
+
+    def test_compression_zlib(self) -> None:
+        stage = CompressionStage(self.db_conn.ietfdata_requests_test, "zlib")
+        docs  = [{"url": f"https://datatracker.ietf.org/api/v1/doc/document/?offset={i}", "status_code": 200,
+                  "created_at": None, "expires": None, "_decoded_content": {"objects": [{"name": f"draft-{i}", "pad": "x" * 200}]}}
+                 for i in range(CompressionStage._TRAIN_SAMPLES + 1)]
+        stored = [stage.dumps(d) for d in docs]
+        self.assertIsNone(stored[0]["_dict"])
+        self.assertIsNotNone(stored[-1]["_dict"])
+        self.assertEqual(stored[-1]["url"], docs[-1]["url"])
+        for d, s in zip(docs, stored):
+            self.assertEqual(stage.loads(s), d)
+        # A new stage must load the dictionary from the database:
+        stage = CompressionStage(self.db_conn.ietfdata_requests_test, "zlib")
+        self.assertEqual(stage.loads(stored[-1]), docs[-1])
+        # Uncompressed responses are loaded as-is:
+        self.assertEqual(stage.loads(docs[0]), docs[0])
+
+
+    def test_find_crawls(self) -> None:
+        wide = {"time__gte": "1970-01-01T00:00:00", "time__lt": "2038-01-19T03:14:07"}
+        self.cache.record_crawl("/api/v1/doc/document/", wide, 1000)
+        self.cache.record_crawl("/api/v1/doc/document/", {**wide, "type": "draft"}, 500)
+        query  = {**wide, "type": "draft", "group": 2161}
+        cache  = RequestCache(self.db_conn, "ietfdata_requests_test")
+        crawls = cache.find_crawls("/api/v1/doc/document/", query)
+        self.assertEqual([c.count for c in crawls], [500, 1000])
+        cache.forget_crawl(crawls[0])
+        self.assertEqual(len(cache.find_crawls("/api/v1/doc/document/", query)), 1)
+        self.assertEqual(cache.find_crawls("/api/v1/person/person/", query), [])
+
+
+    def test_offline(self) -> None:
+        class TestDataTracker(DataTracker):
+            _CACHE_DB = "ietfdata_requests_test"
+
+        dt = TestDataTracker(use_cache = True, offline = True)
+        with self.assertRaises(DataTrackerOfflineError):
+            dt._datatracker_get_single(URI(uri="/api/v1/person/email/nobody@example.invalid/"))
+
+
+if __name__ == '__main__':
+    unittest.main()
+
+# =================================================================================================================================
+# vim: set tw=0 ai:
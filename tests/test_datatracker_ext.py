@@ -0,0 +1,470 @@
+# Copyright (C) 2024 University of Glasgow
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions
+# are met:
+#
+# 1. Redistributions of source code must retain the above copyright notice,
+#    this list of conditions and the following disclaimer.
+#
+# 2. Redistributions in binary form must reproduce the above copyright
+#    notice, this list of conditions and the following disclaimer in the
+#    documentation and/or other materials provided with the distribution.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+# ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE
+# LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR
+# CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF
+# SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS
+# INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN
+# CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)
+# ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+# POSSIBILITY OF SUCH DAMAGE.
+
+import unittest
+import os
+import sys
+import xml.etree.ElementTree as ET
+
+from datetime import datetime, timedelta, timezone
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from ietfdata.datatracker     import *
+from ietfdata.datatracker_ext import *
+
+# =================================================================================================================================
+# Helper functions to construct test data:
+
+def make_group(group_id: int, acronym: str, parent: Optional[int], state: str, type: str, day: int = 1) -> Group:
+    return Group(acronym        = acronym,
+                 ad             = None,
+                 charter        = None,
+                 comments       = "",
+                 description    = "",
+                 id             = group_id,
+                 list_archive   = "",
+                 list_email     = "",
+                 list_subscribe = "",
+                 name           = acronym.upper(),
+                 parent         = GroupURI(uri=f"/api/v1/group/group/{parent}/") if parent is not None else None,
+                 resource_uri   = GroupURI(uri=f"/api/v1/group/group/{group_id}/"),
+                 state          = GroupStateURI(uri=f"/api/v1/name/groupstatename/{state}/"),
+                 time           = datetime(2024, 1, day, tzinfo=timezone.utc),
+                 type           = GroupTypeNameURI(uri=f"/api/v1/name/grouptypename/{type}/"),
+                 unused_states  = [],
+                 unused_tags    = [],
+                 meeting_seen_as_area = False,
+                 used_roles           = "[]",
+                 uses_milestone_dates = True)
+
+
+
+def make_person(person_id: int, name: str, ascii: Optional[str] = None) -> Person:
+    return Person(resource_uri        = PersonURI(uri=f"/api/v1/person/person/{person_id}/"),
+                  id                  = person_id,
+                  name                = name,
+                  name_from_draft     = None,
+                  ascii               = ascii if ascii is not None else name,
+                  ascii_short         = None,
+                  user                = None,
+                  time                = datetime(2024, 1, 1, tzinfo=timezone.utc),
+                  photo               = None,
+                  photo_thumb         = None,
+                  biography           = "",
+                  plain               = "",
+                  pronouns_freetext   = None,
+                  pronouns_selectable = "")
+
+
+def make_email(address: str, person_id: Optional[int]) -> Email:
+    return Email(resource_uri = EmailURI(uri=f"/api/v1/person/email/{address}/"),
+                 person       = PersonURI(uri=f"/api/v1/person/person/{person_id}/") if person_id is not None else None,
+                 address      = address,
+                 time         = datetime(2024, 1, 1, tzinfo=timezone.utc),
+                 origin       = "",
+                 primary      = True,
+                 active       = True)
+
+
+def make_alias(alias_id: int, person_id: int, name: str) -> PersonAlias:
+    return PersonAlias(id           = alias_id,
+                       resource_uri = PersonAliasURI(uri=f"/api/v1/person/alias/{alias_id}/"),
+                       person       = PersonURI(uri=f"/api/v1/person/person/{person_id}/"),
+                       name         = name)
+
+
+
+def make_revision(event_id: int, name: str, rev: str, day: int) -> DocumentEvent:
+    return DocumentEvent(by           = PersonURI(uri="/api/v1/person/person/1/"),
+                         desc         = "New version available",
+                         doc          = DocumentURI(uri=f"/api/v1/doc/document/{name}/"),
+                         id           = event_id,
+                         resource_uri = DocumentEventURI(uri=f"/api/v1/doc/docevent/{event_id}/"),
+                         rev          = rev,
+                         time         = datetime(2024, 1, day, tzinfo=timezone.utc),
+                         type         = "new_revision")
+
+
+def make_submission(submission_id: int, name: str, rev: str, day: int, replaces: str = "") -> Submission:
+    return Submission(abstract = "", access_key = "", auth_key = "", authors = "[]", checks = [], document_date = None,
+                      draft           = DocumentURI(uri=f"/api/v1/doc/document/{name}/"),
+                      file_size = None, file_types = ".xml", group = None,
+                      id              = submission_id,
+                      name            = name,
+                      note = "", pages = None, remote_ip = "",
+                      replaces        = replaces,
+                      resource_uri    = SubmissionURI(uri=f"/api/v1/submit/submission/{submission_id}/"),
+                      rev             = rev,
+                      state           = "/api/v1/name/draftsubmissionstatename/posted/",
+                      submission_date = date(2024, 1, day),
+                      submitter = "", title = "", words = None, xml_version = None)
+
+
+def make_replaces(related_id: int, source: str, target: str) -> RelatedDocument:
+    return RelatedDocument(id           = related_id,
+                           relationship = RelationshipTypeURI(uri="/api/v1/name/docrelationshipname/replaces/"),
+                           resource_uri = RelatedDocumentURI(uri=f"/api/v1/doc/relateddocument/{related_id}/"),
+                           source       = DocumentURI(uri=f"/api/v1/doc/document/{source}/"),
+                           target       = DocumentURI(uri=f"/api/v1/doc/document/{target}/"))
+
+def make_document(name: str, rfc_number: Optional[int], type: str, group: Optional[int] = None, stream: Optional[str] = None, day: int = 1) -> Document:
+    return Document(id = 0, name = name, title = "", pages = None, words = None, notify = "", expires = None,
+                    resource_uri       = DocumentURI(uri=f"/api/v1/doc/document/{name}/"),
+                    time               = datetime(2024, 1, day, tzinfo=timezone.utc),
+                    type               = DocumentTypeURI(uri=f"/api/v1/name/doctypename/{type}/"),
+                    rfc                = None,
+                    rfc_number         = rfc_number,
+                    rev = "", abstract = "", internal_comments = "", note = "", ad = None, shepherd = None,
+                    group              = GroupURI(uri=f"/api/v1/group/group/{group}/") if group is not None else None,
+                    stream             = StreamURI(uri=f"/api/v1/name/streamname/{stream}/") if stream is not None else None,
+                    intended_std_level = None, std_level = None, states = [], submissions = [], tags = [],
+                    uploaded_filename = "", external_url = "")
+
+def make_group_history(history_id: int, group: Group) -> GroupHistory:
+    return GroupHistory(acronym = group.acronym, ad = None, comments = "", description = "",
+                        group        = group.resource_uri,
+                        id           = history_id,
+                        list_archive = "", list_email = "", list_subscribe = "", name = group.name, parent = group.parent,
+                        resource_uri = GroupHistoryURI(uri=f"/api/v1/group/grouphistory/{history_id}/"),
+                        state        = group.state,
+                        time         = group.time,
+                        type         = group.type,
+                        unused_states = [], unused_tags = [], uses_milestone_dates = True, meeting_seen_as_area = False, used_roles = "[]")
+
+def make_group_role(role_id: int, group_id: int, name: str, person_id: int) -> GroupRole:
+    return GroupRole(email        = EmailURI(uri=f"/api/v1/person/email/p{person_id}@example.com/"),
+                     group        = GroupURI(uri=f"/api/v1/group/group/{group_id}/"),
+                     id           = role_id,
+                     name         = RoleNameURI(uri=f"/api/v1/name/rolename/{name}/"),
+                     person       = PersonURI(uri=f"/api/v1/person/person/{person_id}/"),
+                     resource_uri = GroupRoleURI(uri=f"/api/v1/group/role/{role_id}/"))
+
+def make_group_role_history(role_id: int, history_id: int, name: str, person_id: int) -> GroupRoleHistory:
+    return GroupRoleHistory(email        = EmailURI(uri=f"/api/v1/person/email/p{person_id}@example.com/"),
+                            group        = GroupHistoryURI(uri=f"/api/v1/group/grouphistory/{history_id}/"),
+                            id           = role_id,
+                            name         = RoleNameURI(uri=f"/api/v1/name/rolename/{name}/"),
+                            person       = PersonURI(uri=f"/api/v1/person/person/{person_id}/"),
+                            resource_uri = GroupRoleHistoryURI(uri=f"/api/v1/group/rolehistory/{role_id}/"))
+
+def make_rfc(number: int, draft: Optional[str]) -> RfcEntry:
+    draft_xml = f"<draft>{draft}</draft>" if draft is not None else ""
+    return RfcEntry(ET.fromstring(f"""<rfc-entry xmlns="http://www.rfc-editor.org/rfc-index">
+                                        <doc-id>RFC{number:04d}</doc-id><title>RFC {number}</title>
+                                        <date><month>January</month><year>2024</year></date>
+                                        <current-status>UNKNOWN</current-status><publication-status>UNKNOWN</publication-status>
+                                        <stream>IETF</stream>{draft_xml}
+                                      </rfc-entry>"""))
+
+
+class StubRFCIndex:
+    def __init__(self, rfcs: List[RfcEntry]) -> None:
+        self._rfcs = rfcs
+
+    def rfcs(self) -> Iterator[RfcEntry]:
+        return iter(self._rfcs)
+
+
+def _since(kwargs: Dict[str, Any]) -> datetime:
+    return datetime.fromisoformat(kwargs.get("since", "1970-01-01T00:00:00")).replace(tzinfo=timezone.utc)
+
+
+class StubDataTrackerExt(DataTrackerExt):
+    """
+    A DataTrackerExt that answers document and group lookups from fixed sets
+    of objects, and records the documents it was asked for. Queries by time
+    select on the `time` field, as the datatracker does.
+    """
+    def __init__(self, documents: Iterable[Document] = ()) -> None:
+        super().__init__(use_cache = False)
+        self._documents = {doc.resource_uri.uri: doc for doc in documents}
+        self.fetched    = [] # type: List[str]
+        self.stub_groups         = [] # type: List[Group]
+        self.stub_histories      = [] # type: List[GroupHistory]
+        self.stub_roles          = [] # type: List[GroupRole]
+        self.stub_role_histories = [] # type: List[GroupRoleHistory]
+
+    def groups(self, *args: Any, **kwargs: Any) -> Iterator[Group]:
+        return iter([g for g in self.stub_groups if g.time >= _since(kwargs)])
+
+    def group_histories(self, *args: Any, **kwargs: Any) -> Iterator[GroupHistory]:
+        group = kwargs.get("group")
+        return iter([h for h in self.stub_histories if h.time >= _since(kwargs) and (group is None or h.group == group.resource_uri)])
+
+    def group_roles(self, *args: Any, **kwargs: Any) -> Iterator[GroupRole]:
+        group = kwargs.get("group")
+        return iter([r for r in self.stub_roles if group is None or r.group == group.resource_uri])
+
+    def group_role_histories(self, *args: Any, **kwargs: Any) -> Iterator[GroupRoleHistory]:
+        group = kwargs.get("group")
+        return iter([r for r in self.stub_role_histories if group is None or r.group == group.resource_uri])
+
+    def document(self, document_uri: DocumentURI) -> Optional[Document]:
+        assert document_uri.uri is not None
+        self.fetched.append(document_uri.uri)
+        return self._documents.get(document_uri.uri)
+
+    def documents(self, *args: Any, **kwargs: Any) -> Iterator[Document]:
+        doctype = kwargs.get("doctype")
+        for doc in self._documents.values():
+            if doctype is None or doc.type == doctype.resource_uri:
+                yield doc
+
+    def document_type_from_slug(self, slug: str) -> Optional[DocumentType]:
+        return DocumentType(resource_uri = DocumentTypeURI(uri=f"/api/v1/name/doctypename/{slug}/"),
+                            name = slug, used = True, prefix = slug, slug = slug, desc = "", order = 0)
+
+# =================================================================================================================================
+# Unit tests:
+
+class TestGroupIndex(unittest.TestCase):
+    def setUp(self) -> None:
+        self.index = GroupIndex([make_group(1,  "iesg", None, "active",   "ietf"),
+                                 make_group(2,  "tsv",  1,    "active",   "area"),
+                                 make_group(3,  "app",  1,    "conclude", "area"),
+                                 make_group(10, "avt",  2,    "conclude", "wg"),
+                                 make_group(11, "quic", 2,    "active",   "wg"),
+                                 make_group(12, "appsawg", 3, "active",   "wg"),
+                                 make_group(13, "tsvwg", 2,   "active",   "wg")])
+
+
+    def test_lookup(self) -> None:
+        self.assertEqual(len(self.index), 7)
+        self.assertEqual(self.index.group_from_acronym("quic").id, 11) # type: ignore
+        self.assertEqual(self.index.group(13).acronym, "tsvwg")        # type: ignore
+        self.assertIsNone(self.index.group_from_acronym("none"))
+        self.assertEqual(self.index.parent(self.index.group(11)).acronym, "tsv") # type: ignore
+
+
+    def test_groups(self) -> None:
+        iesg = self.index.group_from_acronym("iesg")
+        tsv  = self.index.group_from_acronym("tsv")
+        assert iesg is not None and tsv is not None
+        self.assertEqual([g.id for g in self.index.groups(parent=tsv)], [10, 11, 13])
+        self.assertEqual([g.id for g in self.index.groups(parent=tsv, state="active", type="wg")], [11, 13])
+        self.assertEqual([g.id for g in self.index.groups(parent=iesg, recursive=True, type="wg")], [10, 11, 12, 13])
+        self.assertEqual([g.id for g in self.index.groups(state="conclude")], [3, 10])
+
+
+    def test_update(self) -> None:
+        self.index.update([make_group(11, "quic", 2, "conclude", "wg", day=5), make_group(14, "moq", 2, "active", "wg", day=4)])
+        tsv = self.index.group_from_acronym("tsv")
+        assert tsv is not None
+        self.assertEqual([g.id for g in self.index.groups(parent=tsv, state="active")], [13, 14])
+        self.assertEqual(self.index.last_updated, datetime(2024, 1, 5, tzinfo=timezone.utc))
+
+
+
+class TestRoleTimeline(unittest.TestCase):
+    def role(self, name: str, person_id: int) -> Tuple[str, PersonURI, EmailURI]:
+        return (name, PersonURI(uri=f"/api/v1/person/person/{person_id}/"), EmailURI(uri=f"/api/v1/person/email/p{person_id}@example.com/"))
+
+
+    def test_holders(self) -> None:
+        timeline = RoleTimeline()
+        timeline.add_snapshot(1, datetime(2010, 1, 1, tzinfo=timezone.utc), [self.role("chair", 100), self.role("chair", 101)])
+        timeline.add_snapshot(1, datetime(2015, 1, 1, tzinfo=timezone.utc), [self.role("chair", 101), self.role("chair", 102)])
+        timeline.set_current(1, datetime(2020, 1, 1, tzinfo=timezone.utc), [self.role("chair", 102)])
+        timeline.set_current(2, datetime(2012, 1, 1, tzinfo=timezone.utc), [self.role("chair", 100), self.role("ad", 200)])
+
+        def chairs(group_id: int, year: int) -> List[str]:
+            return [str(i.person.uri) for i in timeline.holders(group_id, "chair", datetime(year, 6, 1, tzinfo=timezone.utc))]
+
+        self.assertEqual(chairs(1, 2009), [])
+        self.assertEqual(chairs(1, 2012), ["/api/v1/person/person/100/", "/api/v1/person/person/101/"])
+        self.assertEqual(chairs(1, 2017), ["/api/v1/person/person/101/", "/api/v1/person/person/102/"])
+        self.assertEqual(chairs(1, 2024), ["/api/v1/person/person/102/"])
+        self.assertEqual(timeline.holders(1, "chair", datetime(2012, 6, 1, tzinfo=timezone.utc))[1].end, datetime(2020, 1, 1, tzinfo=timezone.utc))
+        self.assertEqual([(g, str(i.person.uri)) for g, i in timeline.all_holders("chair", datetime(2013, 1, 1, tzinfo=timezone.utc))],
+                         [(1, "/api/v1/person/person/100/"), (1, "/api/v1/person/person/101/"), (2, "/api/v1/person/person/100/")])
+        self.assertEqual(timeline.last_updated, datetime(2020, 1, 1, tzinfo=timezone.utc))
+
+
+    @unittest.skipIf(os.getenv("IETFDATA_CACHE_HOST") is not None, "IETFDATA_CACHE_HOST enables the cache")
+    def test_refresh(self) -> None:
+        dt = StubDataTrackerExt()
+        dt.stub_groups = [make_group(1, "avt", None, "active", "wg", day=1), make_group(2, "tsv", None, "active", "area", day=3)]
+        dt.stub_roles  = [make_group_role(10, 1, "chair", 100), make_group_role(11, 2, "ad", 200)]
+
+        def chairs(day: int) -> List[str]:
+            return [str(i.person.uri) for i in dt.role_timeline().holders(1, "chair", datetime(2024, 1, day, 12, tzinfo=timezone.utc))]
+
+        self.assertEqual(chairs(2), ["/api/v1/person/person/100/"])
+
+        # The chair of group 1 changes on day 5. The GroupHistory saved for
+        # the change has the time of the old version of the group, which is
+        # earlier than the last time the timeline was updated:
+        old_group      = dt.stub_groups[0]
+        dt.stub_groups = [make_group(1, "avt", None, "active", "wg", day=5), dt.stub_groups[1]]
+        dt.stub_roles  = [make_group_role(12, 1, "chair", 101), dt.stub_roles[1]]
+        dt.stub_histories      = [make_group_history(50, old_group)]
+        dt.stub_role_histories = [make_group_role_history(60, 50, "chair", 100)]
+
+        timeline = dt.role_timeline(refresh = True)
+        self.assertEqual(chairs(2), ["/api/v1/person/person/100/"])
+        self.assertEqual(chairs(6), ["/api/v1/person/person/101/"])
+        self.assertEqual(timeline.holders(1, "chair", datetime(2024, 1, 2, tzinfo=timezone.utc))[0].end, datetime(2024, 1, 5, tzinfo=timezone.utc))
+        self.assertEqual(timeline.history_ids, {50})
+        self.assertEqual(timeline.last_updated, datetime(2024, 1, 5, tzinfo=timezone.utc))
+
+
+
+class TestPersonIndex(unittest.TestCase):
+    def setUp(self) -> None:
+        self.index = PersonIndex()
+        self.index.update_people([make_person(1, "Colin Perkins"), make_person(2, "José Smith", "Jose Smith"),
+                                  make_person(3, "Alex Doe"), make_person(4, "Alex Doe")])
+        self.index.update_emails([make_email("csp@csperkins.org", 1), make_email("unknown@example.com", None)])
+        self.index.update_aliases([], [make_alias(1, 1, "Colin S. Perkins"), make_alias(2, 3, "A. Doe")])
+
+
+    def test_person_from_name_email(self) -> None:
+        def resolve(name: str, addr: str) -> Optional[int]:
+            person = self.index.person_from_name_email(name, addr)
+            return person.id if person is not None else None
+
+        self.assertEqual(resolve("", "csp@csperkins.org"), 1)
+        self.assertEqual(resolve("", "csp+ietf@csperkins.org"), 1)
+        self.assertEqual(resolve("", "csp=40csperkins.org@dmarc.ietf.org"), 1)
+        self.assertEqual(resolve("Perkins, Colin", "other@example.com"), 1)
+        self.assertEqual(resolve("Jose Smith via Datatracker", "js@example.com"), 2)
+        self.assertEqual(resolve("A. Doe", "ad@example.com"), 3)
+        self.assertEqual(resolve("Alex Doe", "unknown@example.com"), None)
+
+
+    def test_update(self) -> None:
+        self.index.update_people([make_person(4, "Alexandra Doe")])
+        self.index.update_aliases([1], [])
+        self.assertEqual(self.index.people_named("Alex Doe")[0].id, 3)
+        self.assertEqual(self.index.people_with_alias("Colin S. Perkins"), [])
+
+
+
+class TestNameMatcher(unittest.TestCase):
+    def setUp(self) -> None:
+        index = PersonIndex()
+        index.update_people([make_person(1, "Colin Perkins"), make_person(2, "José Smith", "Jose Smith"), make_person(3, "Mary Barnes")])
+        index.update_aliases([], [make_alias(1, 3, "Mary H. Barnes")])
+        self.matcher = index.name_matcher()
+
+
+    def test_name_tokens(self) -> None:
+        self.assertEqual(name_tokens("Perkins, Colin"), ["colin", "perkins"])
+        self.assertEqual(name_tokens("José Smith (IETF)"), ["jose", "smith"])
+
+
+    def test_match(self) -> None:
+        matches = self.matcher.match("Perkins, Colin")
+        self.assertEqual(len(matches), 1)
+        self.assertEqual(matches[0].person, PersonURI(uri="/api/v1/person/person/1/"))
+        self.assertEqual(matches[0].score, 1.0)
+        matches = self.matcher.match("Colin Perkin")
+        self.assertEqual(matches[0].person, PersonURI(uri="/api/v1/person/person/1/"))
+        self.assertLess(matches[0].score, 1.0)
+        self.assertEqual(self.matcher.match("Someone Else"), [])
+
+
+    def test_match_many(self) -> None:
+        matches = self.matcher.match_many(["Mary H Barnes", "Jose Smith", "JOSE SMITH"])
+        self.assertEqual(matches["Mary H Barnes"][0].person, PersonURI(uri="/api/v1/person/person/3/"))
+        self.assertEqual(matches["Mary H Barnes"][0].score, 1.0)
+        self.assertIs(matches["Jose Smith"], matches["JOSE SMITH"])
+
+
+
+class TestDraftLineage(unittest.TestCase):
+    def test_lineage(self) -> None:
+        lineage = DraftLineage()
+        lineage.add_revisions([make_revision(1, "draft-a", "00", 1), make_revision(2, "draft-b", "00", 2),
+                               make_revision(3, "draft-wg", "00", 3), make_revision(4, "draft-wg", "01", 4)])
+        lineage.add_submissions([make_submission(10, "draft-wg", "00", 3, replaces="draft-a")])
+        lineage.set_replaces([make_replaces(20, "draft-wg", "draft-b"), make_replaces(21, "draft-b", "draft-wg")])
+
+        wg = "/api/v1/doc/document/draft-wg/"
+        self.assertEqual(lineage.replaces(wg), ["/api/v1/doc/document/draft-a/", "/api/v1/doc/document/draft-b/"])
+        self.assertEqual(lineage.lineage(wg),  [wg, "/api/v1/doc/document/draft-a/", "/api/v1/doc/document/draft-b/"])
+        self.assertEqual([rev for rev, time in lineage.revisions(wg)], ["00", "01"])
+        self.assertEqual([s.id for s in lineage.submissions(wg)], [10])
+
+        lineage.add_revisions([make_revision(5, "draft-wg", "02", 5)])
+        self.assertEqual([rev for rev, time in lineage.revisions(wg)], ["00", "01", "02"])
+        self.assertEqual(lineage.last_event, datetime(2024, 1, 5, tzinfo=timezone.utc))
+        self.assertEqual(lineage.last_submission, date(2024, 1, 3))
+
+
+
+class TestRFCDocumentIndex(unittest.TestCase):
+    def test_join(self) -> None:
+        index = RFCDocumentIndex(rfcs      = [make_rfc(1149, None), make_rfc(3550, "draft-ietf-avt-rtp-new-12")],
+                                 documents = [make_document("rfc3550", 3550, "rfc", group=10, stream="ietf"),
+                                              make_document("draft-ietf-avt-rtp-new", 3550, "draft", day=2),
+                                              make_document("rfc9000", 9000, "rfc", group=11, stream="ietf", day=3)])
+        self.assertEqual(len(index), 3)
+        self.assertEqual(index.last_updated, datetime(2024, 1, 3, tzinfo=timezone.utc))
+
+        # The document for the RFC is preferred to the draft that became the RFC:
+        join = index.join("RFC3550")
+        assert join is not None
+        self.assertEqual(join.rfc.title,     "RFC 3550") # type: ignore
+        self.assertEqual(join.document.name, "rfc3550")  # type: ignore
+        self.assertEqual(join.draft,  "draft-ietf-avt-rtp-new")
+        self.assertEqual(join.group,  GroupURI(uri="/api/v1/group/group/10/"))
+        self.assertEqual(join.stream, "ietf")
+        self.assertEqual(index.join_from_draft("draft-ietf-avt-rtp-new").doc_id, "RFC3550") # type: ignore
+
+        # RFCs missing from one source are still joined:
+        join = index.join("rfc1149")
+        assert join is not None
+        self.assertIsNone(join.document)
+        self.assertIsNone(join.draft)
+        self.assertIsNone(index.join("RFC7907"))
+        self.assertEqual([(j.doc_id, j.rfc is not None, j.document is not None) for j in index.joins()],
+                         [("RFC1149", True, False), ("RFC3550", True, True), ("RFC9000", False, True)])
+
+
+    @unittest.skipIf(os.getenv("IETFDATA_CACHE_HOST") is not None, "IETFDATA_CACHE_HOST enables the cache")
+    def test_draft_history_for_rfc(self) -> None:
+        rfcs = [make_rfc(1149, None), make_rfc(3550, "draft-ietf-avt-rtp-new-12")]
+        dt   = StubDataTrackerExt([make_document("rfc1149", 1149, "rfc"),
+                                   make_document("rfc3550", 3550, "rfc"),
+                                   make_document("draft-ietf-avt-rtp-new", 3550, "draft")])
+        dt._draft_lineage = DraftLineage()
+        dt._draft_lineage.add_revisions([make_revision(1, "draft-ietf-avt-rtp-new", "11", 1),
+                                         make_revision(2, "draft-ietf-avt-rtp-new", "12", 2)])
+
+        # With the index built, the final draft is found from the draft name
+        # in the join rather than from the document for the RFC:
+        index = dt.rfc_document_index(StubRFCIndex(rfcs)) # type: ignore
+        self.assertEqual(index.document("RFC3550").name, "rfc3550") # type: ignore
+        history = dt.draft_history_for_rfc(rfcs[1])
+        self.assertEqual([(h.draft.name, h.rev) for h in history], [("draft-ietf-avt-rtp-new", "12"), ("draft-ietf-avt-rtp-new", "11")])
+        self.assertEqual(dt.fetched, ["/api/v1/doc/document/draft-ietf-avt-rtp-new/"])
+
+        # RFCs that were never drafts have no history:
+        self.assertEqual(dt.draft_history_for_rfc(rfcs[0]), [])
+
+# =================================================================================================================================
+# vim: set tw=0 ai:
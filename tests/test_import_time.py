@@ -0,0 +1,77 @@
+# Copyright (C) 2024 University of Glasgow
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions
+# are met:
+#
+# 1. Redistributions of source code must retain the above copyright notice,
+#    this list of conditions and the following disclaimer.
+#
+# 2. Redistributions in binary form must reproduce the above copyright
+#    notice, this list of conditions and the following disclaimer in the
+#    documentation and/or other materials provided with the distribution.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT thirdpartyS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+# ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE
+# LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR
+# CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF
+# SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS
+# INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN
+# CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)
+# ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+# POSSIBILITY OF SUCH DAMAGE.
+
+import json
+import os
+import subprocess
+import sys
+import unittest
+
+from typing import List, Tuple
+
+# =================================================================================================================================
+# Unit tests:
+
+class TestImportTime(unittest.TestCase):
+    """
+    Check that importing the ietfdata modules is fast, and does not import
+    optional dependencies that are only needed by some methods. Each import
+    is run in a new interpreter, so that modules already imported by other
+    tests are not counted.
+    """
+
+    def import_module(self, module: str) -> Tuple[float, List[str]]:
+        code = (f"import sys, time, json\n"
+                f"start = time.perf_counter()\n"
+                f"import {module}\n"
+                f"print(json.dumps({{'time': time.perf_counter() - start, 'modules': sorted(sys.modules)}}))\n")
+        root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+        proc = subprocess.run([sys.executable, "-c", code], cwd=root, capture_output=True, text=True, check=True)
+        result = json.loads(proc.stdout.splitlines()[-1])
+        return float(result["time"]), list(result["modules"])
+
+
+    def assertNotImported(self, modules: List[str], packages: List[str]) -> None:
+        for package in packages:
+            self.assertFalse(any(m == package or m.startswith(package + ".") for m in modules), f"{package} imported")
+
+
+    def test_import_datatracker(self) -> None:
+        elapsed, modules = self.import_module("ietfdata.datatracker")
+        self.assertNotImported(modules, ["pymongo", "requests_cache", "dateutil", "pandas", "ietfdata.datatracker_cache"])
+        self.assertLess(elapsed, 2.0)
+
+
+    def test_import_mailarchive2(self) -> None:
+        elapsed, modules = self.import_module("ietfdata.mailarchive2")
+        self.assertNotImported(modules, ["pandas", "imapclient"])
+        self.assertLess(elapsed, 2.0)
+
+
+if __name__ == '__main__':
+    unittest.main()
+
+# =================================================================================================================================
+# vim: set tw=0 ai:
@@ -26,6 +26,13 @@
 import unittest
 import os
 import sys
+import tempfile
+import threading
+import time
+
+from datetime    import timedelta
+from functools   import partial
+from http.server import HTTPServer, SimpleHTTPRequestHandler
 
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
@@ -145,6 +152,440 @@ class TestRFCIndex(unittest.TestCase):
         self.assertEqual(rfcs[0].doc_id, "RFC8627")
 
 
+
+# ==================================================================================================
+# Unit tests using a local copy of a small rfc-index.xml file:
+
+RFC_INDEX_XML = """<?xml version="1.0" encoding="UTF-8"?>
+<rfc-index xmlns="http://www.rfc-editor.org/rfc-index">
+    <bcp-entry>
+        <doc-id>BCP0009</doc-id>
+        <is-also>
+            <doc-id>RFC2026</doc-id>
+        </is-also>
+    </bcp-entry>
+    <fyi-entry>
+        <doc-id>FYI0036</doc-id>
+        <is-also>
+            <doc-id>RFC4949</doc-id>
+        </is-also>
+    </fyi-entry>
+    <rfc-entry>
+        <doc-id>RFC1149</doc-id>
+        <title>Standard for the transmission of IP datagrams on avian carriers</title>
+        <author>
+            <name>D. Waitzman</name>
+        </author>
+        <date>
+            <day>1</day>
+            <month>April</month>
+            <year>1990</year>
+        </date>
+        <format>
+            <file-format>ASCII</file-format>
+        </format>
+        <page-count>2</page-count>
+        <keywords>
+            <kw>avian</kw>
+            <kw></kw>
+        </keywords>
+        <updated-by>
+            <doc-id>RFC6214</doc-id>
+        </updated-by>
+        <current-status>EXPERIMENTAL</current-status>
+        <publication-status>EXPERIMENTAL</publication-status>
+        <stream>Legacy</stream>
+        <doi>10.17487/RFC1149</doi>
+    </rfc-entry>
+    <rfc-entry>
+        <doc-id>RFC1889</doc-id>
+        <title>RTP: A Transport Protocol for Real-Time Applications</title>
+        <author>
+            <name>H. Schulzrinne</name>
+            <title>Editor</title>
+        </author>
+        <date>
+            <month>January</month>
+            <year>1996</year>
+        </date>
+        <format>
+            <file-format>ASCII</file-format>
+        </format>
+        <page-count>75</page-count>
+        <obsoleted-by>
+            <doc-id>RFC3550</doc-id>
+        </obsoleted-by>
+        <current-status>PROPOSED STANDARD</current-status>
+        <publication-status>PROPOSED STANDARD</publication-status>
+        <stream>IETF</stream>
+        <area>rai</area>
+        <wg_acronym>avt</wg_acronym>
+        <doi>10.17487/RFC1889</doi>
+    </rfc-entry>
+    <rfc-entry>
+        <doc-id>RFC3550</doc-id>
+        <title>RTP: A Transport Protocol for Real-Time Applications</title>
+        <author>
+            <name>H. Schulzrinne</name>
+        </author>
+        <author>
+            <name>S. Casner</name>
+        </author>
+        <date>
+            <month>July</month>
+            <year>2003</year>
+        </date>
+        <format>
+            <file-format>ASCII</file-format>
+            <file-format>HTML</file-format>
+        </format>
+        <page-count>104</page-count>
+        <keywords>
+            <kw>RTP</kw>
+            <kw>end-to-end</kw>
+        </keywords>
+        <abstract><p>This memorandum describes RTP, the real-time transport protocol.</p><p>RTP provides end-to-end network transport functions.</p></abstract>
+        <draft>draft-ietf-avt-rtp-new-12</draft>
+        <obsoletes>
+            <doc-id>RFC1889</doc-id>
+        </obsoletes>
+        <is-also>
+            <doc-id>STD0064</doc-id>
+        </is-also>
+        <current-status>INTERNET STANDARD</current-status>
+        <publication-status>DRAFT STANDARD</publication-status>
+        <stream>IETF</stream>
+        <area>rai</area>
+        <wg_acronym>avt</wg_acronym>
+        <errata-url>http://www.rfc-editor.org/errata_search.php?rfc=3550</errata-url>
+        <doi>10.17487/RFC3550</doi>
+    </rfc-entry>
+    <rfc-entry>
+        <doc-id>RFC8627</doc-id>
+        <title>RTP Payload Format for Flexible Forward Error Correction (FEC)</title>
+        <author>
+            <name>M. Zanaty</name>
+        </author>
+        <author>
+            <name>V. Singh</name>
+        </author>
+        <date>
+            <month>July</month>
+            <year>2019</year>
+        </date>
+        <format>
+            <file-format>HTML</file-format>
+            <file-format>TEXT</file-format>
+            <file-format>XML</file-format>
+        </format>
+        <page-count>41</page-count>
+        <abstract><p>This document defines new RTP payload formats for the Forward Error Correction packets.</p></abstract>
+        <draft>draft-ietf-payload-flexible-fec-scheme-20</draft>
+        <current-status>PROPOSED STANDARD</current-status>
+        <publication-status>PROPOSED STANDARD</publication-status>
+        <stream>IETF</stream>
+        <area>art</area>
+        <wg_acronym>payload</wg_acronym>
+        <doi>10.17487/RFC8627</doi>
+    </rfc-entry>
+    <rfc-not-issued-entry>
+        <doc-id>RFC7907</doc-id>
+    </rfc-not-issued-entry>
+    <std-entry>
+        <doc-id>STD0064</doc-id>
+        <title>RTP: A Transport Protocol for Real-Time Applications</title>
+        <is-also>
+            <doc-id>RFC3550</doc-id>
+        </is-also>
+    </std-entry>
+</rfc-index>
+"""
+
+
+class TestRFCIndexLocal(unittest.TestCase):
+    def setUp(self) -> None:
+        self.tmpdir    = tempfile.TemporaryDirectory()
+        self.cache_dir = Path(self.tmpdir.name)
+        Path(self.cache_dir, "rfc").mkdir()
+        with open(Path(self.cache_dir, "rfc", "rfc-index.xml"), "w") as outf:
+            outf.write(RFC_INDEX_XML)
+
+
+    def tearDown(self) -> None:
+        self.tmpdir.cleanup()
+
+
+    def test_load(self) -> None:
+        index = RFCIndex(cache_dir=self.cache_dir)
+        self.assertEqual(len(list(index.rfcs())), 4)
+        rfc = index.rfc("RFC3550")
+        assert rfc is not None
+        self.assertEqual(rfc.authors,   ["H. Schulzrinne", "S. Casner"])
+        self.assertEqual(rfc.obsoletes, ["RFC1889"])
+        self.assertEqual(rfc.is_also,   ["STD0064"])
+        assert rfc.abstract is not None
+        self.assertEqual(len(rfc.abstract), 2)
+        rfc = index.rfc("RFC1149")
+        assert rfc is not None
+        self.assertEqual(rfc.day,       1)
+        self.assertEqual(rfc.keywords,  ["avian"])
+        self.assertEqual(index.rfc_not_issued("RFC7907").doc_id, "RFC7907") # type: ignore
+        self.assertEqual(index.bcp("BCP0009").is_also, ["RFC2026"])         # type: ignore
+        self.assertEqual(index.std("STD0064").title, "RTP: A Transport Protocol for Real-Time Applications") # type: ignore
+        self.assertEqual(index.fyi("FYI0036").is_also, ["RFC4949"])         # type: ignore
+
+
+    def test_compact(self) -> None:
+        index = RFCIndex(cache_dir=self.cache_dir)
+        rfc1 = index.rfc("RFC3550")
+        rfc2 = index.rfc("RFC8627")
+        assert rfc1 is not None and rfc2 is not None
+        self.assertFalse(hasattr(rfc1, "__dict__"))
+        self.assertEqual(rfc2.updates, [])
+        self.assertIsNot(rfc2.updates, rfc1.updates)
+        rfc2.updates.append(DocID("RFC0001"))
+        self.assertEqual(rfc2.updates, ["RFC0001"])
+        self.assertEqual(rfc1.updates, [])
+        rfc2.abstract = None
+        self.assertIsNone(rfc2.abstract)
+        self.assertIs(rfc1.stream, rfc2.stream)
+        self.assertEqual(rfc1.date(), datetime(2003, 7, 1))
+        self.assertEqual(index.rfc("RFC1149").date(), datetime(1990, 4, 1)) # type: ignore
+
+
+    def test_rfcs(self) -> None:
+        index = RFCIndex(cache_dir=self.cache_dir)
+        def rfcs(**kwargs: str) -> List[str]:
+            return [rfc.doc_id for rfc in index.rfcs(**kwargs)]
+        self.assertEqual(rfcs(), ["RFC1149", "RFC1889", "RFC3550", "RFC8627"])
+        self.assertEqual(rfcs(since="1996-01", until="2003-07"), ["RFC1889", "RFC3550"])
+        self.assertEqual(rfcs(since="1990-04", until="1990-04"), ["RFC1149"])
+        self.assertEqual(rfcs(stream="IETF", wg="avt"), ["RFC1889", "RFC3550"])
+        self.assertEqual(rfcs(area="rai", status="INTERNET STANDARD"), ["RFC3550"])
+        self.assertEqual(rfcs(author="H. Schulzrinne", since="2000-01"), ["RFC3550"])
+        self.assertEqual(rfcs(author="H. Schulzrinne", until="2000-01"), ["RFC1889"])
+        self.assertEqual(rfcs(stream="IRTF"), [])
+        self.assertEqual(rfcs(since="2020-01"), [])
+
+
+    def test_graph(self) -> None:
+        with open(Path(self.cache_dir, "rfc", "rfc-index.xml"), "w") as outf:
+            outf.write(RFC_INDEX_XML.replace("<current-status>EXPERIMENTAL", "<obsoleted-by><doc-id>RFC1889</doc-id></obsoleted-by><current-status>EXPERIMENTAL"))
+        graph = RFCIndex(cache_dir=self.cache_dir).graph()
+        self.assertEqual(graph.related("RFC3550", "is_also"),           ["STD0064"])
+        self.assertEqual(graph.related("RFC1149", "obsoleted_by"),      ["RFC1889"])
+        self.assertEqual(graph.descendants("RFC1149", "obsoleted_by"),  ["RFC1889", "RFC3550"])
+        self.assertEqual(graph.descendants("RFC1149", "updated_by"),    ["RFC6214"])
+        self.assertEqual(graph.ancestors("RFC3550", "obsoleted_by"),    ["RFC1889"])
+        self.assertEqual(graph.current_versions("RFC1149"), ["RFC3550"])
+        self.assertEqual(graph.current_versions("RFC3550"), ["RFC3550"])
+        self.assertEqual(graph.current_versions("RFC9999"), [])
+
+
+    def test_snapshot(self) -> None:
+        class SnapshotOnlyIndex(RFCIndex):
+            def _load_index(self, source: Union[Path, IO[bytes]]) -> None:
+                raise AssertionError("index parsed, not loaded from snapshot")
+
+        xml_filepath = Path(self.cache_dir, "rfc", "rfc-index.xml")
+        RFCIndex(cache_dir=self.cache_dir)
+        self.assertTrue(Path(self.cache_dir, "rfc", "rfc-index.pickle").exists())
+
+        class SnapshotOnlyNoHashIndex(SnapshotOnlyIndex):
+            def _sha256(self, filepath: Path) -> str:
+                raise AssertionError("index hashed")
+
+        # Unchanged content loads from the snapshot, even if the mtime changes:
+        index = SnapshotOnlyIndex(cache_dir=self.cache_dir)
+        self.assertEqual(len(list(index.rfcs())), 4)
+        os.utime(xml_filepath, ns=(xml_filepath.stat().st_atime_ns, xml_filepath.stat().st_mtime_ns + 1000000000))
+        with self.assertRaises(AssertionError):
+            SnapshotOnlyNoHashIndex(cache_dir=self.cache_dir)
+        index = SnapshotOnlyIndex(cache_dir=self.cache_dir)
+        self.assertEqual(index.rfc("RFC3550").obsoletes, ["RFC1889"]) # type: ignore
+        self.assertEqual(len(index.rfc("RFC3550").abstract), 2)       # type: ignore
+
+        # Once the hash has matched, the snapshot records the new mtime, so
+        # the index is not hashed again:
+        index = SnapshotOnlyNoHashIndex(cache_dir=self.cache_dir)
+        self.assertEqual(len(list(index.rfcs())), 4)
+        self.assertEqual([p.name for p in Path(self.cache_dir, "rfc").glob("*.tmp")], [])
+
+        # Changed content is parsed:
+        with open(xml_filepath, "w") as outf:
+            outf.write(RFC_INDEX_XML.replace("<doc-id>RFC8627</doc-id>", "<doc-id>RFC8628</doc-id>"))
+        with self.assertRaises(AssertionError):
+            SnapshotOnlyIndex(cache_dir=self.cache_dir)
+        reparsed = RFCIndex(cache_dir=self.cache_dir)
+        self.assertEqual([rfc.doc_id for rfc in reparsed.rfcs()][-1], "RFC8628")
+
+
+    def test_changes(self) -> None:
+        index = RFCIndex(cache_dir=self.cache_dir)
+        self.assertIsNone(index.previous())
+
+        updated_xml = RFC_INDEX_XML.replace("<current-status>EXPERIMENTAL", "<current-status>HISTORIC")
+        updated_xml = updated_xml.replace("<doc-id>RFC6214</doc-id>", "<doc-id>RFC6214</doc-id><doc-id>RFC9999</doc-id>")
+        updated_xml = updated_xml.replace("<doc-id>RFC8627</doc-id>", "<doc-id>RFC8628</doc-id>")
+        updated_xml = updated_xml.replace("<rfc-not-issued-entry>", "<rfc-not-issued-entry><doc-id>RFC7906</doc-id></rfc-not-issued-entry><rfc-not-issued-entry>")
+        with open(Path(self.cache_dir, "rfc", "rfc-index.xml"), "w") as outf:
+            outf.write(updated_xml)
+
+        updated  = RFCIndex(cache_dir=self.cache_dir)
+        previous = updated.previous()
+        assert previous is not None
+        self.assertIsNotNone(previous.rfc("RFC8627"))
+        self.assertEqual(updated.changes_since(previous),
+                         [RFCIndexChange(RFCIndexChange.STATUS,     DocID("RFC1149"), "EXPERIMENTAL", "HISTORIC"),
+                          RFCIndexChange(RFCIndexChange.UPDATED_BY, DocID("RFC1149"), None, "RFC9999"),
+                          RFCIndexChange(RFCIndexChange.NEW_RFC,    DocID("RFC8628"), None, "PROPOSED STANDARD"),
+                          RFCIndexChange(RFCIndexChange.NOT_ISSUED, DocID("RFC7906"), None, None)])
+        self.assertEqual(updated.changes_since(updated), [])
+
+
+    def test_search(self) -> None:
+        index = RFCIndex(cache_dir=self.cache_dir)
+        self.assertEqual([rfc.doc_id for rfc, score in index.search("rtp")], ["RFC3550", "RFC1889", "RFC8627"])
+        self.assertEqual([rfc.doc_id for rfc, score in index.search("RTP end-to-end")], ["RFC3550"])
+        self.assertEqual([rfc.doc_id for rfc, score in index.search('"transport protocol" real-time')], ["RFC1889", "RFC3550"])
+        self.assertEqual([rfc.doc_id for rfc, score in index.search('"protocol transport"')], [])
+        self.assertEqual([rfc.doc_id for rfc, score in index.search("avia*")], ["RFC1149"])
+        self.assertEqual([rfc.doc_id for rfc, score in index.search("rtp", limit=1)], ["RFC3550"])
+        self.assertEqual(index.search(""), [])
+
+        # The search index is saved, and reused while the RFC index is unchanged:
+        self.assertTrue(Path(self.cache_dir, "rfc", "rfc-search.pickle").exists())
+        reloaded = RFCIndex(cache_dir=self.cache_dir)
+        self.assertEqual([(rfc.doc_id, score) for rfc, score in reloaded.search("rtp")],
+                         [(rfc.doc_id, score) for rfc, score in index.search("rtp")])
+
+
+
+class RecordingHandler(SimpleHTTPRequestHandler):
+    statuses : List[int] = []
+
+    def send_response(self, code: int, message: Optional[str] = None) -> None:
+        self.statuses.append(code)
+        super().send_response(code, message)
+
+    def log_message(self, format: str, *args: Any) -> None:
+        pass
+
+
+class TestRFCIndexRefresh(unittest.TestCase):
+    def setUp(self) -> None:
+        self.tmpdir     = tempfile.TemporaryDirectory()
+        self.server_dir = Path(self.tmpdir.name, "server")
+        self.cache_dir  = Path(self.tmpdir.name, "cache")
+        self.server_dir.mkdir()
+        with open(Path(self.server_dir, "rfc-index.xml"), "w") as outf:
+            outf.write(RFC_INDEX_XML)
+        RecordingHandler.statuses = []
+        self.server = HTTPServer(("127.0.0.1", 0), partial(RecordingHandler, directory=str(self.server_dir)))
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+
+        class LocalRFCIndex(RFCIndex):
+            _INDEX_URL = f"http://127.0.0.1:{self.server.server_port}/rfc-index.xml"
+        self.LocalRFCIndex = LocalRFCIndex
+
+
+    def tearDown(self) -> None:
+        self.server.shutdown()
+        self.server.server_close()
+        self.tmpdir.cleanup()
+
+
+    def test_conditional_refresh(self) -> None:
+        index = self.LocalRFCIndex(cache_dir=self.cache_dir)
+        self.assertEqual(len(list(index.rfcs())), 4)
+        self.assertEqual(RecordingHandler.statuses, [200])
+        self.assertTrue(Path(self.cache_dir, "rfc", "rfc-index.validators").exists())
+
+        # Within max_age, the cached copy is used without a request:
+        index = self.LocalRFCIndex(cache_dir=self.cache_dir)
+        self.assertEqual(RecordingHandler.statuses, [200])
+
+        # After max_age, a conditional request is made, and the unchanged
+        # index is not downloaded again:
+        index = self.LocalRFCIndex(cache_dir=self.cache_dir, max_age=timedelta(seconds=0))
+        self.assertEqual(RecordingHandler.statuses, [200, 304])
+        self.assertEqual(len(list(index.rfcs())), 4)
+
+        # A changed index is downloaded:
+        with open(Path(self.server_dir, "rfc-index.xml"), "w") as outf:
+            outf.write(RFC_INDEX_XML.replace("<doc-id>RFC8627</doc-id>", "<doc-id>RFC8628</doc-id>"))
+        os.utime(Path(self.server_dir, "rfc-index.xml"), (time.time() + 10, time.time() + 10))
+        index = self.LocalRFCIndex(cache_dir=self.cache_dir, max_age=timedelta(seconds=0))
+        self.assertEqual(RecordingHandler.statuses, [200, 304, 200])
+        self.assertIsNotNone(index.rfc("RFC8628"))
+
+        # Validators that do not match the cached index are not used:
+        with open(Path(self.cache_dir, "rfc", "rfc-index.xml"), "w") as outf:
+            outf.write(RFC_INDEX_XML)
+        index = self.LocalRFCIndex(cache_dir=self.cache_dir, max_age=timedelta(seconds=0))
+        self.assertEqual(RecordingHandler.statuses, [200, 304, 200, 200])
+        self.assertIsNotNone(index.rfc("RFC8628"))
+        self.assertEqual([p.name for p in Path(self.cache_dir, "rfc").glob("*.tmp")], [])
+
+
+    def test_content_store(self) -> None:
+        with open(Path(self.server_dir, "rfc1149.txt"), "w") as outf:
+            outf.write("Standard for the transmission of IP datagrams on avian carriers\n")
+        with open(Path(self.server_dir, "rfc3550.txt"), "w", encoding="utf-8") as outf:
+            outf.write("RTP: A Transport Protocol for Real-Time Applications — Schulzrinne\n")
+        with open(Path(self.server_dir, "rfc3550.html"), "w") as outf:
+            outf.write("<html><title>RTP</title></html>\n")
+
+        class LocalRFCContentStore(RFCContentStore):
+            _CONTENT_URL = f"http://127.0.0.1:{self.server.server_port}/"
+
+        index  = self.LocalRFCIndex(cache_dir=self.cache_dir)
+        store  = LocalRFCContentStore(self.cache_dir, max_workers=2, rate=0)
+        RecordingHandler.statuses = []
+        result = store.update(index.rfcs(), formats=["ASCII", "HTML"])
+        self.assertEqual(sorted(result.fetched),   [("RFC1149", "ASCII"), ("RFC3550", "ASCII"), ("RFC3550", "HTML")])
+        self.assertEqual(sorted(result.failed),    [("RFC1889", "ASCII"), ("RFC8627", "HTML")])
+        self.assertEqual(sorted(result.unchanged), [])
+        self.assertEqual(store.text(index.rfc("RFC3550")), "RTP: A Transport Protocol for Real-Time Applications — Schulzrinne\n") # type: ignore
+        self.assertEqual(store.content(index.rfc("RFC3550"), "HTML"), b"<html><title>RTP</title></html>\n")          # type: ignore
+        self.assertIsNone(store.content(index.rfc("RFC1889")))                                                          # type: ignore
+
+        # A later update only fetches RFCs not already in the store:
+        RecordingHandler.statuses = []
+        store  = LocalRFCContentStore(self.cache_dir, max_workers=2, rate=0)
+        result = store.update(index.rfcs(), formats=["ASCII", "HTML"])
+        self.assertEqual(sorted(result.fetched),   [])
+        self.assertEqual(sorted(result.unchanged), [("RFC1149", "ASCII"), ("RFC3550", "ASCII"), ("RFC3550", "HTML")])
+        self.assertEqual(RecordingHandler.statuses, [404, 404])
+
+        # Revalidating makes conditional requests, and downloads changed content:
+        with open(Path(self.server_dir, "rfc1149.txt"), "w") as outf:
+            outf.write("Standard for the transmission of IP datagrams on avian carriers, with QoS\n")
+        os.utime(Path(self.server_dir, "rfc1149.txt"), (time.time() + 10, time.time() + 10))
+        RecordingHandler.statuses = []
+        result = store.update([index.rfc("RFC1149"), index.rfc("RFC3550")], revalidate=True) # type: ignore
+        self.assertEqual(sorted(result.fetched),   [("RFC1149", "ASCII")])
+        self.assertEqual(sorted(result.unchanged), [("RFC3550", "ASCII")])
+        self.assertEqual(sorted(RecordingHandler.statuses), [200, 304])
+        self.assertEqual(store.text(index.rfc("RFC1149")), "Standard for the transmission of IP datagrams on avian carriers, with QoS\n") # type: ignore
+
+        # Stores sharing a directory merge their changes into the manifest:
+        with open(Path(self.server_dir, "rfc1889.txt"), "w") as outf:
+            outf.write("RTP: A Transport Protocol for Real-Time Applications\n")
+        with open(Path(self.server_dir, "rfc8627.html"), "w") as outf:
+            outf.write("<html><title>FLEXFEC</title></html>\n")
+        store_a = LocalRFCContentStore(self.cache_dir, max_workers=2, rate=0)
+        store_b = LocalRFCContentStore(self.cache_dir, max_workers=2, rate=0)
+        self.assertEqual(store_a.update([index.rfc("RFC1889")]).fetched, [("RFC1889", "ASCII")])            # type: ignore
+        self.assertEqual(store_b.update([index.rfc("RFC8627")], ["HTML"]).fetched, [("RFC8627", "HTML")])   # type: ignore
+        store = LocalRFCContentStore(self.cache_dir, max_workers=2, rate=0)
+        self.assertIsNotNone(store.content(index.rfc("RFC1889")))         # type: ignore
+        self.assertIsNotNone(store.content(index.rfc("RFC8627"), "HTML")) # type: ignore
+        self.assertIsNotNone(store.content(index.rfc("RFC3550"), "HTML")) # type: ignore
+        self.assertEqual(list(Path(self.cache_dir, "rfc", "content").glob("**/*.tmp")), [])
+
+
 if __name__ == '__main__':
     unittest.main()
 
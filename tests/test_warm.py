@@ -0,0 +1,119 @@
+# Copyright (C) 2024 University of Glasgow
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions
+# are met:
+#
+# 1. Redistributions of source code must retain the above copyright notice,
+#    this list of conditions and the following disclaimer.
+#
+# 2. Redistributions in binary form must reproduce the above copyright
+#    notice, this list of conditions and the following disclaimer in the
+#    documentation and/or other materials provided with the distribution.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT thirdpartyS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+# ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE
+# LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR
+# CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF
+# SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS
+# INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN
+# CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)
+# ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+# POSSIBILITY OF SUCH DAMAGE.
+
+import unittest
+import os
+import sys
+import threading
+
+from typing import Any, Dict, Iterator, List
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from ietfdata.tools.warm import *
+
+# =================================================================================================================================
+# Helper classes to run the warm tool without the cache:
+
+class StubWarmDataTracker(WarmDataTracker):
+    """
+    A WarmDataTracker whose query methods return fixed results, or give up
+    in the same way as the DataTracker when a request keeps failing.
+    """
+    def __init__(self) -> None:
+        super().__init__(use_cache = False)
+        self.calls = [] # type: List[Dict[str, Any]]
+
+    def groups(self, *args: Any, **kwargs: Any) -> Iterator[Group]:
+        self.calls.append(kwargs)
+        return iter([])
+
+    def documents(self, *args: Any, **kwargs: Any) -> Iterator[Document]:
+        self.calls.append(kwargs)
+        return iter([])
+
+    def document_events(self, *args: Any, **kwargs: Any) -> Iterator[DocumentEvent]:
+        self.calls.append(kwargs)
+        sys.exit(1)
+
+
+class StubWarmer(Warmer):
+    def __init__(self, last_run: Optional[str]) -> None:
+        super().__init__(TokenBucket(1000, 1000), last_run)
+        self.dts  = [] # type: List[StubWarmDataTracker]
+        self.lock = threading.Lock()
+
+    def datatracker(self) -> WarmDataTracker:
+        if not hasattr(self.local, "dt"):
+            self.local.dt = StubWarmDataTracker()
+            with self.lock:
+                self.dts.append(self.local.dt)
+        dt = self.local.dt # type: WarmDataTracker
+        return dt
+
+# =================================================================================================================================
+# Unit tests:
+
+class TestWarm(unittest.TestCase):
+    def test_parse_queries(self) -> None:
+        queries = parse_queries(DEFAULT_QUERIES)
+        self.assertEqual([str(q) for q in queries][:3], ["/api/v1/name/*", "groups()", "group_roles()"])
+        with self.assertRaises(ValueError):
+            parse_queries([{"method": "not_a_method"}])
+        with self.assertRaises(ValueError):
+            parse_queries([{"method": "groups", "endpoint": "/api/v1/group/group/"}])
+
+
+    @unittest.skipIf(os.getenv("IETFDATA_CACHE_HOST") is not None, "IETFDATA_CACHE_HOST enables the cache")
+    def test_warm(self) -> None:
+        queries = parse_queries([{"method": "groups"},
+                                 {"method": "document_events", "kwargs": {"since": "$last_run"}},
+                                 {"method": "documents",       "kwargs": {"since": "$last_run"}}])
+
+        # A query that gives up with sys.exit() is recorded as failed, and
+        # the other queries still run:
+        warmer = StubWarmer(None)
+        failed = warm(warmer, queries, 2)
+        self.assertEqual([str(q) for q in failed], ['document_events(since="$last_run")'])
+        self.assertEqual(sorted(str(c) for dt in warmer.dts for c in dt.calls), ["{}", "{}", "{}"])
+
+        # "$last_run" is replaced by the time of the last run, once known:
+        warmer = StubWarmer("2024-01-01T00:00:00")
+        warm(warmer, queries[2:], 1)
+        self.assertEqual(warmer.dts[0].calls, [{"since": "2024-01-01T00:00:00"}])
+
+
+    @unittest.skipIf(os.getenv("IETFDATA_CACHE_HOST") is not None, "IETFDATA_CACHE_HOST enables the cache")
+    def test_rate_limited_adapter(self) -> None:
+        dt = WarmDataTracker(use_cache = False)
+        dt.set_rate_limit(TokenBucket(10, 1))
+        self.assertIsInstance(dt.session.get_adapter("https://datatracker.ietf.org/"), RateLimitedAdapter)
+
+
+if __name__ == '__main__':
+    unittest.main()
+
+# =================================================================================================================================
+# vim: set tw=0 ai: